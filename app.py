@@ -4,23 +4,40 @@
 Flask веб-сервер для управления LED эффектами
 """
 
-from flask import Flask, render_template, jsonify, request, send_from_directory
-import subprocess
+from flask import Flask, Response, render_template, jsonify, request, send_from_directory
+import hashlib
+import json
+import math
 import signal
 import sys
+import threading
+import time
 from pathlib import Path
 import yaml
 
-app = Flask(__name__)
+from effect_daemon import DaemonUnavailable, EffectDaemonClient
+from effect_events import format_sse
+from effect_metrics import format_metrics
+from effect_preview import (
+    BOUNDARY, FORMATS, MAX_PREVIEW_FPS, MAX_PREVIEW_SCALE, PREVIEW_FPS, PREVIEW_SCALE,
+    PreviewEncoder
+)
+from frame_profile import PROFILE_DIR, list_profiles
 
-# Глобальная переменная для хранения процесса текущего эффекта
-current_effect_process = None
-current_effect_name = None
+app = Flask(__name__)
 
 EFFECTS_DIR = Path(__file__).parent / "effects"
 CONFIG_FILE = Path(__file__).parent / "config.yaml"
 IMAGES_DIR = Path(__file__).parent / "templates" / "images"
 
+# Эффектами владеет отдельный демон (effect_daemon.py): сколько бы ни было
+# веб-воркеров и потоков, цикл рендеринга на матрице всегда один.
+# Если демон не запущен, первый же запрос поднимет его.
+daemon = EffectDaemonClient()
+
+# Превью панели читает кадры из общей памяти, а не у демона
+preview = PreviewEncoder()
+
 
 def load_config():
     """
@@ -96,6 +113,51 @@ def get_available_effects():
     return effects
 
 
+# Кэш каталога эффектов: пересобирается, только когда меняется
+# config.yaml или содержимое папки effects/
+_catalogue = {
+    'key': None,
+    'effects': [],
+    'etag': None,
+    'last_modified': None,
+    'load_ms': None,
+    'loads': 0,
+}
+_catalogue_lock = threading.Lock()
+
+
+def _mtime_ns(path):
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def get_effect_catalogue():
+    """
+    Возвращает закэшированный каталог эффектов.
+    mtime папки меняется при добавлении, удалении и переименовании
+    файлов, поэтому его достаточно для проверки существования эффектов.
+    """
+    key = (_mtime_ns(CONFIG_FILE), _mtime_ns(EFFECTS_DIR))
+
+    with _catalogue_lock:
+        if _catalogue['key'] != key:
+            load_start = time.perf_counter()
+            effects = get_available_effects()
+            body = json.dumps(effects, ensure_ascii=False, sort_keys=True).encode('utf-8')
+
+            _catalogue.update({
+                'key': key,
+                'effects': effects,
+                'etag': hashlib.sha1(body).hexdigest(),
+                'last_modified': max(filter(None, key), default=0) / 1e9,
+                'load_ms': round((time.perf_counter() - load_start) * 1000, 2),
+                'loads': _catalogue['loads'] + 1,
+            })
+        return dict(_catalogue)
+
+
 @app.route('/')
 def index():
     """Главная страница с интерфейсом управления"""
@@ -110,25 +172,74 @@ def serve_image(filename):
 
 @app.route('/api/effects', methods=['GET'])
 def list_effects():
-    """API: получить список всех доступных эффектов"""
-    effects = get_available_effects()
-    return jsonify(effects)
+    """API: получить список всех доступных эффектов (с ETag / Last-Modified)"""
+    catalogue = get_effect_catalogue()
+
+    response = jsonify(catalogue['effects'])
+    response.set_etag(catalogue['etag'])
+    response.last_modified = catalogue['last_modified']
+    response.cache_control.no_cache = True
+    response.headers['Server-Timing'] = f"catalogue;dur={catalogue['load_ms']}"
+    return response.make_conditional(request)
+
+
+@app.errorhandler(DaemonUnavailable)
+def daemon_unavailable(error):
+    """Демон эффектов недоступен"""
+    return jsonify({'success': False, 'error': str(error)}), 503
 
 
 @app.route('/api/effects/current', methods=['GET'])
 def get_current_effect():
-    """API: получить название текущего запущенного эффекта"""
+    """API: получить состояние текущего эффекта и время переходов"""
+    return jsonify(daemon.status())
+
+
+@app.route('/api/effects/events', methods=['GET'])
+def stream_effect_events():
+    """
+    API: поток Server-Sent Events со статусом эффекта.
+    Сразу после подключения отправляется текущий статус, затем -
+    события status (переходы состояний) и fps.
+    """
+    events = daemon.subscribe()
+    # Подключаемся к демону до ответа, чтобы вернуть 503, если его нет
+    first_event = next(events)
+
+    def stream():
+        try:
+            yield format_sse(*first_event)
+            for event_type, data in events:
+                if event_type == 'keepalive':
+                    yield ': keepalive\n\n'
+                    continue
+                yield format_sse(event_type, data)
+        finally:
+            events.close()
+
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+@app.route('/api/effects/logs', methods=['GET'])
+def get_effect_logs():
+    """API: последние N строк вывода эффекта (по умолчанию - текущего)"""
+    reply = daemon.logs(request.args.get('effect'), request.args.get('lines', 100, type=int))
+
+    if not reply['effect']:
+        return jsonify({'success': False, 'error': 'Не указано название эффекта'}), 400
+
     return jsonify({
-        'running': current_effect_name is not None,
-        'effect': current_effect_name
+        'effect': reply['effect'],
+        'lines': reply['lines']
     })
 
 
 @app.route('/api/effects/start', methods=['POST'])
 def start_effect():
-    """API: запустить эффект"""
-    global current_effect_process, current_effect_name
-
+    """API: запустить эффект (переключение выполняется асинхронно)"""
     data = request.get_json()
     effect_name = data.get('effect')
 
@@ -140,74 +251,150 @@ def start_effect():
     if not effect_file.exists():
         return jsonify({'success': False, 'error': 'Эффект не найден'}), 404
 
-    # Остановить текущий эффект, если он запущен
-    if current_effect_process:
-        try:
-            current_effect_process.terminate()
-            current_effect_process.wait(timeout=3)
-        except:
-            current_effect_process.kill()
-        current_effect_process = None
-        current_effect_name = None
-
-    # Запустить новый эффект
-    try:
-        current_effect_process = subprocess.Popen(
-            [sys.executable, str(effect_file)],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            cwd=str(EFFECTS_DIR)
-        )
-        current_effect_name = effect_name
-
-        return jsonify({
-            'success': True,
-            'effect': effect_name,
-            'message': f'Эффект "{effect_name}" запущен'
-        })
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': f'Ошибка при запуске эффекта: {str(e)}'
-        }), 500
+    reply = daemon.start(effect_name)
+    if not reply['ok']:
+        return jsonify({'success': False, 'error': reply['error']}), 404
+
+    return jsonify({
+        'success': True,
+        'effect': effect_name,
+        'message': f'Эффект "{effect_name}" запускается',
+        'status': reply['status']
+    }), 202
 
 
 @app.route('/api/effects/stop', methods=['POST'])
 def stop_effect():
-    """API: остановить текущий эффект"""
-    global current_effect_process, current_effect_name
+    """API: остановить текущий эффект (остановка выполняется асинхронно)"""
+    reply = daemon.stop()
+    if not reply['ok']:
+        return jsonify({'success': False, 'error': reply['error']}), 400
 
-    if not current_effect_process:
-        return jsonify({'success': False, 'error': 'Нет запущенного эффекта'}), 400
+    return jsonify({
+        'success': True,
+        'message': f'Эффект "{reply["effect"]}" останавливается',
+        'status': reply['status']
+    }), 202
 
-    try:
-        current_effect_process.terminate()
-        current_effect_process.wait(timeout=3)
-    except:
-        current_effect_process.kill()
 
-    stopped_effect = current_effect_name
-    current_effect_process = None
-    current_effect_name = None
+@app.route('/api/effects/control', methods=['POST'])
+def control_effect():
+    """
+    API: параметры управления текущему эффекту-плагину без перезапуска
+    (например, {"palette": "purple", "fade": 2} для fire).
+    Ошибки в параметрах попадают в лог эффекта.
+    """
+    params = request.get_json(silent=True)
+    reply = daemon.control(params)
+    if not reply['ok']:
+        return jsonify({'success': False, 'error': reply['error']}), 400
 
     return jsonify({
         'success': True,
-        'message': f'Эффект "{stopped_effect}" остановлен'
-    })
+        'effect': reply['effect'],
+        'message': f'Параметры переданы эффекту "{reply["effect"]}"'
+    }), 202
+
+
+@app.route('/api/effects/profile', methods=['POST'])
+def profile_effect():
+    """
+    API: профиль следующих frames кадров текущего эффекта без его
+    перезапуска. Параметры JSON: mode (cprofile|sample), frames.
+    Готовый файл появляется в GET /api/effects/profiles.
+    """
+    data = request.get_json(silent=True) or {}
+    reply = daemon.profile(data.get('mode'), data.get('frames'))
+    if not reply['ok']:
+        return jsonify({'success': False, 'error': reply['error']}), 400
+
+    return jsonify({
+        'success': True,
+        'effect': reply['effect'],
+        'mode': reply['mode'],
+        'frames': reply['frames'],
+        'message': f'Профилирование "{reply["effect"]}" на {reply["frames"]} кадров запущено'
+    }), 202
+
+
+@app.route('/api/effects/profiles', methods=['GET'])
+def get_profiles():
+    """API: список записанных профилей, новые первыми"""
+    return jsonify({'profiles': list_profiles()})
+
+
+@app.route('/api/effects/profiles/<path:filename>', methods=['GET'])
+def download_profile(filename):
+    """API: скачать файл профиля"""
+    return send_from_directory(PROFILE_DIR, filename, as_attachment=True)
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Метрики панели в текстовом формате Prometheus"""
+    try:
+        effect_metrics = daemon.metrics()
+    except (DaemonUnavailable, OSError):
+        effect_metrics = None
+
+    text = format_metrics(effect_metrics, get_effect_catalogue(), daemon_up=effect_metrics is not None)
+    return Response(text, mimetype='text/plain; version=0.0.4')
+
+
+def preview_params():
+    """Формат, масштаб и частота превью из параметров запроса"""
+    fmt = request.args.get('format', 'jpeg').lower()
+    if fmt not in FORMATS:
+        fmt = 'jpeg'
+    scale = min(max(request.args.get('scale', PREVIEW_SCALE, type=int), 1), MAX_PREVIEW_SCALE)
+    fps = request.args.get('fps', PREVIEW_FPS, type=float)
+    if not math.isfinite(fps):
+        # nan проходит через min/max и превращает интервал потока в nan
+        fps = PREVIEW_FPS
+    fps = min(max(fps, 0.5), MAX_PREVIEW_FPS)
+    return fmt, scale, fps
+
+
+@app.route('/api/preview', methods=['GET'])
+def preview_stream():
+    """
+    API: живое превью панели (multipart MJPEG или PNG).
+    Параметры: format=jpeg|png, scale (увеличение), fps (частота).
+    """
+    fmt, scale, fps = preview_params()
+    return Response(preview.stream(fmt, scale, fps),
+                    mimetype=f'multipart/x-mixed-replace; boundary={BOUNDARY}',
+                    headers={
+                        'Cache-Control': 'no-cache',
+                        'X-Accel-Buffering': 'no'
+                    })
+
+
+@app.route('/api/preview/frame', methods=['GET'])
+def preview_frame():
+    """API: текущий кадр панели одним изображением"""
+    fmt, scale, _ = preview_params()
+    encoded = preview.encode(fmt, scale)
+    if encoded is None:
+        return jsonify({'success': False, 'error': 'Кадров ещё не было'}), 404
+
+    sequence, data = encoded
+    response = Response(data, mimetype=FORMATS[fmt][1])
+    response.cache_control.no_store = True
+    response.headers['X-Frame-Sequence'] = str(sequence)
+    return response
 
 
 def signal_handler(_sig, _frame):
     """Обработчик сигнала для корректного завершения"""
-    global current_effect_process
-
     print('\nОстановка сервера...')
 
-    if current_effect_process:
+    # Демон, поднятый этим сервером (а не systemd), останавливаем вместе с ним
+    if daemon.spawned:
         try:
-            current_effect_process.terminate()
-            current_effect_process.wait(timeout=3)
-        except:
-            current_effect_process.kill()
+            daemon.shutdown()
+        except (DaemonUnavailable, OSError):
+            pass
 
     sys.exit(0)
 
@@ -220,7 +407,7 @@ if __name__ == '__main__':
     print("LED Effects Control Server")
     print("=" * 50)
     print(f"Папка с эффектами: {EFFECTS_DIR}")
-    print(f"Доступно эффектов: {len(get_available_effects())}")
+    print(f"Доступно эффектов: {len(get_effect_catalogue()['effects'])}")
     print("=" * 50)
 
     # Запускаем Flask сервер
@@ -0,0 +1,273 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Время кадра каждого эффекта без панели и сравнение с базовой линией.
+
+Каждый эффект запускается в отдельном процессе на null-матрице
+(LED_BACKEND=null, см. effects/null_matrix.py) с фиксированным seed
+для random и numpy. Часы кадров не спят, поэтому кадры идут подряд с
+максимальной скоростью; после WARMUP кадров разгона замеряется
+--frames кадров, затем ещё --alloc-frames кадров под tracemalloc.
+
+Для эффекта в JSON попадают:
+- mean_ms, p50_ms, p99_ms - время кадра (генерация и вывод);
+- max_fps - сколько кадров в секунду эффект успевает сгенерировать,
+  target_fps - FPS его часов, realtime - успевает ли он за ними;
+- alloc_kb - пик памяти, выделенной за кадр сверх уже занятой
+  (в среднем по кадрам, tracemalloc).
+
+    python benchmarks/bench_effects.py --output results.json
+    python benchmarks/bench_effects.py fire Helix --compare benchmarks/baseline.json
+
+С --compare эффекты, у которых mean_ms или p99_ms выросли больше чем
+на --threshold (и хотя бы на MIN_DELTA_MS), считаются регрессией, и код выхода - 1. Базовая линия
+обновляется через --update-baseline. Числа зависят от машины: сравнивать
+имеет смысл только прогоны на одном и том же железе.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+EFFECTS_DIR = ROOT / "effects"
+BASELINE_FILE = Path(__file__).resolve().parent / "baseline.json"
+
+sys.path.insert(0, str(EFFECTS_DIR))
+from led_matrix import load_config, panel_size  # noqa: E402
+from frame_stats import percentiles  # noqa: E402
+
+# Кадров разгона до замера (заполнение буферов, первые фигуры)
+WARMUP = 10
+
+# Аргументы командной строки для эффектов, которые без них не запускаются
+EFFECT_ARGS = {
+    'inactive_text': ['LED', '--scroll'],
+}
+
+# Допустимый рост времени кадра относительно базовой линии
+THRESHOLD = 0.15
+
+# Рост меньше этого (мс) - шум измерения, а не регрессия
+MIN_DELTA_MS = 0.5
+
+# Сколько ждать один эффект (секунды)
+TIMEOUT = 300
+
+
+# ==================== ДОЧЕРНИЙ ПРОЦЕСС ====================
+
+def run_child(effect_file, frames, alloc_frames, seed, result_file):
+    """Выполняет эффект в этом процессе и пишет замеры в result_file"""
+    import random
+    import runpy
+    import tracemalloc
+
+    import numpy as np
+
+    import frame_clock
+
+    random.seed(seed)
+    np.random.seed(seed)
+
+    frame_times = []
+    alloc = []
+    state = {'last': None, 'count': 0, 'target_fps': None, 'alloc_base': 0}
+    total = WARMUP + frames + alloc_frames
+
+    def no_wait(_timeout):
+        pass
+
+    original_init = frame_clock.FrameClock.__init__
+    original_tick = frame_clock.FrameClock.tick
+
+    def init(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        self.wait = no_wait
+
+    def finish():
+        with open(result_file, 'w', encoding='utf-8') as f:
+            json.dump({'frame_times': frame_times, 'alloc': alloc,
+                       'target_fps': state['target_fps']}, f)
+        sys.stdout.flush()
+        os._exit(0)
+
+    def tick(self):
+        now = time.perf_counter()
+        count = state['count']
+        if WARMUP < count <= WARMUP + frames:
+            frame_times.append(now - state['last'])
+        elif count > WARMUP + frames:
+            current, peak = tracemalloc.get_traced_memory()
+            alloc.append(max(0, peak - state['alloc_base']))
+        state['count'] = count = count + 1
+        state['target_fps'] = self.fps
+
+        if count > total:
+            finish()
+        if count == WARMUP + frames + 1:
+            tracemalloc.start()
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            state['alloc_base'] = tracemalloc.get_traced_memory()[0]
+
+        result = original_tick(self)
+        state['last'] = time.perf_counter()
+        return result
+
+    frame_clock.FrameClock.__init__ = init
+    frame_clock.FrameClock.tick = tick
+
+    effect_file = Path(effect_file)
+    os.chdir(effect_file.parent)
+    sys.argv = [str(effect_file)] + EFFECT_ARGS.get(effect_file.stem, [])
+    runpy.run_path(str(effect_file), run_name='__main__')
+    # Эффект завершился сам раньше, чем набралось нужное число кадров
+    finish()
+
+
+# ==================== ЗАПУСК И СРАВНЕНИЕ ====================
+
+def bench_effect(name, frames, alloc_frames, seed, timeout=TIMEOUT):
+    """Замеры одного эффекта в отдельном процессе"""
+    effect_file = EFFECTS_DIR / f"{name}.py"
+    if not effect_file.exists():
+        return {'error': 'файл эффекта не найден'}
+
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+        result_file = f.name
+    # Свой кадровый буфер: живой /dev/shm/led-frame читает превью работающей панели
+    frame_file = result_file[:-len('.json')] + '.frame'
+    env = dict(os.environ, LED_BACKEND='null', LED_FRAME_SHM=frame_file, PYTHONHASHSEED=str(seed))
+    command = [sys.executable, str(Path(__file__).resolve()), '--child', str(effect_file),
+               '--frames', str(frames), '--alloc-frames', str(alloc_frames),
+               '--seed', str(seed), '--result', result_file]
+    try:
+        process = subprocess.run(command, env=env, stdout=subprocess.DEVNULL,
+                                 stderr=subprocess.PIPE, timeout=timeout)
+        with open(result_file, 'r', encoding='utf-8') as f:
+            raw = json.load(f) if os.path.getsize(result_file) else None
+    except subprocess.TimeoutExpired:
+        return {'error': f'нет результата за {timeout} с'}
+    finally:
+        os.unlink(result_file)
+        if os.path.exists(frame_file):
+            os.unlink(frame_file)
+
+    if not raw or not raw['frame_times']:
+        error = process.stderr.decode('utf-8', 'replace').strip().splitlines()
+        return {'error': error[-1] if error else f'код выхода {process.returncode}'}
+
+    times = raw['frame_times']
+    mean = sum(times) / len(times)
+    quantiles = percentiles(times)
+    target_fps = raw['target_fps']
+    alloc = raw['alloc']
+    return {
+        'frames': len(times),
+        'mean_ms': round(mean * 1000, 3),
+        'p50_ms': quantiles['p50'],
+        'p99_ms': quantiles['p99'],
+        'max_fps': round(1 / mean, 1) if mean > 0 else None,
+        'target_fps': round(target_fps, 2) if target_fps else None,
+        'realtime': bool(target_fps) and mean * target_fps <= 1,
+        'alloc_kb': round(sum(alloc) / len(alloc) / 1024, 1) if alloc else None,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Список регрессий: (эффект, метрика, было, стало)"""
+    regressions = []
+    for name, result in results['effects'].items():
+        base = baseline.get('effects', {}).get(name)
+        if not base or 'error' in base:
+            continue
+        if 'error' in result:
+            regressions.append((name, 'error', None, result['error']))
+            continue
+        for metric in ('mean_ms', 'p99_ms'):
+            if (result[metric] > base[metric] * (1 + threshold)
+                    and result[metric] - base[metric] >= MIN_DELTA_MS):
+                regressions.append((name, metric, base[metric], result[metric]))
+    return regressions
+
+
+def effect_names():
+    """Эффекты из config.yaml в порядке списка"""
+    return [entry['file'] for entry in load_config().get('effects') or [] if entry.get('file')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Время кадра эффектов без панели')
+    parser.add_argument('effects', nargs='*', help='Эффекты (по умолчанию - все из config.yaml)')
+    parser.add_argument('--frames', type=int, default=200, help='Кадров на замер времени')
+    parser.add_argument('--alloc-frames', type=int, default=20, help='Кадров на замер памяти')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Куда записать результаты (JSON)')
+    parser.add_argument('--compare', nargs='?', const=str(BASELINE_FILE),
+                        help='Сравнить с базовой линией (по умолчанию benchmarks/baseline.json)')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help='Допустимый рост времени кадра (0.15 - 15%%)')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='Записать результаты в benchmarks/baseline.json')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--result', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.frames, args.alloc_frames, args.seed, args.result)
+        return
+
+    width, height = panel_size()
+    results = {
+        'meta': {
+            'frames': args.frames,
+            'seed': args.seed,
+            'panel': f'{width}x{height}',
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+        },
+        'effects': {},
+    }
+
+    print(f"Панель {width}x{height}, {args.frames} кадров на эффект, seed {args.seed}")
+    print(f"{'эффект':32} {'среднее, мс':>11} {'p99, мс':>8} {'макс. FPS':>9} {'цель':>6} {'память, КБ':>10}")
+    for name in args.effects or effect_names():
+        result = bench_effect(name, args.frames, args.alloc_frames, args.seed)
+        results['effects'][name] = result
+        if 'error' in result:
+            print(f"{name:32} ошибка: {result['error']}")
+            continue
+        mark = '' if result['realtime'] else ' !'
+        print(f"{name:32} {result['mean_ms']:11.2f} {result['p99_ms']:8.2f} "
+              f"{result['max_fps']:9.1f} {result['target_fps'] or 0:6g}{mark} "
+              f"{result['alloc_kb'] if result['alloc_kb'] is not None else '-':>10}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    if args.update_baseline:
+        with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nРегрессии (порог {args.threshold:.0%}):")
+            for name, metric, before, after in regressions:
+                print(f"  {name}: {metric} {before} -> {after}")
+            sys.exit(1)
+        print(f"\nРегрессий нет (порог {args.threshold:.0%})")
+
+
+if __name__ == '__main__':
+    main()
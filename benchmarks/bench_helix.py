@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Время генерации кадра каждой анимации Helix по отдельности.
+
+bench_effects.py меряет Helix целиком, а в авто-режиме за замер
+успевает показаться только одна анимация. Здесь каждая анимация
+создаётся сама по себе на холсте из config.yaml и генерирует --frames
+кадров подряд с шагом 1 / FPS; вывод на панель не входит в замер.
+Замер повторяется --rounds раз, и в таблицу идёт лучший: так меньше
+влияет фоновая нагрузка машины.
+
+    python benchmarks/bench_helix.py
+    python benchmarks/bench_helix.py --against HEAD~1
+
+С --against та же таблица строится для Helix.py из указанной ревизии
+git, и для каждой анимации печатается, во сколько раз кадр стал быстрее.
+"""
+
+import argparse
+import importlib.util
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+EFFECTS_DIR = ROOT / "effects"
+HELIX_FILE = EFFECTS_DIR / "Helix.py"
+
+sys.path.insert(0, str(EFFECTS_DIR))
+from led_matrix import panel_size  # noqa: E402
+from frame_stats import percentiles  # noqa: E402
+
+# Кадров разгона до замера
+WARMUP = 20
+
+
+def load_helix(path, name):
+    """Модуль Helix из файла path"""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_revision(revision):
+    """Модуль Helix из ревизии git"""
+    source = subprocess.run(['git', 'show', f'{revision}:effects/Helix.py'], cwd=ROOT,
+                            capture_output=True, text=True, check=True).stdout
+    # Файл кладётся рядом с эффектами, чтобы работали их импорты
+    with tempfile.NamedTemporaryFile('w', suffix='.py', dir=EFFECTS_DIR, delete=False,
+                                     encoding='utf-8') as f:
+        f.write(source)
+    try:
+        return load_helix(f.name, 'helix_reference')
+    finally:
+        Path(f.name).unlink()
+
+
+def bench_animation(cls, width, height, fps, frames):
+    """Время generate_frame одной анимации: среднее и p99 в миллисекундах"""
+    animation = cls(width, height)
+    dt = 1 / fps
+    times = []
+    for frame in range(WARMUP + frames):
+        start = time.perf_counter()
+        animation.generate_frame(frame * dt, dt)
+        if frame >= WARMUP:
+            times.append(time.perf_counter() - start)
+    return sum(times) / len(times) * 1000, percentiles(times)['p99']
+
+
+def bench_module(module, width, height, frames, best=None):
+    """{название анимации: (среднее, p99)}; с best - лучший из нового и прошлых замеров"""
+    best = dict(best or {})
+    for name, cls in zip(module.ANIMATION_NAMES, module.ANIMATION_CLASSES):
+        result = bench_animation(cls, width, height, module.FPS, frames)
+        if name not in best or result[0] < best[name][0]:
+            best[name] = result
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Время кадра анимаций Helix')
+    parser.add_argument('--frames', type=int, default=300, help='Кадров на анимацию')
+    parser.add_argument('--rounds', type=int, default=3, help='Повторов замера')
+    parser.add_argument('--against', metavar='REV', help='Сравнить с Helix.py из ревизии git')
+    args = parser.parse_args()
+
+    width, height = panel_size()
+    current = load_helix(HELIX_FILE, 'helix')
+    previous = load_revision(args.against) if args.against else None
+    results, reference = {}, {}
+    # Версии замеряются по очереди, чтобы фоновая нагрузка делилась между ними поровну
+    for _ in range(max(1, args.rounds)):
+        results = bench_module(current, width, height, args.frames, results)
+        if previous:
+            reference = bench_module(previous, width, height, args.frames, reference)
+
+    print(f"Холст {width}x{height}, {args.frames} кадров на анимацию")
+    header = f"{'анимация':28} {'среднее, мс':>11} {'p99, мс':>8}"
+    if reference:
+        header += f" {args.against + ', мс':>14} {'ускорение':>9}"
+    print(header)
+    for name, (mean, p99) in results.items():
+        line = f"{name:28} {mean:11.3f} {p99:8.3f}"
+        if name in reference:
+            before = reference[name][0]
+            line += f" {before:14.3f} {before / mean:8.1f}x"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Стоимость вывода одного кадра на панель: старый путь эффектов
+(convert("RGB") / Image.fromarray + matrix.SetImage) против FrameOutput.
+
+Запуск на Raspberry Pi с панелью (нужны права на GPIO):
+    sudo python benchmarks/bench_push.py --frames 2000
+
+Новый путь включает смену холстов по VSync и запись в общий кадровый
+буфер, старый путь - тоже с записью в буфер, как это делал перехват
+SetImage в зиготе.
+
+Отдельно сравнивается вывод POINTS точек: SetPixel на каждую точку
+против одной записи в PixelBuffer и show().
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "effects"))
+from led_matrix import create_matrix  # noqa: E402
+from frame_output import FrameOutput, PixelBuffer  # noqa: E402
+from frame_share import shared_writer  # noqa: E402
+
+# Точек в кадре для сравнения SetPixel и PixelBuffer (капли rgb_stats)
+POINTS = 300
+
+
+def measure(push, frames):
+    """Время одного вызова push() в микросекундах: среднее и p95"""
+    times = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        push()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return sum(times) / len(times) * 1e6, times[int(len(times) * 0.95)] * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Стоимость вывода кадра на панель')
+    parser.add_argument('--frames', type=int, default=1000, help='Кадров на каждый вариант')
+    args = parser.parse_args()
+
+    matrix = create_matrix()
+    output = FrameOutput(matrix)
+    frame_share = shared_writer(matrix.width, matrix.height)
+
+    rng = np.random.default_rng(0)
+    array = rng.integers(0, 256, (matrix.height, matrix.width, 3), dtype=np.uint8)
+    image = Image.fromarray(array, 'RGB')
+
+    def old_pil():
+        converted = image.convert("RGB")
+        matrix.SetImage(converted)
+        frame_share.write(converted)
+
+    def old_numpy():
+        converted = Image.fromarray(array, 'RGB').convert("RGB")
+        matrix.SetImage(converted)
+        frame_share.write(converted)
+
+    xs = rng.integers(0, matrix.width, POINTS)
+    ys = rng.integers(0, matrix.height, POINTS)
+    colors = rng.integers(0, 256, (POINTS, 3))
+    points = [(int(x), int(y), *map(int, c)) for x, y, c in zip(xs, ys, colors)]
+    pixels = PixelBuffer(matrix.width, matrix.height)
+
+    def old_points():
+        for x, y, r, g, b in points:
+            matrix.SetPixel(x, y, r, g, b)
+
+    def new_points():
+        pixels.set_pixels(xs, ys, colors)
+        output.show(pixels.pixels)
+
+    cases = [
+        ('PIL:   SetImage(frame.convert("RGB"))', old_pil),
+        ('PIL:   FrameOutput.show(frame)', lambda: output.show(image)),
+        ('numpy: SetImage(fromarray().convert())', old_numpy),
+        ('numpy: FrameOutput.show(array)', lambda: output.show(array)),
+        (f'{POINTS} точек: SetPixel на точку', old_points),
+        (f'{POINTS} точек: PixelBuffer + show()', new_points),
+    ]
+
+    print(f"Кадр {matrix.width}x{matrix.height}, {args.frames} кадров на вариант")
+    print(f"{'вариант':44} {'среднее, мкс':>13} {'p95, мкс':>10}")
+    for name, push in cases:
+        measure(push, min(100, args.frames))
+        mean, p95 = measure(push, args.frames)
+        print(f"{name:44} {mean:13.1f} {p95:10.1f}")
+
+    matrix.Clear()
+
+
+if __name__ == '__main__':
+    main()
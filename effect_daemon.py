@@ -0,0 +1,373 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Демон LED эффектов - единственный владелец матрицы.
+
+Веб-воркеры gunicorn (и их потоки) не запускают эффекты сами, а
+отправляют команды демону через локальный сокет. Демону принадлежат
+зигота, супервизор, буферы вывода и рассылка событий, поэтому сколько
+бы ни было веб-воркеров, цикл рендеринга на панели ровно один.
+
+Запросы - JSON по одной строке, ответ - одна JSON строка. Команда
+subscribe переводит соединение в поток событий (по строке на событие).
+
+Статус отдаётся из снимка, который обновляется по событиям
+супервизора, так что чтение статуса не ждёт фонового потока.
+"""
+
+import json
+import os
+import queue
+import signal
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from effect_events import EventBroadcaster
+from effect_logs import EffectLogs, drain_pipe
+from effect_supervisor import EffectSupervisor
+from effect_zygote import EffectZygote, fork_available
+
+EFFECTS_DIR = Path(__file__).parent / "effects"
+
+sys.path.insert(0, str(EFFECTS_DIR))
+from frame_profile import DEFAULT_MODE, MODES, clamp_frames  # noqa: E402
+
+# Адрес демона: unix-сокет, а где его нет - локальный TCP порт
+DAEMON_SOCKET = os.environ.get('LED_DAEMON_SOCKET', '/tmp/led-effects.sock')
+DAEMON_TCP_PORT = int(os.environ.get('LED_DAEMON_PORT', '5001'))
+USE_UNIX_SOCKET = hasattr(socket, 'AF_UNIX')
+
+# Файл блокировки: демон держит её всё время работы
+DAEMON_LOCK = DAEMON_SOCKET + '.lock'
+
+# Как часто отправлять keepalive подписчикам (секунды)
+KEEPALIVE_INTERVAL = 15
+
+# Сколько ждать запуска демона, поднятого клиентом (секунды)
+SPAWN_TIMEOUT = 10
+
+
+class DaemonUnavailable(Exception):
+    """Демон не запущен и не удалось его запустить"""
+
+
+# ==================== ДЕМОН ====================
+
+class EffectDaemon:
+    def __init__(self):
+        # Зигота держит заранее импортированные модули и форкает эффекты по запросу.
+        # На платформах без fork() эффекты запускаются отдельным интерпретатором.
+        self.zygote = EffectZygote(EFFECTS_DIR) if fork_available() else None
+        if self.zygote:
+            self.zygote.start()
+
+        self.logs = EffectLogs()
+        self.events = EventBroadcaster()
+        self.supervisor = EffectSupervisor(self.launch_effect, events=self.events)
+
+        self.status = self.supervisor.snapshot()
+        threading.Thread(target=self._track_status, daemon=True).start()
+
+    def launch_effect(self, effect_name, requested_at):
+        """
+        Запускает файл эффекта и возвращает объект процесса.
+        Через зиготу запуск занимает время fork(), без неё - полный старт Python.
+        """
+        effect_file = EFFECTS_DIR / f"{effect_name}.py"
+        output = self.logs.buffer(effect_name)
+        if self.zygote:
+            return self.zygote.launch(effect_file, requested_at, output=output)
+
+        process = subprocess.Popen(
+            [sys.executable, str(effect_file)],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=str(EFFECTS_DIR)
+        )
+        # Каналы обязательно вычитываются, иначе эффект зависнет в print()
+        drain_pipe(process.stdout, output, 'stdout')
+        drain_pipe(process.stderr, output, 'stderr')
+        return process
+
+    def _track_status(self):
+        """Поддерживает снимок статуса по событиям супервизора"""
+        subscriber = self.events.subscribe()
+        while True:
+            event_type, data = subscriber.get()
+            if event_type == 'status':
+                self.status = data
+            elif event_type == 'fps':
+                self.status = dict(self.status, fps=data['fps'])
+
+    def handle(self, request):
+        cmd = request.get('cmd')
+
+        if cmd == 'status':
+            return {'ok': True, 'status': self.status}
+
+        if cmd == 'metrics':
+            return {'ok': True, 'metrics': self.supervisor.metrics()}
+
+        if cmd == 'start':
+            effect_name = request.get('effect')
+            if not effect_name or not (EFFECTS_DIR / f"{effect_name}.py").exists():
+                return {'ok': False, 'error': 'Эффект не найден'}
+            self.supervisor.request_start(effect_name)
+            return {'ok': True, 'status': self.supervisor.snapshot()}
+
+        if cmd == 'stop':
+            if not self.supervisor.is_active():
+                return {'ok': False, 'error': 'Нет запущенного эффекта'}
+            stopped = self.status.get('effect')
+            self.supervisor.request_stop()
+            return {'ok': True, 'effect': stopped, 'status': self.supervisor.snapshot()}
+
+        if cmd == 'profile':
+            effect_name, process = self.supervisor.running_process()
+            if process is None:
+                return {'ok': False, 'error': 'Нет запущенного эффекта'}
+            if not hasattr(process, 'profile'):
+                return {'ok': False, 'error': 'Профилирование доступно только для эффектов, запущенных через зиготу'}
+            mode = request.get('mode') or DEFAULT_MODE
+            if mode not in MODES:
+                return {'ok': False, 'error': f"Неизвестный режим профилирования: {mode}"}
+            try:
+                frames = clamp_frames(request.get('frames'))
+            except (TypeError, ValueError, OverflowError):
+                return {'ok': False, 'error': f"Некорректное число кадров: {request.get('frames')!r}"}
+            process.profile(mode, frames)
+            return {'ok': True, 'effect': effect_name, 'mode': mode, 'frames': frames}
+
+        if cmd == 'control':
+            effect_name, process = self.supervisor.running_process()
+            if process is None:
+                return {'ok': False, 'error': 'Нет запущенного эффекта'}
+            params = request.get('params')
+            if not isinstance(params, dict) or not params:
+                return {'ok': False, 'error': 'Не указаны параметры управления'}
+            if not hasattr(process, 'control'):
+                return {'ok': False, 'error': 'Управление доступно только для эффектов, запущенных через зиготу'}
+            process.control(params)
+            return {'ok': True, 'effect': effect_name}
+
+        if cmd == 'logs':
+            effect_name = request.get('effect') or self.status.get('effect')
+            return {
+                'ok': True,
+                'effect': effect_name,
+                'lines': self.logs.tail(effect_name, int(request.get('lines', 100))) if effect_name else []
+            }
+
+        if cmd == 'shutdown':
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {'ok': True}
+
+        return {'ok': False, 'error': f'Неизвестная команда: {cmd}'}
+
+    def shutdown(self):
+        self.supervisor.shutdown()
+        if self.zygote:
+            self.zygote.stop()
+        os._exit(0)
+
+
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return
+
+        daemon = self.server.effect_daemon
+        if request.get('cmd') == 'subscribe':
+            self.stream_events(daemon)
+            return
+
+        reply = daemon.handle(request)
+        self.wfile.write((json.dumps(reply, ensure_ascii=False) + '\n').encode('utf-8'))
+
+    def stream_events(self, daemon):
+        subscriber = daemon.events.subscribe()
+        try:
+            self.send_event('status', daemon.status)
+            while True:
+                try:
+                    event_type, data = subscriber.get(timeout=KEEPALIVE_INTERVAL)
+                except queue.Empty:
+                    # Заодно проверяем, что подписчик ещё на связи
+                    self.send_event('keepalive', None)
+                    continue
+                self.send_event(event_type, data)
+        except OSError:
+            pass
+        finally:
+            daemon.events.unsubscribe(subscriber)
+
+    def send_event(self, event_type, data):
+        message = json.dumps({'type': event_type, 'data': data}, ensure_ascii=False)
+        self.wfile.write((message + '\n').encode('utf-8'))
+        self.wfile.flush()
+
+
+def acquire_daemon_lock():
+    """
+    Эксклюзивная блокировка на всё время работы демона.
+    Возвращает открытый файл или None, если демон уже запущен.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        # Без fcntl единственность обеспечивает занятый TCP порт
+        return True
+
+    lock_file = open(DAEMON_LOCK, 'w')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+def create_server():
+    if USE_UNIX_SOCKET:
+        if os.path.exists(DAEMON_SOCKET):
+            os.unlink(DAEMON_SOCKET)
+        server = socketserver.ThreadingUnixStreamServer(DAEMON_SOCKET, DaemonRequestHandler)
+        os.chmod(DAEMON_SOCKET, 0o660)
+    else:
+        server = socketserver.ThreadingTCPServer(('127.0.0.1', DAEMON_TCP_PORT), DaemonRequestHandler)
+    server.daemon_threads = True
+    return server
+
+
+def daemon_main():
+    lock = acquire_daemon_lock()
+    if lock is None:
+        print("Демон эффектов уже запущен")
+        return
+
+    server = create_server()
+    server.effect_daemon = EffectDaemon()
+
+    def handle_signal(_sig, _frame):
+        print('\nОстановка демона эффектов...')
+        server.effect_daemon.shutdown()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    print(f"Демон эффектов слушает {DAEMON_SOCKET if USE_UNIX_SOCKET else DAEMON_TCP_PORT}")
+    server.serve_forever()
+
+
+# ==================== КЛИЕНТ (ВЕБ-ВОРКЕРЫ) ====================
+
+class EffectDaemonClient:
+    """
+    Клиент демона для веб-воркеров. Если демон не отвечает и
+    auto_spawn включён, клиент запускает его сам (лишний экземпляр,
+    запущенный гонкой воркеров, завершится на блокировке).
+    """
+
+    def __init__(self, auto_spawn=True, timeout=5):
+        self.auto_spawn = auto_spawn
+        self.timeout = timeout
+        self.spawned = None
+
+    def _connect(self):
+        if USE_UNIX_SOCKET:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            address = DAEMON_SOCKET
+        else:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            address = ('127.0.0.1', DAEMON_TCP_PORT)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(address)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def connect(self):
+        try:
+            return self._connect()
+        except OSError:
+            if not self.auto_spawn:
+                raise DaemonUnavailable('Демон эффектов не запущен')
+
+        self.spawn()
+        deadline = time.monotonic() + SPAWN_TIMEOUT
+        while time.monotonic() < deadline:
+            try:
+                return self._connect()
+            except OSError:
+                time.sleep(0.1)
+        raise DaemonUnavailable('Не удалось запустить демон эффектов')
+
+    def spawn(self):
+        """Запускает демон в отдельной сессии, чтобы он пережил веб-воркер"""
+        self.spawned = subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve())],
+            cwd=str(Path(__file__).parent),
+            start_new_session=True
+        )
+
+    def request(self, **request):
+        with self.connect() as sock:
+            sock.sendall((json.dumps(request) + '\n').encode('utf-8'))
+            with sock.makefile('rb') as reply:
+                line = reply.readline()
+        if not line:
+            raise DaemonUnavailable('Демон эффектов закрыл соединение')
+        return json.loads(line)
+
+    def status(self):
+        return self.request(cmd='status')['status']
+
+    def metrics(self):
+        return self.request(cmd='metrics')['metrics']
+
+    def start(self, effect_name):
+        return self.request(cmd='start', effect=effect_name)
+
+    def stop(self):
+        return self.request(cmd='stop')
+
+    def logs(self, effect_name=None, lines=100):
+        return self.request(cmd='logs', effect=effect_name, lines=lines)
+
+    def profile(self, mode=None, frames=None):
+        return self.request(cmd='profile', mode=mode, frames=frames)
+
+    def control(self, params):
+        return self.request(cmd='control', params=params)
+
+    def shutdown(self):
+        return self.request(cmd='shutdown')
+
+    def subscribe(self):
+        """Генератор событий (type, data); keepalive приходят с type == 'keepalive'"""
+        sock = self.connect()
+        sock.settimeout(None)
+        try:
+            sock.sendall(b'{"cmd": "subscribe"}\n')
+            with sock.makefile('rb') as stream:
+                for line in stream:
+                    event = json.loads(line)
+                    yield event['type'], event['data']
+        finally:
+            sock.close()
+
+
+if __name__ == '__main__':
+    daemon_main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Рассылка событий эффектов подписчикам (Server-Sent Events).
+
+Каждый подписчик получает свою ограниченную очередь. Медленный
+подписчик теряет старые события, но никогда не тормозит источник.
+"""
+
+import json
+import queue
+import threading
+
+# Размер очереди одного подписчика
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class EventBroadcaster:
+    def __init__(self, queue_size=SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.subscribers = set()
+        self.lock = threading.Lock()
+
+    def subscribe(self):
+        subscriber = queue.Queue(maxsize=self.queue_size)
+        with self.lock:
+            self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def publish(self, event_type, data):
+        event = (event_type, data)
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                # Выбрасываем самое старое событие, чтобы освободить место
+                try:
+                    subscriber.get_nowait()
+                    subscriber.put_nowait(event)
+                except (queue.Empty, queue.Full):
+                    pass
+
+
+def format_sse(event_type, data):
+    """Форматирует событие в формате text/event-stream"""
+    return f"event: {event_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
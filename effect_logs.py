@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Кольцевые буферы вывода эффектов.
+
+stdout/stderr эффекта всегда вычитываются в фоне в ограниченный
+буфер в памяти, поэтому print() в эффекте никогда не блокируется
+на переполненном канале, а последние строки можно посмотреть через API.
+"""
+
+import threading
+import time
+from collections import deque
+
+# Сколько последних строк хранится для каждого эффекта
+LOG_LINES = 500
+
+
+class LogBuffer:
+    """Ограниченный буфер строк вывода одного эффекта"""
+
+    def __init__(self, maxlen=LOG_LINES):
+        self.lines = deque(maxlen=maxlen)
+        self.lock = threading.Lock()
+
+    def append(self, stream, line):
+        with self.lock:
+            self.lines.append({
+                't': time.time(),
+                'stream': stream,
+                'line': line.rstrip('\n'),
+            })
+
+    def tail(self, count):
+        with self.lock:
+            if count <= 0:
+                return []
+            return list(self.lines)[-count:]
+
+
+class EffectLogs:
+    """Буферы вывода по именам эффектов (сохраняются между запусками)"""
+
+    def __init__(self, maxlen=LOG_LINES):
+        self.maxlen = maxlen
+        self.buffers = {}
+        self.lock = threading.Lock()
+
+    def buffer(self, effect_name):
+        with self.lock:
+            if effect_name not in self.buffers:
+                self.buffers[effect_name] = LogBuffer(self.maxlen)
+            return self.buffers[effect_name]
+
+    def tail(self, effect_name, count):
+        with self.lock:
+            buffer = self.buffers.get(effect_name)
+        return buffer.tail(count) if buffer else []
+
+
+def drain_pipe(pipe, buffer, stream):
+    """Вычитывает pipe построчно в buffer в фоновом потоке"""
+
+    def reader():
+        with pipe:
+            for raw in iter(pipe.readline, b''):
+                buffer.append(stream, raw.decode('utf-8', errors='replace'))
+
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Метрики LED панели в текстовом формате Prometheus.
+
+Статистику кадров собирают сами эффекты (effects/frame_stats.py),
+супервизор хранит последнюю сводку и счётчики запусков, а здесь всё
+это переводится в текст для GET /metrics. Время - в секундах, как
+принято в Prometheus.
+"""
+
+STATES = ('idle', 'starting', 'running', 'stopping', 'crashed')
+
+QUANTILES = (('p50', '0.5'), ('p95', '0.95'), ('p99', '0.99'))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+class MetricsWriter:
+    """Собирает строки метрик с HELP/TYPE в формате Prometheus"""
+
+    def __init__(self):
+        self.lines = []
+
+    def metric(self, name, kind, help_text, samples):
+        """samples - список пар (labels, value); None значения пропускаются"""
+        samples = [(labels, value) for labels, value in samples if value is not None]
+        if not samples:
+            return
+        self.lines.append(f'# HELP {name} {help_text}')
+        self.lines.append(f'# TYPE {name} {kind}')
+        for labels, value in samples:
+            self.lines.append(f'{name}{_labels(labels)} {value}')
+
+    def summary(self, name, help_text, labels, quantiles, total=None):
+        """
+        quantiles - пары (quantile, value) за последний период, total -
+        накопленные с запуска эффекта {'count': ..., 'sum': ...}: из
+        name_sum и name_count Prometheus считает среднее и rate()
+        """
+        if not quantiles and not total:
+            return
+        self.lines.append(f'# HELP {name} {help_text}')
+        self.lines.append(f'# TYPE {name} summary')
+        for quantile, value in quantiles:
+            self.lines.append(f'{name}{_labels(dict(labels, quantile=quantile))} {value}')
+        if total:
+            self.lines.append(f'{name}_sum{_labels(labels)} {total["sum"]}')
+            self.lines.append(f'{name}_count{_labels(labels)} {total["count"]}')
+
+    def text(self):
+        return '\n'.join(self.lines) + '\n'
+
+
+def _quantiles(values_ms):
+    if not values_ms:
+        return []
+    return [(quantile, round(values_ms[key] / 1000, 6)) for key, quantile in QUANTILES]
+
+
+def _seconds(value_ms):
+    return None if value_ms is None else round(value_ms / 1000, 6)
+
+
+def format_metrics(metrics, catalogue=None, daemon_up=True):
+    """
+    metrics - результат EffectSupervisor.metrics() (None, если демон
+    недоступен), catalogue - результат get_effect_catalogue().
+    """
+    out = MetricsWriter()
+    out.metric('led_daemon_up', 'gauge', 'Effect daemon is reachable',
+               [({}, 1 if daemon_up else 0)])
+
+    if catalogue is not None:
+        out.metric('led_catalogue_effects', 'gauge', 'Effects in the catalogue',
+                   [({}, len(catalogue['effects']))])
+        out.metric('led_catalogue_load_seconds', 'gauge', 'Last catalogue rebuild time',
+                   [({}, _seconds(catalogue['load_ms']))])
+        out.metric('led_catalogue_loads_total', 'counter', 'Catalogue rebuilds',
+                   [({}, catalogue['loads'])])
+
+    if metrics is None:
+        return out.text()
+
+    effect = metrics['effect'] or ''
+    out.metric('led_effect_state', 'gauge', 'Supervisor state (1 for the current one)',
+               [({'state': state}, int(metrics['state'] == state)) for state in STATES])
+    out.metric('led_effect_starts_total', 'counter', 'Effect launches',
+               [({'effect': name}, count) for name, count in sorted(metrics['starts'].items())])
+    out.metric('led_effect_crashes_total', 'counter', 'Effects exited with an error',
+               [({'effect': name}, count) for name, count in sorted(metrics['crashes'].items())])
+
+    timings = metrics['timings']
+    out.metric('led_effect_switch_seconds', 'gauge', 'Request to first frame of the last switch',
+               [({'effect': effect}, _seconds(timings.get('switch_ms')))])
+    out.metric('led_effect_launch_seconds', 'gauge', 'Process launch time of the last switch',
+               [({'effect': effect}, _seconds(timings.get('launch_ms')))])
+    out.metric('led_effect_first_frame_seconds', 'gauge', 'Launch to first frame of the last switch',
+               [({'effect': effect}, _seconds(timings.get('first_frame_ms')))])
+
+    stats = metrics['stats']
+    if not stats:
+        return out.text()
+
+    out.metric('led_effect_fps', 'gauge', 'Achieved frames per second',
+               [({'effect': effect}, stats['fps'])])
+    out.metric('led_effect_frames_total', 'counter', 'Frames pushed to the panel',
+               [({'effect': effect}, stats['frames'])])
+    out.metric('led_effect_dropped_frames_total', 'counter', 'Frames missed against the frame budget',
+               [({'effect': effect}, stats['dropped'])])
+    totals = stats.get('totals') or {}
+    out.summary('led_effect_frame_seconds', 'Interval between frames', {'effect': effect},
+                _quantiles(stats['frame_ms']), totals.get('frame'))
+    out.summary('led_effect_generate_seconds', 'Frame generation time', {'effect': effect},
+                _quantiles(stats['generate_ms']), totals.get('generate'))
+    out.summary('led_effect_push_seconds', 'Time to push a frame to the panel', {'effect': effect},
+                _quantiles(stats['push_ms']), totals.get('push'))
+    out.metric('led_effect_queue_depth', 'gauge', 'Frames rendered ahead and waiting to be shown',
+               [({'effect': effect}, stats.get('queue_depth'))])
+    out.metric('led_effect_queue_underruns_total', 'counter', 'Times the render-ahead queue ran empty',
+               [({'effect': effect}, stats.get('underruns'))])
+    out.metric('led_effect_cpu_percent', 'gauge', 'CPU usage of the effect process',
+               [({'effect': effect}, stats['cpu_percent'])])
+    out.metric('led_effect_rss_bytes', 'gauge', 'Resident memory of the effect process',
+               [({'effect': effect}, stats['rss_bytes'])])
+    return out.text()
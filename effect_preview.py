@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Живое превью панели для веб-интерфейса.
+
+Кадры берутся из общего кадрового буфера (effects/frame_share.py), так
+что превью никак не нагружает цикл рендеринга: кодирование в JPEG/PNG
+выполняется в веб-воркере с пониженной частотой. Один и тот же кадр
+кодируется один раз на процесс, сколько бы клиентов ни смотрело превью.
+"""
+
+import io
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent / "effects"))
+from frame_share import FrameReader  # noqa: E402
+
+# Частота кадров превью по умолчанию и максимальная
+PREVIEW_FPS = int(os.environ.get('LED_PREVIEW_FPS', '10'))
+MAX_PREVIEW_FPS = 30
+
+# Увеличение кадра (nearest-neighbour): 64x64 -> 256x256
+PREVIEW_SCALE = int(os.environ.get('LED_PREVIEW_SCALE', '4'))
+MAX_PREVIEW_SCALE = 16
+
+# Если кадр не меняется, он всё равно повторяется раз в N секунд,
+# чтобы браузер не считал поток зависшим, а сервер заметил отключение
+PREVIEW_RESEND = 5
+
+JPEG_QUALITY = 85
+
+FORMATS = {
+    'jpeg': ('JPEG', 'image/jpeg'),
+    'png': ('PNG', 'image/png'),
+}
+
+BOUNDARY = 'frame'
+
+
+class PreviewEncoder:
+    """Кодирует текущий кадр, кэшируя результат по номеру кадра"""
+
+    def __init__(self, reader=None):
+        self.reader = reader or FrameReader()
+        self.cache = {}
+        self.lock = threading.Lock()
+
+    def encode(self, fmt='jpeg', scale=PREVIEW_SCALE):
+        """Возвращает (номер кадра, байты изображения) или None"""
+        key = (fmt, scale)
+        with self.lock:
+            cached = self.cache.get(key)
+            if cached and cached[0] == self.reader.sequence():
+                return cached
+
+            frame = self.reader.read()
+            if frame is None:
+                return None
+            sequence, data = frame
+
+            width, height = self.reader.width, self.reader.height
+            image = Image.frombuffer('RGB', (width, height), data, 'raw', 'RGB', 0, 1)
+            if scale > 1:
+                image = image.resize((width * scale, height * scale), Image.NEAREST)
+
+            output = io.BytesIO()
+            pil_format = FORMATS[fmt][0]
+            if pil_format == 'JPEG':
+                image.save(output, pil_format, quality=JPEG_QUALITY)
+            else:
+                image.save(output, pil_format, compress_level=1)
+
+            self.cache[key] = (sequence, output.getvalue())
+            return self.cache[key]
+
+    def stream(self, fmt='jpeg', scale=PREVIEW_SCALE, fps=PREVIEW_FPS):
+        """Генератор частей multipart/x-mixed-replace"""
+        content_type = FORMATS[fmt][1]
+        interval = 1.0 / fps
+        last_sequence = None
+        last_sent = 0
+
+        while True:
+            started = time.monotonic()
+            encoded = self.encode(fmt, scale)
+            if encoded and (encoded[0] != last_sequence or started - last_sent >= PREVIEW_RESEND):
+                last_sequence, data = encoded
+                last_sent = started
+                yield (
+                    f'--{BOUNDARY}\r\n'
+                    f'Content-Type: {content_type}\r\n'
+                    f'Content-Length: {len(data)}\r\n\r\n'
+                ).encode('ascii') + data + b'\r\n'
+
+            sleep_time = interval - (time.monotonic() - started)
+            if sleep_time > 0:
+                time.sleep(sleep_time)
@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Асинхронный супервизор процесса эффекта.
+
+HTTP-обработчики только ставят запрос в очередь и сразу возвращают
+ответ, а остановка и запуск процессов выполняются в отдельном потоке.
+Очередь состоит из одного слота: при быстрых кликах промежуточные
+запросы схлопываются и выполняется только последний.
+
+Состояния: idle -> starting -> running -> stopping -> idle,
+упавший эффект переходит в crashed.
+
+Переходы и фактический FPS публикуются в EventBroadcaster
+(события status и fps), полная статистика кадров и счётчики
+запусков/падений доступны через metrics().
+"""
+
+import subprocess
+import threading
+import time
+from collections import Counter, deque
+
+STATE_IDLE = 'idle'
+STATE_STARTING = 'starting'
+STATE_RUNNING = 'running'
+STATE_STOPPING = 'stopping'
+STATE_CRASHED = 'crashed'
+
+# Сколько ждать первого кадра, прежде чем считать эффект запущенным
+# (эффекты без отчёта о первом кадре, например запущенные через Popen)
+FIRST_FRAME_TIMEOUT = 2.0
+
+# Интервал опроса процесса эффекта
+POLL_INTERVAL = 0.1
+
+
+def ms_between(start, end):
+    return round((end - start) * 1000, 1)
+
+
+class EffectSupervisor:
+    """
+    launcher(effect_name, requested_at) запускает эффект и возвращает
+    объект с интерфейсом subprocess.Popen (poll/terminate/kill/wait).
+    """
+
+    def __init__(self, launcher, events=None, stop_timeout=3, history_size=20):
+        self.launcher = launcher
+        self.events = events
+        self.stop_timeout = stop_timeout
+        self.fps = None
+        self.stats = None
+        self.starts = Counter()
+        self.crashes = Counter()
+
+        self.state = STATE_IDLE
+        self.effect = None
+        self.process = None
+        self.exit_code = None
+        self.state_since = time.monotonic()
+        self.timings = {}
+        self._started_request = None
+        self.transitions = deque(maxlen=history_size)
+
+        # Слот запроса: новый запрос перезаписывает ещё не обработанный
+        self._target = None
+        self._requested_at = None
+        self._has_request = False
+
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+    # ---------- API для HTTP-обработчиков ----------
+
+    def request_start(self, effect_name):
+        """Запросить переключение на эффект; возвращается сразу"""
+        self._request(effect_name)
+
+    def request_stop(self):
+        """Запросить остановку; возвращается сразу"""
+        self._request(None)
+
+    def is_active(self):
+        """Запущен ли эффект или ожидается его запуск/остановка"""
+        with self._cond:
+            return self._has_request or self.state not in (STATE_IDLE, STATE_CRASHED)
+
+    def running_process(self):
+        """Эффект в состоянии running и его процесс, иначе (None, None)"""
+        with self._cond:
+            if self.state != STATE_RUNNING:
+                return None, None
+            return self.effect, self.process
+
+    def snapshot(self):
+        """Текущее состояние для API"""
+        with self._cond:
+            now = time.monotonic()
+            return {
+                'state': self.state,
+                'effect': self.effect,
+                'running': self.state in (STATE_STARTING, STATE_RUNNING),
+                'pending': self._target if self._has_request else None,
+                'pending_request': self._has_request,
+                'state_ms': ms_between(self.state_since, now),
+                'exit_code': self.exit_code,
+                'fps': self.fps,
+                'timings': dict(self.timings),
+                'transitions': list(self.transitions),
+            }
+
+    def metrics(self):
+        """Статистика кадров текущего эффекта и счётчики для /metrics"""
+        with self._cond:
+            return {
+                'state': self.state,
+                'effect': self.effect,
+                'stats': self.stats,
+                'timings': dict(self.timings),
+                'starts': dict(self.starts),
+                'crashes': dict(self.crashes),
+            }
+
+    def shutdown(self):
+        """Синхронно остановить эффект (при завершении сервера)"""
+        with self._cond:
+            self._has_request = False
+            process = self.process
+        if process:
+            self._stop_process(process)
+
+    # ---------- внутреннее ----------
+
+    def _request(self, effect_name):
+        with self._cond:
+            self._target = effect_name
+            self._requested_at = time.monotonic()
+            self._has_request = True
+            self._cond.notify()
+
+    def _set_state(self, state, effect=None):
+        """Переход в новое состояние; вызывать под self._cond"""
+        now = time.monotonic()
+        self.transitions.append({
+            'from': self.state,
+            'to': state,
+            'effect': effect,
+            'after_ms': ms_between(self.state_since, now),
+            'at': time.time(),
+        })
+        self.state = state
+        self.effect = effect
+        self.state_since = now
+        if state != STATE_RUNNING:
+            self.fps = None
+            self.stats = None
+        if state == STATE_STARTING:
+            self.starts[effect] += 1
+        elif state == STATE_CRASHED:
+            self.crashes[effect] += 1
+        self._publish('status', self.snapshot())
+
+    def _publish(self, event_type, data):
+        if self.events is not None:
+            self.events.publish(event_type, data)
+
+    def _stop_process(self, process):
+        try:
+            process.terminate()
+            process.wait(timeout=self.stop_timeout)
+        except Exception:
+            process.kill()
+            try:
+                process.wait(timeout=self.stop_timeout)
+            except subprocess.TimeoutExpired:
+                pass
+
+    def _poll_process(self):
+        """Отслеживает первый кадр и падение эффекта; вызывать под self._cond"""
+        process = self.process
+        if process is None:
+            return
+
+        code = process.poll()
+        if code is not None:
+            self.process = None
+            self.exit_code = code
+            if code == 0:
+                self._set_state(STATE_IDLE)
+            else:
+                self._set_state(STATE_CRASHED, self.effect)
+            return
+
+        if self.state == STATE_RUNNING:
+            self.stats = getattr(process, 'stats', None)
+        fps = getattr(process, 'fps', None)
+        if self.state == STATE_RUNNING and fps != self.fps:
+            self.fps = fps
+            self._publish('fps', {'effect': self.effect, 'fps': fps})
+
+        if self.state == STATE_STARTING:
+            first_frame_ms = getattr(process, 'first_frame_ms', None)
+            waited = time.monotonic() - self.state_since
+            if first_frame_ms is not None or waited >= FIRST_FRAME_TIMEOUT:
+                self.timings['first_frame_ms'] = first_frame_ms
+                if getattr(process, 'launch_ms', None) is not None:
+                    self.timings['launch_ms'] = process.launch_ms
+                self.timings['switch_ms'] = ms_between(self._started_request, time.monotonic())
+                self._set_state(STATE_RUNNING, self.effect)
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._has_request:
+                    self._cond.wait(POLL_INTERVAL if self.process else None)
+                    self._poll_process()
+                target, requested_at = self._target, self._requested_at
+                self._has_request = False
+            self._apply(target, requested_at)
+
+    def _apply(self, target, requested_at):
+        timings = {}
+
+        with self._cond:
+            process = self.process
+            if process:
+                self._set_state(STATE_STOPPING, self.effect)
+
+        if process:
+            stop_start = time.monotonic()
+            self._stop_process(process)
+            timings['stop_ms'] = ms_between(stop_start, time.monotonic())
+
+        with self._cond:
+            if process:
+                self.process = None
+                self.exit_code = process.poll()
+                self._set_state(STATE_IDLE)
+
+            # Пока останавливали старый эффект, пришёл новый запрос -
+            # этот запуск уже неактуален
+            if self._has_request or target is None:
+                self.timings = timings
+                return
+
+            self._set_state(STATE_STARTING, target)
+            self._started_request = requested_at
+            self.exit_code = None
+
+        try:
+            launch_start = time.monotonic()
+            process = self.launcher(target, requested_at)
+            timings['launch_ms'] = ms_between(launch_start, time.monotonic())
+        except Exception as e:
+            print(f"Ошибка при запуске эффекта {target}: {e}")
+            with self._cond:
+                self.timings = timings
+                self._set_state(STATE_CRASHED, target)
+            return
+
+        with self._cond:
+            self.process = process
+            self.timings = timings
+            self._poll_process()
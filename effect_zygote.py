@@ -0,0 +1,649 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Зигота LED эффектов.
+
+Долгоживущий вспомогательный процесс, в котором заранее импортированы
+тяжёлые модули (PIL, numpy, noise, opensimplex, rgbmatrix). По команде
+он делает fork() и выполняет файл эффекта в дочернем процессе, поэтому
+переключение эффекта не платит за повторный запуск интерпретатора и
+импорты.
+
+Эффекты-плагины (модули с функцией create_plugin(), см.
+effects/effect_runtime.py) выполняются прямо в зиготе общим рендерером:
+матрица создаётся один раз и переживает переключения между плагинами.
+Перед fork() обычного эффекта матрица освобождается.
+
+Протокол - JSON по одной строке:
+- команды читаются из stdin;
+- события пишутся в исходный stdout, а сам stdout процесса
+  перенаправляется в stderr, чтобы print() эффектов не ломал протокол.
+
+stdout/stderr каждого эффекта (и print() плагинов) зигота вычитывает
+сама и пересылает строками в событиях log.
+
+Команда profile включает профилирование работающего эффекта
+(effects/frame_profile.py): у плагина - прямо в зиготе, у дочернего
+процесса - сигналом SIGUSR1. Команда control передаёт параметры
+работающему плагину (EffectPlugin.control).
+"""
+
+import importlib
+import json
+import os
+import runpy
+import select
+import signal
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+
+# Модули, которые импортируются один раз в зиготе и наследуются эффектами
+PRELOAD_MODULES = (
+    'numpy',
+    'PIL.Image',
+    'PIL.ImageDraw',
+    'PIL.ImageFilter',
+    'PIL.ImageFont',
+    'noise',
+    'opensimplex',
+    'colorsys',
+)
+
+EFFECTS_DIR = Path(__file__).parent / "effects"
+
+# Длинные строки вывода обрезаются (в символах; в байтах событие ограничено PIPE_BUF)
+MAX_LOG_LINE = 1000
+
+# Событие не длиннее PIPE_BUF байт пишется в канал атомарно
+PIPE_BUF = getattr(select, 'PIPE_BUF', 512)
+
+
+def fork_available():
+    """Можно ли использовать зиготу на этой платформе"""
+    return hasattr(os, 'fork')
+
+
+def matrix_module_name():
+    """Имя модуля матрицы, который импортируют эффекты (backend, см. effects/led_matrix.py)"""
+    from led_matrix import backend_module_name
+    return backend_module_name()
+
+
+def emit(fd, **event):
+    """
+    Отправляет событие в канал протокола.
+    Одна строка короче PIPE_BUF пишется атомарно, поэтому писать
+    могут и зигота, и её дочерние процессы.
+    """
+    os.write(fd, (json.dumps(event) + '\n').encode('utf-8'))
+
+
+def elapsed_ms(since):
+    """Миллисекунды, прошедшие с момента since (time.monotonic)"""
+    return round((time.monotonic() - since) * 1000, 1)
+
+
+# ==================== ПРОЦЕСС ЗИГОТЫ ====================
+
+def plugins_available():
+    """Удалось ли импортировать рантайм эффектов-плагинов"""
+    try:
+        import effect_runtime  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def is_plugin_effect(effect_file):
+    from effect_runtime import has_plugin
+    return has_plugin(effect_file)
+
+
+def preload():
+    """Импортирует тяжёлые модули до первого запуска эффекта"""
+    loaded = []
+    for name in PRELOAD_MODULES + (matrix_module_name(),):
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+        except ImportError:
+            pass
+    return loaded
+
+
+def install_frame_hook(on_first_frame, on_stats):
+    """
+    Подменяет класс RGBMatrix подклассом, который сообщает о первом
+    выведенном кадре и раз в секунду - статистику кадров (FPS, время
+    кадра и вывода, пропуски, CPU и память, см. effects/frame_stats.py).
+    Кадром считается вызов SetImage или SwapOnVSync. SetPixel
+    отслеживается только до первого кадра, после чего экземпляр
+    получает исходный метод без накладных расходов.
+
+    Изображения из SetImage копируются в общий кадровый буфер
+    (effects/frame_share.py). Содержимое холста SwapOnVSync из
+    Python прочитать нельзя, такие кадры в буфер не попадают.
+    """
+    from frame_clock import active_clock
+    from frame_share import shared_writer
+    from frame_stats import FrameStats
+
+    module = sys.modules.get(matrix_module_name())
+    if module is None:
+        return
+
+    base = module.RGBMatrix
+    stats = FrameStats(on_stats)
+
+    def generate_time(push_start):
+        """Время генерации кадра известно, только если эффект идёт по FrameClock"""
+        clock = active_clock()
+        return push_start - clock.frame_start if clock else None
+
+    class FrameHookMatrix(base):
+        _first_frame_sent = False
+
+        def _first_frame(self):
+            self._first_frame_sent = True
+            self.SetPixel = base.SetPixel.__get__(self, base)
+            on_first_frame()
+
+        def SetImage(self, image, *args, **kwargs):
+            push_start = time.perf_counter()
+            result = base.SetImage(self, image, *args, **kwargs)
+            push_s = time.perf_counter() - push_start
+            shared_writer(self.width, self.height).write(image)
+            if not self._first_frame_sent:
+                self._first_frame()
+            stats.frame(generate_s=generate_time(push_start), push_s=push_s)
+            return result
+
+        def SwapOnVSync(self, *args, **kwargs):
+            push_start = time.perf_counter()
+            result = base.SwapOnVSync(self, *args, **kwargs)
+            push_s = time.perf_counter() - push_start
+            if not self._first_frame_sent:
+                self._first_frame()
+            stats.frame(generate_s=generate_time(push_start), push_s=push_s)
+            return result
+
+        def SetPixel(self, *args, **kwargs):
+            result = base.SetPixel(self, *args, **kwargs)
+            if not self._first_frame_sent:
+                self._first_frame()
+            return result
+
+        def Clear(self):
+            base.Clear(self)
+            shared_writer(self.width, self.height).clear()
+
+    FrameHookMatrix.__name__ = base.__name__
+    module.RGBMatrix = FrameHookMatrix
+
+
+def _raise_keyboard_interrupt(_sig, _frame):
+    """SIGTERM превращается в KeyboardInterrupt, чтобы эффект погасил матрицу"""
+    raise KeyboardInterrupt
+
+
+def emit_log(event_fd, effect_id, stream, line):
+    event = {'event': 'log', 'id': effect_id, 'stream': stream,
+             'line': line.rstrip('\n')[:MAX_LOG_LINE]}
+    # json.dumps экранирует не-ASCII символы (\uXXXX - 6 байт на символ),
+    # поэтому строка укорачивается, пока событие не уложится в PIPE_BUF
+    while True:
+        size = len(json.dumps(event)) + 1
+        if size <= PIPE_BUF or not event['line']:
+            break
+        event['line'] = event['line'][:len(event['line']) * PIPE_BUF // size]
+    emit(event_fd, **event)
+
+
+def forward_output(fd, event_fd, effect_id, stream):
+    """Вычитывает вывод дочернего процесса и пересылает его построчно"""
+    with os.fdopen(fd, 'rb') as pipe:
+        for raw in iter(pipe.readline, b''):
+            emit_log(event_fd, effect_id, stream, raw.decode('utf-8', errors='replace'))
+
+
+class PluginOutput:
+    """
+    Замена sys.stdout/sys.stderr зиготы: вывод работающего плагина
+    уходит в события log, остальное - в исходный поток.
+    """
+
+    def __init__(self, server, stream, fallback):
+        self.server = server
+        self.stream = stream
+        self.fallback = fallback
+        self.partial = ''
+
+    def write(self, text):
+        effect_id = self.server.plugin_id
+        if effect_id is None:
+            return self.fallback.write(text)
+
+        lines = (self.partial + text).split('\n')
+        self.partial = lines.pop()
+        for line in lines:
+            emit_log(self.server.event_fd, effect_id, self.stream, line)
+        return len(text)
+
+    def flush(self):
+        self.fallback.flush()
+
+    def fileno(self):
+        return self.fallback.fileno()
+
+
+def run_effect(effect_id, effect_file, requested_at, event_fd, out_fd, err_fd):
+    """Выполняется в дочернем процессе после fork()"""
+    signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+
+    os.dup2(out_fd, 1)
+    os.dup2(err_fd, 2)
+    os.close(out_fd)
+    os.close(err_fd)
+    sys.stdout = sys.__stdout__
+    sys.stderr = sys.__stderr__
+    sys.stdout.reconfigure(line_buffering=True)
+
+    effect_file = Path(effect_file)
+    os.chdir(effect_file.parent)
+    sys.path.insert(0, str(effect_file.parent))
+    sys.argv = [str(effect_file)]
+
+    import frame_profile
+    frame_profile.install()
+
+    install_frame_hook(
+        lambda: emit(event_fd, event='first_frame', id=effect_id,
+                     latency_ms=elapsed_ms(requested_at)),
+        lambda stats: emit(event_fd, event='stats', id=effect_id, stats=stats)
+    )
+
+    code = 0
+    try:
+        runpy.run_path(str(effect_file), run_name='__main__')
+    except KeyboardInterrupt:
+        pass
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        # Эффект остановили посреди окна профилирования - сохраняем то, что есть
+        frame_profile.flush()
+        sys.stdout.flush()
+        sys.stderr.flush()
+    os._exit(code)
+
+
+class ZygoteServer:
+    """Принимает команды и форкает процессы эффектов"""
+
+    def __init__(self, event_fd):
+        self.event_fd = event_fd
+        self.children = {}  # pid -> id эффекта
+        self.lock = threading.Lock()
+        self.has_children = threading.Event()
+        self.renderer = None
+        self.renderer_thread = None
+        self.renderer_hardware = None
+        self.plugin_id = None
+        self.plugin_name = None
+
+    def ensure_renderer(self, effect):
+        """
+        Создаёт матрицу и поток рендерера при первом запуске плагина.
+        Если у эффекта свои параметры hardware: (config.yaml), матрица
+        пересоздаётся с ними.
+        """
+        from effect_runtime import Renderer
+        from led_matrix import create_matrix, hardware_config
+
+        hardware = hardware_config(effect)
+        if self.renderer is not None and hardware != self.renderer_hardware:
+            self.release_matrix()
+        if self.renderer is None:
+            self.renderer = Renderer(create_matrix(effect))
+            self.renderer_hardware = hardware
+            self.renderer_thread = threading.Thread(target=self.renderer.run, daemon=True)
+            self.renderer_thread.start()
+        return self.renderer
+
+    def release_matrix(self):
+        """Останавливает рендерер и освобождает матрицу перед fork()"""
+        if self.renderer is None:
+            return
+        self.renderer.stop()
+        self.renderer_thread.join()
+        self.renderer.matrix = None
+        self.renderer = None
+        self.renderer_thread = None
+        self.renderer_hardware = None
+
+    def start_plugin(self, effect_id, effect_file, requested_at):
+        import frame_profile
+        from effect_runtime import load_plugin
+
+        renderer = self.ensure_renderer(Path(effect_file).stem)
+        try:
+            plugin = load_plugin(effect_file)
+        except Exception:
+            traceback.print_exc()
+            emit(self.event_fd, event='exit', id=effect_id, code=1)
+            return
+
+        def on_exit(code):
+            # Плагин остановили посреди окна профилирования - сохраняем то, что есть,
+            # иначе в профиль попадут кадры следующего эффекта
+            frame_profile.flush()
+            if self.plugin_id == effect_id:
+                self.plugin_id = None
+            emit(self.event_fd, event='exit', id=effect_id, code=code)
+
+        self.plugin_id = effect_id
+        self.plugin_name = Path(effect_file).stem
+        emit(self.event_fd, event='started', id=effect_id, pid=os.getpid(),
+             launch_ms=elapsed_ms(requested_at), in_process=True)
+        renderer.switch(
+            plugin,
+            on_first_frame=lambda: emit(self.event_fd, event='first_frame', id=effect_id,
+                                        latency_ms=elapsed_ms(requested_at)),
+            on_exit=on_exit,
+            on_stats=lambda stats: emit(self.event_fd, event='stats', id=effect_id, stats=stats)
+        )
+
+    def start_effect(self, effect_id, effect_file, requested_at):
+        if plugins_available() and is_plugin_effect(effect_file):
+            self.start_plugin(effect_id, effect_file, requested_at)
+            return
+
+        self.release_matrix()
+        out_r, out_w = os.pipe()
+        err_r, err_w = os.pipe()
+        with self.lock:
+            pid = os.fork()
+            if pid == 0:
+                os.close(out_r)
+                os.close(err_r)
+                run_effect(effect_id, effect_file, requested_at, self.event_fd, out_w, err_w)
+            self.children[pid] = effect_id
+            self.has_children.set()
+        os.close(out_w)
+        os.close(err_w)
+        for fd, stream in ((out_r, 'stdout'), (err_r, 'stderr')):
+            threading.Thread(target=forward_output, args=(fd, self.event_fd, effect_id, stream),
+                             daemon=True).start()
+        emit(self.event_fd, event='started', id=effect_id, pid=pid,
+             launch_ms=elapsed_ms(requested_at))
+
+    def signal_effect(self, effect_id, sig):
+        if effect_id == self.plugin_id and self.renderer is not None:
+            self.renderer.switch(None)
+            return
+
+        with self.lock:
+            pids = [pid for pid, child_id in self.children.items() if child_id == effect_id]
+        for pid in pids:
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                pass
+
+    def profile_effect(self, effect_id, mode, frames):
+        """Профиль следующих frames кадров эффекта (см. effects/frame_profile.py)"""
+        import frame_profile
+
+        try:
+            if effect_id == self.plugin_id and self.renderer is not None:
+                frame_profile.request(mode, frames, name=self.plugin_name)
+                return
+
+            with self.lock:
+                pids = [pid for pid, child_id in self.children.items() if child_id == effect_id]
+            for pid in pids:
+                frame_profile.send_request(pid, mode, frames)
+        except (ValueError, OSError) as e:
+            print(f"Не удалось запустить профилирование: {e}")
+
+    def control_effect(self, effect_id, params):
+        """Параметры управления плагину; ошибки уходят в лог эффекта"""
+        try:
+            if effect_id != self.plugin_id or self.renderer is None:
+                raise ValueError('Управление доступно только эффектам-плагинам')
+            self.renderer.control(params)
+        except Exception as e:
+            emit_log(self.event_fd, effect_id, 'stderr', f"Ошибка управления эффектом: {e}")
+
+    def reap_children(self):
+        """Ждёт завершения дочерних процессов и сообщает их код возврата"""
+        while True:
+            self.has_children.wait()
+            try:
+                pid, status = os.waitpid(-1, 0)
+            except ChildProcessError:
+                with self.lock:
+                    if not self.children:
+                        self.has_children.clear()
+                continue
+
+            with self.lock:
+                effect_id = self.children.pop(pid, None)
+            if effect_id is not None:
+                emit(self.event_fd, event='exit', id=effect_id,
+                     code=os.waitstatus_to_exitcode(status))
+
+    def shutdown(self):
+        self.release_matrix()
+        with self.lock:
+            pids = list(self.children)
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def dispatch(self, cmd, command):
+        """Выполняет одну команду сервера"""
+        if cmd == 'start':
+            self.start_effect(command['id'], command['file'], command['requested_at'])
+        elif cmd == 'signal':
+            self.signal_effect(command['id'], command.get('sig', signal.SIGTERM))
+        elif cmd == 'profile':
+            self.profile_effect(command['id'], command.get('mode'), command.get('frames'))
+        elif cmd == 'control':
+            self.control_effect(command['id'], command.get('params') or {})
+
+    def serve(self, commands):
+        threading.Thread(target=self.reap_children, daemon=True).start()
+        emit(self.event_fd, event='ready', preloaded=preload())
+
+        for line in commands:
+            try:
+                command = json.loads(line)
+            except ValueError:
+                continue
+
+            if not isinstance(command, dict):
+                continue
+            cmd = command.get('cmd')
+            if cmd == 'quit':
+                break
+            # Кривая команда не должна останавливать зиготу вместе со всеми эффектами
+            try:
+                self.dispatch(cmd, command)
+            except Exception:
+                print(f"Ошибка команды зиготы {cmd!r}:", file=sys.stderr)
+                traceback.print_exc()
+
+        self.shutdown()
+
+
+def zygote_main():
+    # Ctrl-C в терминале обрабатывает сервер; зигота завершается по EOF на stdin
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    sys.path.insert(0, str(EFFECTS_DIR))
+
+    event_fd = os.dup(sys.stdout.fileno())
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    server = ZygoteServer(event_fd)
+    sys.stdout = PluginOutput(server, 'stdout', sys.stdout)
+    sys.stderr = PluginOutput(server, 'stderr', sys.stderr)
+    server.serve(sys.stdin)
+
+
+# ==================== КЛИЕНТ (СТОРОНА СЕРВЕРА) ====================
+
+class ZygoteProcess:
+    """
+    Процесс эффекта, запущенный через зиготу.
+    Повторяет нужную часть интерфейса subprocess.Popen.
+    """
+
+    def __init__(self, zygote, effect_id):
+        self._zygote = zygote
+        self.id = effect_id
+        self.pid = None
+        self.returncode = None
+        self.launch_ms = None
+        self.first_frame_ms = None
+        self.fps = None
+        self.stats = None
+        self.output = None
+        self._exited = threading.Event()
+
+    def poll(self):
+        return self.returncode
+
+    def wait(self, timeout=None):
+        if not self._exited.wait(timeout):
+            raise subprocess.TimeoutExpired(f'effect #{self.id}', timeout)
+        return self.returncode
+
+    def send_signal(self, sig):
+        if self.returncode is None:
+            self._zygote.send(cmd='signal', id=self.id, sig=int(sig))
+
+    def terminate(self):
+        self.send_signal(signal.SIGTERM)
+
+    def profile(self, mode, frames):
+        """Профиль следующих frames кадров, файл появится в LED_PROFILE_DIR"""
+        if self.returncode is None:
+            self._zygote.send(cmd='profile', id=self.id, mode=mode, frames=frames)
+
+    def control(self, params):
+        """Параметры управления плагину (см. EffectPlugin.control)"""
+        if self.returncode is None:
+            self._zygote.send(cmd='control', id=self.id, params=params)
+
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
+
+    def _finish(self, code):
+        self.returncode = code
+        self._exited.set()
+
+
+class EffectZygote:
+    """Запускает зиготу и выдаёт процессы эффектов по запросу"""
+
+    def __init__(self, effects_dir):
+        self.effects_dir = Path(effects_dir)
+        self.process = None
+        self.processes = {}
+        self.lock = threading.Lock()
+        self.next_id = 0
+
+    def start(self):
+        """Запускает процесс зиготы, если он ещё не работает"""
+        with self.lock:
+            if self.process and self.process.poll() is None:
+                return
+            self.process = subprocess.Popen(
+                [sys.executable, str(Path(__file__).resolve())],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                cwd=str(self.effects_dir)
+            )
+            threading.Thread(target=self._read_events, args=(self.process,), daemon=True).start()
+
+    def send(self, **command):
+        with self.lock:
+            self.process.stdin.write((json.dumps(command) + '\n').encode('utf-8'))
+            self.process.stdin.flush()
+
+    def launch(self, effect_file, requested_at=None, output=None):
+        """
+        Запускает эффект и возвращает объект, похожий на Popen.
+        requested_at - момент запроса на переключение (time.monotonic),
+        от него отсчитывается задержка до первого кадра.
+        output - буфер (effect_logs.LogBuffer) для stdout/stderr эффекта.
+        """
+        if requested_at is None:
+            requested_at = time.monotonic()
+        self.start()
+
+        with self.lock:
+            self.next_id += 1
+            handle = ZygoteProcess(self, self.next_id)
+            handle.output = output
+            self.processes[handle.id] = handle
+
+        self.send(cmd='start', id=handle.id, file=str(Path(effect_file).resolve()),
+                  requested_at=requested_at)
+        return handle
+
+    def stop(self):
+        """Останавливает зиготу вместе со всеми эффектами"""
+        if self.process and self.process.poll() is None:
+            try:
+                self.send(cmd='quit')
+                self.process.wait(timeout=3)
+            except Exception:
+                self.process.kill()
+
+    def _read_events(self, process):
+        for line in process.stdout:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+
+            handle = self.processes.get(event.get('id'))
+            kind = event.get('event')
+            if handle is None:
+                continue
+            if kind == 'started':
+                handle.pid = event['pid']
+                handle.launch_ms = event['launch_ms']
+            elif kind == 'first_frame':
+                handle.first_frame_ms = event['latency_ms']
+            elif kind == 'stats':
+                handle.stats = event['stats']
+                handle.fps = event['stats']['fps']
+            elif kind == 'log':
+                if handle.output is not None:
+                    handle.output.append(event['stream'], event['line'])
+            elif kind == 'exit':
+                self.processes.pop(handle.id, None)
+                handle._finish(event['code'])
+
+        # Зигота завершилась - её эффекты тоже больше не работают
+        for handle in list(self.processes.values()):
+            handle._finish(-1)
+        self.processes.clear()
+
+
+if __name__ == '__main__':
+    zygote_main()
@@ -5,30 +5,22 @@
 # https://openprocessing.org/sketch/2421742
 
 
-import time
 import math
 import random
-import platform
 
-if platform.system() == "Windows":
-    from RGBMatrixEmulator import RGBMatrix, RGBMatrixOptions
-    graphics = None  # если нужно
-else:
-    from rgbmatrix import RGBMatrix, RGBMatrixOptions, graphics
+import numpy as np
 from PIL import Image, ImageDraw
+from effect_runtime import EffectPlugin, run_standalone
+from frame_splat import splat
+from led_matrix import BASE_SIZE
 
 # ==================== НАСТРОЙКИ ====================
-# Параметры LED матрицы
-MATRIX_WIDTH = 64
-MATRIX_HEIGHT = 64
-CHAIN_LENGTH = 1
-PARALLEL = 1
-HARDWARE_MAPPING = 'adafruit-hat'
+# Размер холста задаёт рантайм (секция hardware: в config.yaml).
+# Геометрия анимаций задана в пикселях панели 64x64 и умножается на unit.
 
 # Параметры анимаций
 GLOBAL_SPEED = 0.5  # Общая скорость анимаций
 FPS = 30  # Кадров в секунду
-FRAME_DELAY = 1.0 / FPS
 
 # Цветовая схема (монохром - белый)
 COLOR_FILL = (255, 255, 255)
@@ -56,13 +48,59 @@ def ease_in_out_cubic(t):
     return 4 * t * t * t if t < 0.5 else 1 - pow(-2 * t + 2, 3) / 2
 
 
+def unit_scale(width, height):
+    """Сколько пикселей холста приходится на пиксель панели 64x64"""
+    return min(width, height) / BASE_SIZE
+
+
 def get_color_with_opacity(color, opacity):
     """Возвращает цвет с заданной прозрачностью"""
     opacity = max(0, min(1, opacity))
     return tuple(int(c * opacity) for c in color)
 
 
-class Animation3DSphereScan:
+def ease_in_out_cubic_array(t):
+    """ease_in_out_cubic для массива numpy"""
+    return np.where(t < 0.5, 4 * t ** 3, 1 - (2 - 2 * t) ** 3 / 2)
+
+
+def rotation_matrix(rot_x, rot_y):
+    """
+    Поворот вокруг Y, затем вокруг X одной матрицей 3x3: синусы и
+    косинусы считаются один раз на кадр, а не для каждой точки.
+    Точки (n, 3) поворачиваются как points @ matrix.T
+    """
+    cos_x, sin_x = math.cos(rot_x), math.sin(rot_x)
+    cos_y, sin_y = math.cos(rot_y), math.sin(rot_y)
+    return np.array([
+        [cos_y, 0, -sin_y],
+        [-sin_x * sin_y, cos_x, -sin_x * cos_y],
+        [cos_x * sin_y, sin_x, cos_x * cos_y],
+    ])
+
+
+def scan_influence_array(y, scan_line, scan_width):
+    """Яркость точек у сканирующей линии: cos от расстояния до неё, 0 за её пределами"""
+    dist_to_scan = np.abs(y - scan_line)
+    return np.where(dist_to_scan < scan_width, np.cos(dist_to_scan / scan_width * (math.pi / 2)), 0)
+
+
+def new_frame(width, height):
+    """Чёрный кадр numpy (height, width, 3) uint8"""
+    return np.zeros((height, width, 3), dtype=np.uint8)
+
+
+def draw_dots(frame, px, py, size, opacity, color=COLOR_FILL):
+    """
+    Рисует точки из массивов координат, радиусов и прозрачностей в кадр
+    одним вызовом splat (в порядке массивов: последняя точка - сверху)
+    """
+    px, py, size, opacity = (np.asarray(a, dtype=float) for a in (px, py, size, opacity))
+    levels = (np.clip(opacity, 0, 1)[:, None] * color).astype(int)
+    splat(frame, px, py, size, levels)
+
+
+class Animation3DSphereScan(EffectPlugin):
     """3D сфера со сканирующей линией"""
     
     def __init__(self, width, height):
@@ -70,26 +108,25 @@ class Animation3DSphereScan:
         self.height = height
         self.center_x = width / 2
         self.center_y = height / 2
-        self.radius = width * 0.35
+        self.unit = unit_scale(width, height)
+        self.radius = min(width, height) * 0.35
         self.num_dots = 150
         self.time = 0
         
-        # Генерация точек на сфере (распределение Фибоначчи)
-        self.dots = []
-        for i in range(self.num_dots):
-            theta = math.acos(1 - 2 * (i / self.num_dots))
-            phi = math.sqrt(self.num_dots * math.pi) * theta
-            self.dots.append({
-                'x': self.radius * math.sin(theta) * math.cos(phi),
-                'y': self.radius * math.sin(theta) * math.sin(phi),
-                'z': self.radius * math.cos(theta)
-            })
+        # Генерация точек на сфере (распределение Фибоначчи), массив (n, 3)
+        theta = np.arccos(1 - 2 * (np.arange(self.num_dots) / self.num_dots))
+        phi = math.sqrt(self.num_dots * math.pi) * theta
+        self.dots = self.radius * np.stack([
+            np.sin(theta) * np.cos(phi),
+            np.sin(theta) * np.sin(phi),
+            np.cos(theta)
+        ], axis=1)
     
-    def generate_frame(self, delta_time):
+    def generate_frame(self, t, dt):
+        delta_time = dt * 1000  # миллисекунды
         self.time += delta_time * 0.0005 * GLOBAL_SPEED
         
-        image = Image.new('RGB', (self.width, self.height), (0, 0, 0))
-        draw = ImageDraw.Draw(image)
+        frame = new_frame(self.width, self.height)
         
         # Вращение
         rot_x = math.sin(self.time * 0.3) * 0.5
@@ -98,41 +135,29 @@ class Animation3DSphereScan:
         # Сканирующая линия
         eased_time = ease_in_out_cubic((math.sin(self.time * 2.5) + 1) / 2)
         scan_line = (eased_time * 2 - 1) * self.radius
-        scan_width = 15
+        scan_width = 15 * self.unit
+        
+        # Поворот Y, затем X
+        x, y, z = (self.dots @ rotation_matrix(rot_x, rot_y).T).T
+        
+        # Проекция
+        scale = (z + self.radius * 1.5) / (self.radius * 2.5)
+        px = self.center_x + x
+        py = self.center_y + y
+        
+        # Эффект сканирования
+        scan_influence = scan_influence_array(y, scan_line, scan_width)
+        
+        size = np.maximum(0, scale * 1.5 + scan_influence * 2) * self.unit
+        opacity = np.maximum(0, scale * 0.6 + scan_influence * 0.4)
+        
+        visible = size > 0.1
+        draw_dots(frame, px[visible], py[visible], size[visible], opacity[visible])
         
-        for dot in self.dots:
-            x, y, z = dot['x'], dot['y'], dot['z']
-            
-            # Поворот Y
-            nx = x * math.cos(rot_y) - z * math.sin(rot_y)
-            nz = x * math.sin(rot_y) + z * math.cos(rot_y)
-            x, z = nx, nz
-            
-            # Поворот X
-            ny = y * math.cos(rot_x) - z * math.sin(rot_x)
-            nz = y * math.sin(rot_x) + z * math.cos(rot_x)
-            y, z = ny, nz
-            
-            # Проекция
-            scale = (z + self.radius * 1.5) / (self.radius * 2.5)
-            px = self.center_x + x
-            py = self.center_y + y
-            
-            # Эффект сканирования
-            dist_to_scan = abs(y - scan_line)
-            scan_influence = math.cos((dist_to_scan / scan_width) * (math.pi / 2)) if dist_to_scan < scan_width else 0
-            
-            size = max(0, scale * 1.5 + scan_influence * 2)
-            opacity = max(0, scale * 0.6 + scan_influence * 0.4)
-            
-            if size > 0.1:
-                color = get_color_with_opacity(COLOR_FILL, opacity)
-                draw.ellipse([px - size, py - size, px + size, py + size], fill=color)
-        
-        return image
-
-
-class AnimationCrystallineRefraction:
+        return frame
+
+
+class AnimationCrystallineRefraction(EffectPlugin):
     """Кристаллическая рефракция с волнами"""
     
     def __init__(self, width, height):
@@ -140,54 +165,51 @@ class AnimationCrystallineRefraction:
         self.height = height
         self.center_x = width / 2
         self.center_y = height / 2
+        self.unit = unit_scale(width, height)
         self.grid_size = 10
-        self.spacing = width / (self.grid_size - 1)
+        self.spacing_x = width / (self.grid_size - 1)
+        self.spacing_y = height / (self.grid_size - 1)
         self.time = 0
         
-        # Генерация точек сетки
-        self.dots = []
-        for r in range(self.grid_size):
-            for c in range(self.grid_size):
-                self.dots.append({
-                    'x': c * self.spacing,
-                    'y': r * self.spacing
-                })
+        # Точки сетки (по строкам) и их неизменная геометрия относительно центра:
+        # расстояние и единичный вектор направления от центра
+        rows, cols = np.divmod(np.arange(self.grid_size * self.grid_size), self.grid_size)
+        self.dots_x = cols * self.spacing_x
+        self.dots_y = rows * self.spacing_y
+        offset_x = self.dots_x - self.center_x
+        offset_y = self.dots_y - self.center_y
+        self.dist = np.hypot(offset_x, offset_y)
+        angle_to_center = np.arctan2(offset_y, offset_x)
+        self.direction_x = np.cos(angle_to_center)
+        self.direction_y = np.sin(angle_to_center)
     
-    def generate_frame(self, delta_time):
-        self.time += delta_time * 0.16 * GLOBAL_SPEED
+    def generate_frame(self, t, dt):
+        delta_time = dt * 1000  # миллисекунды
+        self.time += delta_time * 0.16 * GLOBAL_SPEED * self.unit
         
-        image = Image.new('RGB', (self.width, self.height), (0, 0, 0))
-        draw = ImageDraw.Draw(image)
+        frame = new_frame(self.width, self.height)
+        
+        wave_radius = self.time % (max(self.width, self.height) * 1.2)
+        wave_width = 30 * self.unit
         
-        wave_radius = self.time % (self.width * 1.2)
-        wave_width = 30
-        
-        for dot in self.dots:
-            dist = math.hypot(dot['x'] - self.center_x, dot['y'] - self.center_y)
-            dist_to_wave = abs(dist - wave_radius)
-            
-            displacement = 0
-            if dist_to_wave < wave_width / 2:
-                wave_phase = (dist_to_wave / (wave_width / 2)) * math.pi
-                displacement = ease_in_out_cubic(math.sin(wave_phase)) * 6
-            
-            angle_to_center = math.atan2(dot['y'] - self.center_y, dot['x'] - self.center_x)
-            dx = math.cos(angle_to_center) * displacement
-            dy = math.sin(angle_to_center) * displacement
-            
-            opacity = 0.2 + (abs(displacement) / 6) * 0.8
-            size = 1.0 + (abs(displacement) / 6) * 1.5
-            
-            px = dot['x'] + dx
-            py = dot['y'] + dy
-            
-            color = get_color_with_opacity(COLOR_FILL, opacity)
-            draw.ellipse([px - size, py - size, px + size, py + size], fill=color)
-        
-        return image
-
-
-class AnimationSonarSweep:
+        # От кадра зависит только волна: смещение точек вдоль их направления
+        dist_to_wave = np.abs(self.dist - wave_radius)
+        wave_phase = (dist_to_wave / (wave_width / 2)) * math.pi
+        displacement = np.where(dist_to_wave < wave_width / 2,
+                                ease_in_out_cubic_array(np.sin(wave_phase)) * 6 * self.unit, 0)
+        
+        strength = np.abs(displacement) / (6 * self.unit)
+        opacity = 0.2 + strength * 0.8
+        size = (1.0 + strength * 1.5) * self.unit
+        
+        px = self.dots_x + self.direction_x * displacement
+        py = self.dots_y + self.direction_y * displacement
+        draw_dots(frame, px, py, size, opacity)
+        
+        return frame
+
+
+class AnimationSonarSweep(EffectPlugin):
     """Сонарная развертка"""
     
     def __init__(self, width, height):
@@ -195,21 +217,24 @@ class AnimationSonarSweep:
         self.height = height
         self.center_x = width / 2
         self.center_y = height / 2
+        self.unit = unit_scale(width, height)
         self.time = 0
         self.fade_time = 2500
         
-        # Генерация точек на кольцах
-        self.rings = []
+        # Точки на кольцах: углы и неизменные координаты на холсте
+        radii, angles = [], []
         for r in range(15, 30, 8):
-            for i in range(r):
-                angle = (i / r) * math.pi * 2
-                self.rings.append({
-                    'r': r,
-                    'angle': angle,
-                    'last_seen': -self.fade_time
-                })
+            # На большом холсте на кольце больше точек, шаг между ними тот же
+            count = round(r * self.unit)
+            radii += [r * self.unit] * count
+            angles += [(i / count) * math.pi * 2 for i in range(count)]
+        self.angles = np.array(angles)
+        self.dots_x = self.center_x + np.array(radii) * np.cos(self.angles)
+        self.dots_y = self.center_y + np.array(radii) * np.sin(self.angles)
+        self.last_seen = np.full(len(self.angles), -self.fade_time, dtype=float)
     
-    def generate_frame(self, delta_time):
+    def generate_frame(self, t, dt):
+        delta_time = dt * 1000  # миллисекунды
         self.time += delta_time
         
         image = Image.new('RGB', (self.width, self.height), (0, 0, 0))
@@ -219,36 +244,27 @@ class AnimationSonarSweep:
         scan_angle = (self.time * 0.001 * (math.pi / 2) * GLOBAL_SPEED) % (math.pi * 2)
         
         # Рисуем луч
-        end_x = self.center_x + 30 * math.cos(scan_angle)
-        end_y = self.center_y + 30 * math.sin(scan_angle)
+        end_x = self.center_x + 30 * self.unit * math.cos(scan_angle)
+        end_y = self.center_y + 30 * self.unit * math.sin(scan_angle)
         color = get_color_with_opacity(COLOR_STROKE, 0.5)
-        draw.line([self.center_x, self.center_y, end_x, end_y], fill=color, width=1)
+        draw.line([self.center_x, self.center_y, end_x, end_y], fill=color, width=max(1, round(self.unit)))
         
         # Обновление и рисование точек
-        for dot in self.rings:
-            angle_diff = abs(dot['angle'] - scan_angle)
-            if angle_diff > math.pi:
-                angle_diff = math.pi * 2 - angle_diff
-            
-            if angle_diff < 0.1:
-                dot['last_seen'] = self.time
-            
-            time_since_seen = self.time - dot['last_seen']
-            if time_since_seen < self.fade_time:
-                t = time_since_seen / self.fade_time
-                opacity = 1 - ease_in_out_cubic(t)
-                size = 1 + opacity * 1.2
-                
-                x = self.center_x + dot['r'] * math.cos(dot['angle'])
-                y = self.center_y + dot['r'] * math.sin(dot['angle'])
-                
-                color = get_color_with_opacity(COLOR_FILL, opacity)
-                draw.ellipse([x - size, y - size, x + size, y + size], fill=color)
-        
-        return image
-
-
-class AnimationHelixScanner:
+        frame = np.array(image)
+        angle_diff = np.abs(self.angles - scan_angle)
+        angle_diff = np.where(angle_diff > math.pi, math.pi * 2 - angle_diff, angle_diff)
+        self.last_seen[angle_diff < 0.1] = self.time
+        
+        time_since_seen = self.time - self.last_seen
+        visible = time_since_seen < self.fade_time
+        opacity = 1 - ease_in_out_cubic_array(time_since_seen[visible] / self.fade_time)
+        size = (1 + opacity * 1.2) * self.unit
+        draw_dots(frame, self.dots_x[visible], self.dots_y[visible], size, opacity)
+        
+        return frame
+
+
+class AnimationHelixScanner(EffectPlugin):
     """Спиральный сканер"""
     
     def __init__(self, width, height):
@@ -256,60 +272,47 @@ class AnimationHelixScanner:
         self.height = height
         self.center_x = width / 2
         self.center_y = height / 2
+        self.unit = unit_scale(width, height)
         self.time = 0
         
-        # Генерация точек спирали
-        self.points = []
+        # Генерация точек спирали, массив (n, 3)
         num_points = 100
-        for i in range(num_points):
-            t = i / num_points
-            angle = t * math.pi * 8
-            radius = 5 + t * 20
-            y_pos = (t - 0.5) * 40
-            self.points.append({
-                'x': radius * math.cos(angle),
-                'y': y_pos,
-                'z': radius * math.sin(angle)
-            })
+        t = np.arange(num_points) / num_points
+        angle = t * math.pi * 8
+        radius = 5 + t * 20
+        self.points = np.stack([radius * np.cos(angle), (t - 0.5) * 40, radius * np.sin(angle)], axis=1)
     
-    def generate_frame(self, delta_time):
+    def generate_frame(self, t, dt):
+        delta_time = dt * 1000  # миллисекунды
         self.time += delta_time * 0.0008 * GLOBAL_SPEED
         
-        image = Image.new('RGB', (self.width, self.height), (0, 0, 0))
-        draw = ImageDraw.Draw(image)
+        frame = new_frame(self.width, self.height)
         
         rot_y = self.time * 0.8
         eased_time = ease_in_out_cubic((math.sin(self.time * 3) + 1) / 2)
         scan_line = (eased_time * 2 - 1) * 25
         scan_width = 18
         
-        for point in self.points:
-            x, y, z = point['x'], point['y'], point['z']
-            
-            # Поворот Y
-            nx = x * math.cos(rot_y) - z * math.sin(rot_y)
-            nz = x * math.sin(rot_y) + z * math.cos(rot_y)
-            x, z = nx, nz
-            
-            # Эффект сканирования
-            dist_to_scan = abs(y - scan_line)
-            scan_influence = math.cos((dist_to_scan / scan_width) * (math.pi / 2)) if dist_to_scan < scan_width else 0
-            
-            scale = (z + 30) / 60
-            px = self.center_x + x
-            py = self.center_y + y
-            
-            size = max(0, scale * 1.5 + scan_influence * 2)
-            opacity = max(0.1, scale * 0.6 + scan_influence * 0.4)
-            
-            if size > 0.1:
-                color = get_color_with_opacity(COLOR_FILL, opacity)
-                draw.ellipse([px - size, py - size, px + size, py + size], fill=color)
-        
-        return image
-
-
-class AnimationInterconnectingWaves:
+        # Поворот Y
+        x, y, z = (self.points @ rotation_matrix(0, rot_y).T).T
+        
+        # Эффект сканирования
+        scan_influence = scan_influence_array(y, scan_line, scan_width)
+        
+        scale = (z + 30) / 60
+        px = self.center_x + x * self.unit
+        py = self.center_y + y * self.unit
+        
+        size = np.maximum(0, scale * 1.5 + scan_influence * 2) * self.unit
+        opacity = np.maximum(0.1, scale * 0.6 + scan_influence * 0.4)
+        
+        visible = size > 0.1
+        draw_dots(frame, px[visible], py[visible], size[visible], opacity[visible])
+        
+        return frame
+
+
+class AnimationInterconnectingWaves(EffectPlugin):
     """Взаимосвязанные волны"""
     
     def __init__(self, width, height):
@@ -317,58 +320,49 @@ class AnimationInterconnectingWaves:
         self.height = height
         self.center_x = width / 2
         self.center_y = height / 2
+        self.unit = unit_scale(width, height)
         self.time = 0
         
-        # Генерация точек сетки
+        # Точки сетки (по строкам)
         self.grid_size = 12
-        self.spacing = width / (self.grid_size - 1)
-        self.points = []
-        for i in range(self.grid_size):
-            for j in range(self.grid_size):
-                self.points.append({
-                    'x': j * self.spacing,
-                    'y': i * self.spacing
-                })
+        self.spacing_x = width / (self.grid_size - 1)
+        self.spacing_y = height / (self.grid_size - 1)
+        rows, cols = np.divmod(np.arange(self.grid_size * self.grid_size), self.grid_size)
+        self.points_x = cols * self.spacing_x
+        self.points_y = rows * self.spacing_y
     
-    def generate_frame(self, delta_time):
+    def generate_frame(self, t, dt):
+        delta_time = dt * 1000  # миллисекунды
         self.time += delta_time * 0.001 * GLOBAL_SPEED
         
-        image = Image.new('RGB', (self.width, self.height), (0, 0, 0))
-        draw = ImageDraw.Draw(image)
+        frame = new_frame(self.width, self.height)
         
         # Две волны
-        wave1_center_x = self.center_x + math.cos(self.time * 1.2) * 15
-        wave1_center_y = self.center_y + math.sin(self.time * 1.2) * 15
-        
-        wave2_center_x = self.center_x + math.cos(self.time * 1.5 + math.pi) * 12
-        wave2_center_y = self.center_y + math.sin(self.time * 1.5 + math.pi) * 12
-        
-        wave_radius = (self.time * 20) % (self.width * 0.8)
-        wave_width = 25
-        
-        for point in self.points:
-            dist1 = math.hypot(point['x'] - wave1_center_x, point['y'] - wave1_center_y)
-            dist2 = math.hypot(point['x'] - wave2_center_x, point['y'] - wave2_center_y)
-            
-            dist_to_wave1 = abs(dist1 - wave_radius)
-            dist_to_wave2 = abs(dist2 - wave_radius)
-            
-            influence1 = math.cos((dist_to_wave1 / wave_width) * math.pi) if dist_to_wave1 < wave_width else 0
-            influence2 = math.cos((dist_to_wave2 / wave_width) * math.pi) if dist_to_wave2 < wave_width else 0
-            
-            combined_influence = max(0, influence1 + influence2)
-            
-            opacity = 0.15 + combined_influence * 0.85
-            size = 0.8 + combined_influence * 1.5
-            
-            color = get_color_with_opacity(COLOR_FILL, opacity)
-            draw.ellipse([point['x'] - size, point['y'] - size, 
-                         point['x'] + size, point['y'] + size], fill=color)
-        
-        return image
-
-
-class AnimationVoxelMatrixMorph:
+        wave1_center_x = self.center_x + math.cos(self.time * 1.2) * 15 * self.unit
+        wave1_center_y = self.center_y + math.sin(self.time * 1.2) * 15 * self.unit
+        
+        wave2_center_x = self.center_x + math.cos(self.time * 1.5 + math.pi) * 12 * self.unit
+        wave2_center_y = self.center_y + math.sin(self.time * 1.5 + math.pi) * 12 * self.unit
+        
+        wave_radius = (self.time * 20 * self.unit) % (max(self.width, self.height) * 0.8)
+        wave_width = 25 * self.unit
+        
+        combined_influence = np.zeros_like(self.points_x)
+        for center_x, center_y in ((wave1_center_x, wave1_center_y), (wave2_center_x, wave2_center_y)):
+            dist = np.hypot(self.points_x - center_x, self.points_y - center_y)
+            dist_to_wave = np.abs(dist - wave_radius)
+            combined_influence += np.where(dist_to_wave < wave_width,
+                                           np.cos((dist_to_wave / wave_width) * math.pi), 0)
+        combined_influence = np.maximum(0, combined_influence)
+        
+        opacity = 0.15 + combined_influence * 0.85
+        size = (0.8 + combined_influence * 1.5) * self.unit
+        draw_dots(frame, self.points_x, self.points_y, size, opacity)
+        
+        return frame
+
+
+class AnimationVoxelMatrixMorph(EffectPlugin):
     """3D воксельная матрица с морфингом"""
     
     def __init__(self, width, height):
@@ -376,26 +370,20 @@ class AnimationVoxelMatrixMorph:
         self.height = height
         self.center_x = width / 2
         self.center_y = height / 2
+        self.unit = unit_scale(width, height)
         self.time = 0
         
-        # Генерация 3D сетки
+        # Генерация 3D сетки, массив (n, 3) в порядке x, y, z
         self.grid_size = 6
         self.spacing = 6
-        self.points = []
-        for x in range(self.grid_size):
-            for y in range(self.grid_size):
-                for z in range(self.grid_size):
-                    self.points.append({
-                        'x': (x - (self.grid_size - 1) / 2) * self.spacing,
-                        'y': (y - (self.grid_size - 1) / 2) * self.spacing,
-                        'z': (z - (self.grid_size - 1) / 2) * self.spacing
-                    })
+        axis = (np.arange(self.grid_size) - (self.grid_size - 1) / 2) * self.spacing
+        self.points = np.stack(np.meshgrid(axis, axis, axis, indexing='ij'), axis=-1).reshape(-1, 3)
     
-    def generate_frame(self, delta_time):
+    def generate_frame(self, t, dt):
+        delta_time = dt * 1000  # миллисекунды
         self.time += delta_time * 0.0005 * GLOBAL_SPEED
         
-        image = Image.new('RGB', (self.width, self.height), (0, 0, 0))
-        draw = ImageDraw.Draw(image)
+        frame = new_frame(self.width, self.height)
         
         rot_x = self.time * 0.4
         rot_y = self.time * 0.6
@@ -404,50 +392,29 @@ class AnimationVoxelMatrixMorph:
         scan_line = (eased_time * 2 - 1) * 20
         scan_width = 15
         
-        points_to_draw = []
-        
-        for point in self.points:
-            x, y, z = point['x'], point['y'], point['z']
-            
-            # Поворот Y
-            nx = x * math.cos(rot_y) - z * math.sin(rot_y)
-            nz = x * math.sin(rot_y) + z * math.cos(rot_y)
-            x, z = nx, nz
-            
-            # Поворот X
-            ny = y * math.cos(rot_x) - z * math.sin(rot_x)
-            nz = y * math.sin(rot_x) + z * math.cos(rot_x)
-            y, z = ny, nz
-            
-            # Эффект сканирования
-            dist_to_scan = abs(y - scan_line)
-            scan_influence = 0
-            displacement = 1
-            if dist_to_scan < scan_width:
-                scan_influence = math.cos((dist_to_scan / scan_width) * (math.pi / 2))
-                displacement = 1 + scan_influence * 0.3
-            
-            scale = (z + 30) / 60
-            px = self.center_x + x * displacement
-            py = self.center_y + y * displacement
-            
-            size = max(0, scale * 1.5 + scan_influence * 1.5)
-            opacity = max(0.1, scale * 0.7 + scan_influence * 0.3)
-            
-            if size > 0.1:
-                points_to_draw.append((px, py, z, size, opacity))
+        # Поворот Y, затем X
+        x, y, z = (self.points @ rotation_matrix(rot_x, rot_y).T).T
         
-        # Сортировка по глубине
-        points_to_draw.sort(key=lambda p: p[2])
+        # Эффект сканирования
+        scan_influence = scan_influence_array(y, scan_line, scan_width)
+        displacement = 1 + scan_influence * 0.3
         
-        for px, py, z, size, opacity in points_to_draw:
-            color = get_color_with_opacity(COLOR_FILL, opacity)
-            draw.ellipse([px - size, py - size, px + size, py + size], fill=color)
+        scale = (z + 30) / 60
+        px = self.center_x + x * displacement * self.unit
+        py = self.center_y + y * displacement * self.unit
         
-        return image
+        size = np.maximum(0, scale * 1.5 + scan_influence * 1.5) * self.unit
+        opacity = np.maximum(0.1, scale * 0.7 + scan_influence * 0.3)
+        
+        # Сортировка по глубине
+        order = np.flatnonzero(size > 0.1)
+        order = order[np.argsort(z[order], kind='stable')]
+        draw_dots(frame, px[order], py[order], size[order], opacity[order])
+        
+        return frame
 
 
-class AnimationPhasedArrayEmitter:
+class AnimationPhasedArrayEmitter(EffectPlugin):
     """Фазированный массив излучателей"""
     
     def __init__(self, width, height):
@@ -455,28 +422,25 @@ class AnimationPhasedArrayEmitter:
         self.height = height
         self.center_x = width / 2
         self.center_y = height / 2
+        self.unit = unit_scale(width, height)
         self.time = 0
         
-        # Генерация концентрических колец точек
-        self.points = []
+        # Концентрические кольца точек в плоскости z = 0, массив (n, 3)
         ring_radii = [10, 16, 22, 28]
         points_per_ring = [8, 12, 16, 20]
         self.max_radius = ring_radii[-1]
         
-        for radius, num_points in zip(ring_radii, points_per_ring):
-            for i in range(num_points):
-                angle = (i / num_points) * math.pi * 2
-                self.points.append({
-                    'x': math.cos(angle) * radius,
-                    'y': math.sin(angle) * radius,
-                    'z': 0
-                })
+        radius = np.repeat(ring_radii, points_per_ring).astype(float)
+        angle = np.concatenate([np.arange(count) / count for count in points_per_ring]) * math.pi * 2
+        self.points = np.stack([np.cos(angle) * radius, np.sin(angle) * radius, np.zeros_like(radius)], axis=1)
+        # Расстояние до центра не меняется: волна поднимает точки только по z
+        self.dist_from_center = np.hypot(self.points[:, 0], self.points[:, 1])
     
-    def generate_frame(self, delta_time):
+    def generate_frame(self, t, dt):
+        delta_time = dt * 1000  # миллисекунды
         self.time += delta_time * 0.001 * GLOBAL_SPEED
         
-        image = Image.new('RGB', (self.width, self.height), (0, 0, 0))
-        draw = ImageDraw.Draw(image)
+        frame = new_frame(self.width, self.height)
         
         rot_x = 1.0
         rot_y = self.time * 0.3
@@ -485,54 +449,36 @@ class AnimationPhasedArrayEmitter:
         wave_width = 20
         wave_height = 8
         
-        points_to_draw = []
-        
-        for point in self.points:
-            x, y, z = point['x'], point['y'], point['z']
-            
-            # Волновой эффект
-            dist_from_center = math.hypot(x, y)
-            dist_to_wave = abs(dist_from_center - wave_radius)
-            
-            wave_influence = 0
-            if dist_to_wave < wave_width / 2:
-                wave_phase = (1 - dist_to_wave / (wave_width / 2)) * math.pi
-                z = ease_in_out_cubic(math.sin(wave_phase)) * wave_height
-                wave_influence = z / wave_height
-            
-            # Поворот Y
-            nx = x * math.cos(rot_y) - z * math.sin(rot_y)
-            nz = x * math.sin(rot_y) + z * math.cos(rot_y)
-            x, z = nx, nz
-            
-            # Поворот X
-            ny = y * math.cos(rot_x) - z * math.sin(rot_x)
-            nz = y * math.sin(rot_x) + z * math.cos(rot_x)
-            y, z = ny, nz
-            
-            # Проекция
-            fov = 100
-            scale = fov / (fov + z + 40)
-            px = self.center_x + x * scale
-            py = self.center_y + y * scale
-            
-            size = (1.2 + wave_influence * 2) * scale
-            opacity = 0.4 + wave_influence * 0.6
-            
-            if size > 0.1:
-                points_to_draw.append((px, py, z, size, opacity))
+        # Волновой эффект
+        dist_to_wave = np.abs(self.dist_from_center - wave_radius)
+        wave_phase = (1 - dist_to_wave / (wave_width / 2)) * math.pi
+        wave_z = np.where(dist_to_wave < wave_width / 2,
+                          ease_in_out_cubic_array(np.sin(wave_phase)) * wave_height, 0)
+        wave_influence = wave_z / wave_height
         
-        # Сортировка по глубине
-        points_to_draw.sort(key=lambda p: p[2])
+        # Поворот Y, затем X
+        points = self.points.copy()
+        points[:, 2] = wave_z
+        x, y, z = (points @ rotation_matrix(rot_x, rot_y).T).T
+        
+        # Проекция
+        fov = 100
+        scale = fov / (fov + z + 40)
+        px = self.center_x + x * scale * self.unit
+        py = self.center_y + y * scale * self.unit
         
-        for px, py, z, size, opacity in points_to_draw:
-            color = get_color_with_opacity(COLOR_FILL, opacity)
-            draw.ellipse([px - size, py - size, px + size, py + size], fill=color)
+        size = (1.2 + wave_influence * 2) * scale * self.unit
+        opacity = 0.4 + wave_influence * 0.6
         
-        return image
+        # Сортировка по глубине
+        order = np.flatnonzero(size > 0.1)
+        order = order[np.argsort(z[order], kind='stable')]
+        draw_dots(frame, px[order], py[order], size[order], opacity[order])
+        
+        return frame
 
 
-class AnimationCrystallineCubeRefraction:
+class AnimationCrystallineCubeRefraction(EffectPlugin):
     """Кристаллический куб с рефракцией"""
     
     def __init__(self, width, height):
@@ -540,6 +486,7 @@ class AnimationCrystallineCubeRefraction:
         self.height = height
         self.center_x = width / 2
         self.center_y = height / 2
+        self.unit = unit_scale(width, height)
         self.time = 0
         
         # Генерация 3D куба
@@ -548,21 +495,16 @@ class AnimationCrystallineCubeRefraction:
         cube_half_size = ((self.grid_size - 1) * self.spacing) / 2
         self.max_dist = math.sqrt(3) * cube_half_size
         
-        self.points = []
-        for x in range(self.grid_size):
-            for y in range(self.grid_size):
-                for z in range(self.grid_size):
-                    self.points.append({
-                        'x': x * self.spacing - cube_half_size,
-                        'y': y * self.spacing - cube_half_size,
-                        'z': z * self.spacing - cube_half_size
-                    })
+        # Точки куба (n, 3) в порядке x, y, z и их расстояния до центра
+        axis = np.arange(self.grid_size) * self.spacing - cube_half_size
+        self.points = np.stack(np.meshgrid(axis, axis, axis, indexing='ij'), axis=-1).reshape(-1, 3)
+        self.dist_from_center = np.linalg.norm(self.points, axis=1)
     
-    def generate_frame(self, delta_time):
+    def generate_frame(self, t, dt):
+        delta_time = dt * 1000  # миллисекунды
         self.time += delta_time * 0.0003 * GLOBAL_SPEED
         
-        image = Image.new('RGB', (self.width, self.height), (0, 0, 0))
-        draw = ImageDraw.Draw(image)
+        frame = new_frame(self.width, self.height)
         
         rot_x = self.time * 2
         rot_y = self.time * 3
@@ -571,145 +513,116 @@ class AnimationCrystallineCubeRefraction:
         wave_width = 18
         displacement_magnitude = 5
         
-        points_to_draw = []
-        
-        for point in self.points:
-            x, y, z = point['x'], point['y'], point['z']
-            
-            # Волновое смещение от центра
-            dist_from_center = math.hypot(x, y, z)
-            dist_to_wave = abs(dist_from_center - wave_radius)
-            
-            displacement_amount = 0
-            if dist_to_wave < wave_width / 2:
-                wave_phase = (dist_to_wave / (wave_width / 2)) * (math.pi / 2)
-                displacement_amount = ease_in_out_cubic(math.cos(wave_phase)) * displacement_magnitude
-            
-            if displacement_amount > 0 and dist_from_center > 0:
-                ratio = (dist_from_center + displacement_amount) / dist_from_center
-                x *= ratio
-                y *= ratio
-                z *= ratio
-            
-            # Поворот Y
-            nx = x * math.cos(rot_y) - z * math.sin(rot_y)
-            nz = x * math.sin(rot_y) + z * math.cos(rot_y)
-            x, z = nx, nz
-            
-            # Поворот X
-            ny = y * math.cos(rot_x) - z * math.sin(rot_x)
-            nz = y * math.sin(rot_x) + z * math.cos(rot_x)
-            y, z = ny, nz
-            
-            # Проекция
-            fov = 80
-            scale = fov / (fov + z)
-            px = self.center_x + x * scale
-            py = self.center_y + y * scale
-            
-            wave_influence = displacement_amount / displacement_magnitude
-            size = (1.2 + wave_influence * 2) * scale
-            opacity = max(0.1, scale * 0.7 + wave_influence * 0.4)
-            
-            if size > 0.1:
-                points_to_draw.append((px, py, z, size, opacity))
+        # Волновое смещение от центра
+        dist = self.dist_from_center
+        dist_to_wave = np.abs(dist - wave_radius)
+        wave_phase = (dist_to_wave / (wave_width / 2)) * (math.pi / 2)
+        displacement_amount = np.where(
+            dist_to_wave < wave_width / 2,
+            ease_in_out_cubic_array(np.cos(wave_phase)) * displacement_magnitude, 0)
         
-        # Сортировка по глубине
-        points_to_draw.sort(key=lambda p: p[2])
+        moved = (displacement_amount > 0) & (dist > 0)
+        ratio = np.ones_like(dist)
+        ratio[moved] = (dist[moved] + displacement_amount[moved]) / dist[moved]
+        
+        # Поворот Y, затем X
+        x, y, z = ((self.points * ratio[:, None]) @ rotation_matrix(rot_x, rot_y).T).T
+        
+        # Проекция
+        fov = 80
+        scale = fov / (fov + z)
+        px = self.center_x + x * scale * self.unit
+        py = self.center_y + y * scale * self.unit
+        
+        wave_influence = displacement_amount / displacement_magnitude
+        size = (1.2 + wave_influence * 2) * scale * self.unit
+        opacity = np.maximum(0.1, scale * 0.7 + wave_influence * 0.4)
         
-        for px, py, z, size, opacity in points_to_draw:
-            color = get_color_with_opacity(COLOR_FILL, opacity)
-            draw.ellipse([px - size, py - size, px + size, py + size], fill=color)
+        # Сортировка по глубине
+        order = np.flatnonzero(size > 0.1)
+        order = order[np.argsort(z[order], kind='stable')]
+        draw_dots(frame, px[order], py[order], size[order], opacity[order])
         
-        return image
+        return frame
 
 
 # ==================== ГЛАВНАЯ ПРОГРАММА ====================
 
+ANIMATION_CLASSES = [
+    Animation3DSphereScan,
+    AnimationCrystallineRefraction,
+    AnimationSonarSweep,
+    AnimationHelixScanner,
+    AnimationInterconnectingWaves,
+    AnimationVoxelMatrixMorph,
+    AnimationPhasedArrayEmitter,
+    AnimationCrystallineCubeRefraction
+]
+
+ANIMATION_NAMES = [
+    "3D Sphere Scan",
+    "Crystalline Refraction",
+    "Sonar Sweep",
+    "Helix Scanner",
+    "Interconnecting Waves",
+    "Voxel Matrix Morph",
+    "Phased Array Emitter",
+    "Crystalline Cube Refraction"
+]
+
+
+class HelixPlugin(EffectPlugin):
+    """Набор анимаций с автопереключением"""
+
+    fps = FPS
+
+    def setup(self, width, height):
+        super().setup(width, height)
+
+        # Создание всех анимаций
+        self.animations = [cls(width, height) for cls in ANIMATION_CLASSES]
+
+        # Выбор начальной анимации
+        if ANIMATION_MODE == 8:
+            # Создаем случайный порядок анимаций
+            self.animation_order = list(range(len(self.animations)))
+            random.shuffle(self.animation_order)
+            self.current_animation_index = 0
+            self.current_animation = self.animation_order[self.current_animation_index]
+            self.auto_mode = True
+            print("Режим автопереключения анимаций (случайный порядок)")
+            print(f"Порядок воспроизведения: {[ANIMATION_NAMES[i] for i in self.animation_order]}")
+        else:
+            self.current_animation = ANIMATION_MODE
+            self.current_animation_index = 0
+            self.animation_order = None
+            self.auto_mode = False
+            print(f"Запуск анимации: {ANIMATION_NAMES[self.current_animation]}")
+
+        self.last_switch_time = 0
+
+    def generate_frame(self, t, dt):
+        # Автопереключение анимаций
+        if self.auto_mode and (t - self.last_switch_time) >= AUTO_SWITCH_TIME:
+            self.current_animation_index = (self.current_animation_index + 1) % len(self.animations)
+            self.current_animation = self.animation_order[self.current_animation_index]
+            self.last_switch_time = t
+            print(f"Переключение на: {ANIMATION_NAMES[self.current_animation]}")
+
+        return self.animations[self.current_animation].generate_frame(t, dt)
+
+
+def create_plugin():
+    """Точка входа для рантайма эффектов"""
+    return HelixPlugin()
+
+
 def main():
     """Основная функция запуска"""
-    
-    # Инициализация матрицы
-    options = RGBMatrixOptions()
-    options.rows = MATRIX_HEIGHT
-    options.cols = MATRIX_WIDTH
-    options.chain_length = CHAIN_LENGTH
-    options.parallel = PARALLEL
-    options.hardware_mapping = HARDWARE_MAPPING
-    
-    matrix = RGBMatrix(options=options)
-    
-    # Создание всех анимаций
-    animations = [
-        Animation3DSphereScan(MATRIX_WIDTH, MATRIX_HEIGHT),
-        AnimationCrystallineRefraction(MATRIX_WIDTH, MATRIX_HEIGHT),
-        AnimationSonarSweep(MATRIX_WIDTH, MATRIX_HEIGHT),
-        AnimationHelixScanner(MATRIX_WIDTH, MATRIX_HEIGHT),
-        AnimationInterconnectingWaves(MATRIX_WIDTH, MATRIX_HEIGHT),
-        AnimationVoxelMatrixMorph(MATRIX_WIDTH, MATRIX_HEIGHT),
-        AnimationPhasedArrayEmitter(MATRIX_WIDTH, MATRIX_HEIGHT),
-        AnimationCrystallineCubeRefraction(MATRIX_WIDTH, MATRIX_HEIGHT)
-    ]
-    
-    animation_names = [
-        "3D Sphere Scan",
-        "Crystalline Refraction",
-        "Sonar Sweep",
-        "Helix Scanner",
-        "Interconnecting Waves",
-        "Voxel Matrix Morph",
-        "Phased Array Emitter",
-        "Crystalline Cube Refraction"
-    ]
-    
-    # Выбор начальной анимации
-    if ANIMATION_MODE == 8:
-        # Создаем случайный порядок анимаций
-        animation_order = list(range(len(animations)))
-        random.shuffle(animation_order)
-        current_animation_index = 0
-        current_animation = animation_order[current_animation_index]
-        auto_mode = True
-        print("Режим автопереключения анимаций (случайный порядок)")
-        print(f"Порядок воспроизведения: {[animation_names[i] for i in animation_order]}")
-    else:
-        current_animation = ANIMATION_MODE
-        current_animation_index = 0
-        animation_order = None
-        auto_mode = False
-        print(f"Запуск анимации: {animation_names[current_animation]}")
-    
-    last_switch_time = time.time()
-    last_time = time.time()
-    
-    try:
-        print("Нажмите CTRL-C для остановки.")
-        
-        while True:
-            current_time = time.time()
-            delta_time = (current_time - last_time) * 1000  # миллисекунды
-            last_time = current_time
-            
-            # Автопереключение анимаций
-            if auto_mode and (current_time - last_switch_time) >= AUTO_SWITCH_TIME:
-                current_animation_index = (current_animation_index + 1) % len(animations)
-                current_animation = animation_order[current_animation_index]
-                last_switch_time = current_time
-                print(f"Переключение на: {animation_names[current_animation]}")
-            
-            # Генерация кадра
-            frame = animations[current_animation].generate_frame(delta_time)
-            
-            # Отображение на матрице
-            matrix.SetImage(frame.convert("RGB"))
-            
-            # Задержка для поддержания FPS
-            time.sleep(FRAME_DELAY)
-            
-    except KeyboardInterrupt:
-        print("\nОстановка...")
-        matrix.Clear()
+    print("Нажмите CTRL-C для остановки.")
+    run_standalone(create_plugin())
+    print("\nОстановка...")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,25 +1,18 @@
 # НАЗВАНИЕ: алгоритм поиска BFS
 # ОПИСАНИЕ: Гарантия - всегда находит кратчайший путь
-import time
 import random
-import platform
-
-if platform.system() == "Windows":
-    from RGBMatrixEmulator import RGBMatrix, RGBMatrixOptions
-    graphics = None  # если нужно
-else:
-    from rgbmatrix import RGBMatrix, RGBMatrixOptions, graphics
 from PIL import Image, ImageDraw
 from collections import deque
+from frame_clock import FrameClock
+from frame_output import FrameOutput
+from led_matrix import create_matrix, panel_size, scaled_count
+
+# Матрица и размер холста из секции hardware: config.yaml
+matrix = create_matrix()
+MATRIX_WIDTH, MATRIX_HEIGHT = panel_size()
 
-# Конфигурация для матрицы
-options = RGBMatrixOptions()
-options.rows = 64
-options.cols = 64
-options.chain_length = 1
-options.parallel = 1
-options.hardware_mapping = 'adafruit-hat'
-matrix = RGBMatrix(options=options)
+# Клеток поиска за кадр: на большом холсте анимация идёт столько же времени
+SEARCH_STEP = scaled_count(10)
 
 # Цвета
 COLOR_WALL = (48, 72, 97)      # стены - серые
@@ -30,7 +23,7 @@ COLOR_SEARCH = (139, 53, 46)      # темно красный - поиск
 COLOR_FINAL = (199, 224, 0)       # лайм - финальный путь
 
 class Maze:
-    def __init__(self, width=64, height=64, cell_size=1):
+    def __init__(self, width=MATRIX_WIDTH, height=MATRIX_HEIGHT, cell_size=1):
         self.width = width
         self.height = height
         self.cell_size = cell_size
@@ -45,11 +38,8 @@ class Maze:
     def _random_inner_position(self):
         """Генерирует случайную позицию внутри лабиринта (не на краях)"""
         # Выбираем позицию в центральной области
-        min_dist = self.grid_h // 4
-        max_dist = 3 * self.grid_h // 4
-
-        y = random.randint(min_dist, max_dist)
-        x = random.randint(min_dist, max_dist)
+        y = random.randint(self.grid_h // 4, 3 * self.grid_h // 4)
+        x = random.randint(self.grid_w // 4, 3 * self.grid_w // 4)
 
         # Убеждаемся что координаты четные
         if y % 2 == 1:
@@ -247,13 +237,15 @@ try:
     print("Визуализация поиска пути в лабиринте...")
 
     # iteration = 0
+    clock = FrameClock(60)  # достижимая частота: между кадрами часы успевают спать
+    output = FrameOutput(matrix, clock)
     while True:
         # iteration += 1
         # print(f"\n=== Итерация {iteration} ===")
 
         # Генерируем новый лабиринт
         # print("Генерация лабиринта...")
-        maze = Maze(width=64, height=64, cell_size=1)
+        maze = Maze(cell_size=1)
         maze.generate()
         # print(f"Лабиринт сгенерирован! Финиш в позиции {maze.end}")
 
@@ -266,24 +258,24 @@ try:
 
         # Фаза 1: Показываем поиск всех путей (фиолетовым)
         # print("Фаза 1: Анимация поиска...")
-        for i in range(0, len(search_order), 10):
-            frame = draw_maze_frame(maze, search_progress=search_order[:i+10])
-            matrix.SetImage(frame.convert("RGB"))
-            time.sleep(0.005)
+        for i in range(0, len(search_order), SEARCH_STEP):
+            frame = draw_maze_frame(maze, search_progress=search_order[:i+SEARCH_STEP])
+            output.show(frame)
+            clock.tick()
 
         # Показываем весь поиск на секунду
         frame = draw_maze_frame(maze, search_progress=search_order)
-        matrix.SetImage(frame.convert("RGB"))
-        time.sleep(0.5)
+        output.show(frame)
+        clock.hold(0.5)
 
         # Фаза 2: Показываем только финальный путь (голубым)
         # print("Фаза 2: Отображение финального пути...")
         frame = draw_maze_frame(maze, search_progress=None, final_path=final_path)
-        matrix.SetImage(frame.convert("RGB"))
+        output.show(frame)
 
         # Фаза 3: Таймаут 3 секунды с отображением пути
         # print("Фаза 3: Пауза 3 секунды...")
-        time.sleep(3)
+        clock.hold(3)
 
         # print("Переход к новому лабиринту...")
 
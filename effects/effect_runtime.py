@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Общий рантайм для эффектов-плагинов.
+
+Эффект-плагин не содержит своего цикла и не создаёт матрицу: он
+реализует контракт EffectPlugin (setup / generate_frame / teardown),
+а кадры на панель выводит Renderer. Это позволяет долгоживущему
+процессу переключать эффекты без перезапуска и повторной
+инициализации матрицы.
+
+Модуль эффекта становится плагином, если в нём объявлена функция
+верхнего уровня create_plugin(), возвращающая экземпляр EffectPlugin.
+"""
+
+import ast
+import importlib.util
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+
+from frame_clock import FrameClock
+from frame_output import VSYNC_PACING, FrameOutput
+from frame_pipeline import FramePipeline
+from frame_stats import FrameStats
+from led_matrix import create_matrix
+
+# Имя функции-фабрики плагина в модуле эффекта
+PLUGIN_FACTORY = 'create_plugin'
+
+
+class EffectPlugin:
+    """
+    Контракт эффекта для Renderer.
+
+    generate_frame(t, dt) получает время с начала эффекта и время
+    с предыдущего кадра (секунды) и возвращает PIL.Image или
+    массив numpy формы (height, width, 3) с типом uint8.
+
+    pipeline_depth > 0 включает рендер с опережением (frame_pipeline.py):
+    generate_frame вызывается из отдельного потока на столько кадров
+    вперёд и получает время кадра по сетке fps.
+    """
+
+    fps = 30
+    pipeline_depth = 0
+
+    def setup(self, width, height):
+        """Вызывается перед первым кадром"""
+        self.width = width
+        self.height = height
+
+    def generate_frame(self, t, dt):
+        raise NotImplementedError
+
+    def teardown(self):
+        """Вызывается при переключении на другой эффект"""
+
+    def control(self, params):
+        """
+        Управление работающим эффектом (POST /api/effects/control).
+        Вызывается из другого потока: изменения применяются со
+        следующего кадра. Неверные параметры - ValueError.
+        """
+        raise ValueError('Эффект не поддерживает управление')
+
+
+def has_plugin(effect_file):
+    """Объявлена ли в файле эффекта функция create_plugin()"""
+    try:
+        tree = ast.parse(Path(effect_file).read_text(encoding='utf-8'))
+    except (OSError, SyntaxError, ValueError):
+        return False
+    return any(
+        isinstance(node, ast.FunctionDef) and node.name == PLUGIN_FACTORY
+        for node in tree.body
+    )
+
+
+def load_plugin(effect_file):
+    """
+    Импортирует модуль эффекта (повторно, только если файл изменился)
+    и создаёт экземпляр плагина.
+    """
+    effect_file = Path(effect_file).resolve()
+    name = effect_file.stem
+    mtime = effect_file.stat().st_mtime
+
+    module = sys.modules.get(name)
+    if module is None or getattr(module, '__file__', None) != str(effect_file) \
+            or getattr(module, '_plugin_mtime', None) != mtime:
+        if str(effect_file.parent) not in sys.path:
+            sys.path.insert(0, str(effect_file.parent))
+        spec = importlib.util.spec_from_file_location(name, effect_file)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+        module._plugin_mtime = mtime
+
+    return getattr(module, PLUGIN_FACTORY)()
+
+
+class Renderer:
+    """
+    Цикл вывода кадров, владеющий матрицей.
+    Эффект меняется вызовом switch() из любого потока; смена
+    происходит между кадрами.
+    """
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+        # Размер холста берётся у матрицы (цепочка и параллельные панели, см. led_matrix.py)
+        self.width = matrix.width
+        self.height = matrix.height
+        self.plugin = None
+        self.running = False
+        self._pending = None
+        self._has_pending = False
+        self._pending_callbacks = {}
+        self._callbacks = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._pipeline = None
+        # Двойная буферизация и копия кадра в общей памяти (см. frame_output.py)
+        self.output = FrameOutput(matrix)
+
+    def switch(self, plugin, on_first_frame=None, on_exit=None, on_stats=None):
+        """
+        Ставит плагин в очередь на запуск (None - погасить панель).
+        on_first_frame() вызывается после вывода первого кадра,
+        on_exit(code) - когда плагин снят с панели или упал,
+        on_stats(stats) - раз в секунду (см. frame_stats.py).
+        """
+        with self._lock:
+            # Плагин, так и не дождавшийся запуска, сразу считается завершённым
+            replaced = self._pending_callbacks.get('exit') if self._has_pending else None
+            self._pending = plugin
+            self._has_pending = True
+            self._pending_callbacks = {'first_frame': on_first_frame, 'exit': on_exit, 'stats': on_stats}
+            self._idle.clear()
+        self._wakeup.set()
+        if replaced:
+            replaced(0)
+
+    def control(self, params):
+        """Передаёт параметры управления текущему плагину"""
+        plugin = self.plugin
+        if plugin is None:
+            raise ValueError('Нет запущенного плагина')
+        plugin.control(params)
+
+    def wait_idle(self, timeout=None):
+        """Ждёт, пока рендерер не останется без плагина"""
+        return self._idle.wait(timeout)
+
+    def stop(self):
+        self.running = False
+        self.switch(None)
+
+    def _finish_plugin(self, code):
+        plugin, self.plugin = self.plugin, None
+        if self._pipeline is not None:
+            self._pipeline.stop()
+            self._pipeline = None
+        on_exit = self._callbacks.get('exit')
+        self._callbacks = {}
+        if plugin is not None:
+            try:
+                plugin.teardown()
+            except Exception:
+                traceback.print_exc()
+            if self.matrix is not None:
+                self.output.clear()
+            if on_exit:
+                on_exit(code)
+
+    def _apply_pending(self):
+        with self._lock:
+            if not self._has_pending:
+                return False
+            plugin, callbacks = self._pending, self._pending_callbacks
+            self._pending, self._has_pending = None, False
+            # Побудка от этого switch() уже обработана и не должна сократить паузу после первого кадра
+            self._wakeup.clear()
+
+        self._finish_plugin(0)
+        if plugin is not None:
+            try:
+                plugin.setup(self.width, self.height)
+            except Exception:
+                traceback.print_exc()
+                plugin = None
+                if callbacks.get('exit'):
+                    callbacks['exit'](1)
+            else:
+                self._callbacks = callbacks
+        self.plugin = plugin
+        if plugin is None:
+            with self._lock:
+                if not self._has_pending:
+                    self._idle.set()
+        return True
+
+    def _wait(self, timeout):
+        """Пауза между кадрами, которую прерывает switch()"""
+        self._wakeup.wait(timeout)
+        self._wakeup.clear()
+
+    def run(self):
+        """Основной цикл; блокирует вызывающий поток до stop()"""
+        self.running = True
+        first_frame = False
+        clock = stats = None
+
+        while self.running:
+            if self._apply_pending():
+                first_frame = True
+                clock = stats = None
+                if self.plugin is not None:
+                    clock = FrameClock(self.plugin.fps, wait=self._wait)
+                    if VSYNC_PACING:
+                        self.output.pace(clock)
+                    if self.plugin.pipeline_depth:
+                        self._pipeline = FramePipeline(
+                            self.plugin.generate_frame, clock.fps, self.plugin.pipeline_depth).start()
+                    if self._callbacks.get('stats'):
+                        stats = FrameStats(self._callbacks['stats'], clock=clock, pipeline=self._pipeline)
+
+            if self.plugin is None:
+                self._wait(None)
+                continue
+
+            try:
+                if self._pipeline is not None:
+                    frame = self._pipeline.get()
+                else:
+                    frame = self.plugin.generate_frame(clock.t, clock.dt)
+                push_start = time.perf_counter()
+                self.output.show(frame)
+                push_end = time.perf_counter()
+            except Exception:
+                traceback.print_exc()
+                self._finish_plugin(1)
+                with self._lock:
+                    if not self._has_pending:
+                        self._idle.set()
+                continue
+
+            if first_frame:
+                first_frame = False
+                on_first_frame = self._callbacks.get('first_frame')
+                if on_first_frame:
+                    on_first_frame()
+
+            if stats:
+                stats.frame(generate_s=push_start - clock.frame_start, push_s=push_end - push_start)
+
+            clock.tick()
+
+        self._finish_plugin(0)
+        self._idle.set()
+
+
+def run_standalone(plugin):
+    """Запуск плагина как отдельной программы (python effect.py)"""
+    renderer = Renderer(create_matrix())
+    renderer.switch(plugin)
+    try:
+        renderer.run()
+    except KeyboardInterrupt:
+        renderer.running = False
+        renderer._finish_plugin(0)
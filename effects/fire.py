@@ -1,36 +1,20 @@
 #!/usr/bin/env python
-import time
-import random
 import math
-import platform
+from pathlib import Path
 
-if platform.system() == "Windows":
-    from RGBMatrixEmulator import RGBMatrix, RGBMatrixOptions
-    graphics = None  # если нужно
-else:
-    from rgbmatrix import RGBMatrix, RGBMatrixOptions, graphics
-from PIL import Image, ImageDraw
+import numpy as np
+
+from effect_runtime import EffectPlugin, run_standalone
+from led_matrix import effect_config
 
 # ===== НАСТРОЙКИ =====
-MATRIX_WIDTH = 64
-MATRIX_HEIGHT = 64
-FIRE_WIDTH = 64
-FIRE_HEIGHT = 64
-FPS = 14
+# Размер пламени равен размеру холста (секция hardware: в config.yaml)
+FPS = 60
 DECAY = 2  # Скорость затухания пламени (1-10)
 INTENSITY = 8  # Интенсивность огня (1-15)
 COOLING = 30  # Охлаждение пламени (10-50)
-PALETTE_STYLE = "blue"  # "classic", "blue", "purple"
-
-# Настройки матрицы
-options = RGBMatrixOptions()
-options.rows = MATRIX_HEIGHT
-options.cols = MATRIX_WIDTH
-options.chain_length = 1
-options.parallel = 1
-options.hardware_mapping = 'adafruit-hat'
-
-matrix = RGBMatrix(options=options)
+PALETTE_STYLE = "blue"  # "classic", "blue", "purple" или палитра из config.yaml
+PALETTE_STYLES = ("classic", "blue", "purple")
 
 # ===== ЦВЕТОВАЯ ПАЛИТРА =====
 def create_fire_palette(style="classic"):
@@ -80,86 +64,152 @@ def create_fire_palette(style="classic"):
     
     return palette
 
-# Создаем палитру
-fire_palette = create_fire_palette(PALETTE_STYLE)
+def gradient_palette(stops):
+    """Палитра из опорных точек {индекс 0-255: [r, g, b]} с линейной интерполяцией"""
+    points = sorted((int(index), color) for index, color in stops.items())
+    indexes = [index for index, _ in points]
+    colors = np.array([color for _, color in points], dtype=float)
+    return np.stack([np.interp(np.arange(256), indexes, colors[:, c]) for c in range(3)], axis=1)
+
+
+def build_palette_bank(custom=None):
+    """
+    Все палитры одним массивом (n, 256, 3) uint8 и список их имён.
+    custom - палитры из config.yaml: имя -> опорные точки.
+    Компоненты за пределами 0-255 обрезаются, как при записи пикселя в PIL.
+    """
+    palettes = {style: create_fire_palette(style) for style in PALETTE_STYLES}
+    for name, stops in (custom or {}).items():
+        try:
+            palettes[name] = gradient_palette(stops)
+        except (AttributeError, TypeError, ValueError, IndexError) as e:
+            print(f"Палитра {name} пропущена: {e}")
+    names = list(palettes)
+    bank = np.stack([np.clip(palettes[name], 0, 255) for name in names]).astype(np.uint8)
+    return names, bank
 
 # ===== АЛГОРИТМ ПЛАМЕНИ =====
-class FireEffect:
-    def __init__(self, width, height):
-        self.width = width
-        self.height = height
-        self.fire_array = [[0 for _ in range(width)] for _ in range(height)]
+class FireEffect(EffectPlugin):
+    fps = FPS
+
+    def setup(self, width, height):
+        super().setup(width, height)
+        # Палитры считаются один раз; смена палитры - выбор таблицы из банка
+        config = effect_config(Path(__file__).stem)
+        self.palette_names, self.palette_bank = build_palette_bank(config.get('palettes'))
+        style = config.get('palette', PALETTE_STYLE)
+        if style not in self.palette_names:
+            print(f"Неизвестная палитра {style}, используется {PALETTE_STYLE}")
+            style = PALETTE_STYLE
+        self.palette = self.palette_names.index(style)
+        self.lut = self.palette_bank[self.palette]
+        self._request = None
+        self._fade = None
+        self._fade_lut = np.empty((256, 3), dtype=np.uint8)
+        self._blend = np.empty((2, 256, 3), dtype=np.uint16)
+
+        # По столбцу с каждой стороны - копии крайних: у края пламя
+        # усредняет клетку снизу с ней же самой
+        self.fire_array = np.zeros((height, width + 2), dtype=np.int16)
+        self.row_sum = np.empty(width, dtype=np.int16)
+        self.frame = np.empty((height, width, 3), dtype=np.uint8)
         self.spark_chance = 0.3  # Вероятность появления искры
-        
+
     def update_fire(self):
-        # Обновляем основание пламени
-        for x in range(self.width):
-            # Добавляем случайные искры в основание
-            if random.random() < self.spark_chance:
-                self.fire_array[self.height-1][x] = min(255, self.fire_array[self.height-1][x] + random.randint(150, 255))
+        fire = self.fire_array
+        width, height = self.width, self.height
+
+        # Обновляем основание пламени: случайные искры или плавное затухание
+        base = fire[height - 1, 1:-1]
+        sparks = np.random.random(width) < self.spark_chance
+        base += np.where(sparks, np.random.randint(150, 256, width), -DECAY).astype(np.int16)
+        np.clip(base, 0, 255, out=base)
+        # Обеспечиваем минимальную активность у основания
+        weak = base < 30
+        base[weak] = np.random.randint(20, 61, np.count_nonzero(weak))
+        fire[height - 1, 0] = base[0]
+        fire[height - 1, -1] = base[-1]
+
+        # Распространяем пламя вверх: строка - среднее трёх соседей снизу
+        # плюс случайное охлаждение; поле случайностей - одним вызовом
+        noise = np.random.randint(-COOLING, INTENSITY + 1, (height - 1, width)).astype(np.int16)
+        row_sum = self.row_sum
+        for y in range(height - 2, -1, -1):
+            below = fire[y + 1]
+            np.add(below[:-2], below[1:-1], out=row_sum)
+            row_sum += below[2:]
+            row = fire[y, 1:-1]
+            np.floor_divide(row_sum, 3, out=row)
+            row += noise[y]
+            # На коротких строках пара maximum/minimum заметно быстрее np.clip
+            np.maximum(row, 0, out=row)
+            np.minimum(row, 255, out=row)
+            fire[y, 0] = row[0]
+            fire[y, -1] = row[-1]
+
+    def control(self, params):
+        """{"palette": имя, "fade": секунды перехода (0 - сразу)}"""
+        name = params.get('palette')
+        if name not in self.palette_names:
+            raise ValueError(f"Неизвестная палитра: {name} (доступны: {', '.join(self.palette_names)})")
+        fade = params.get('fade', 0)
+        if isinstance(fade, bool) or not isinstance(fade, (int, float)) \
+                or not math.isfinite(fade) or fade < 0:
+            raise ValueError(f"fade - число секунд >= 0, получено: {fade!r}")
+        # Одно присваивание - кадр увидит запрос целиком
+        self._request = (self.palette_names.index(name), float(fade))
+
+    def update_palette(self, t):
+        """Применяет запрошенную палитру и ведёт плавный переход между палитрами"""
+        if self._request is not None:
+            (target, fade), self._request = self._request, None
+            if fade > 0:
+                # Переход начинается с того, что сейчас на панели (в том числе с середины другого перехода)
+                self._fade = (self.lut.copy(), t, fade)
             else:
-                # Плавное затухание у основания
-                self.fire_array[self.height-1][x] = max(0, self.fire_array[self.height-1][x] - DECAY)
-            
-            # Обеспечиваем минимальную активность у основания
-            if self.fire_array[self.height-1][x] < 30:
-                self.fire_array[self.height-1][x] = random.randint(20, 60)
-        
-        # Распространяем пламя вверх
-        for y in range(self.height-2, -1, -1):
-            for x in range(self.width):
-                # Собираем значения от соседних пикселей снизу
-                bottom_val = self.fire_array[y+1][x]
-                left_val = self.fire_array[y+1][x-1] if x > 0 else bottom_val
-                right_val = self.fire_array[y+1][(x+1) % self.width] if x < self.width-1 else bottom_val
-                
-                # Усредняем и добавляем случайность
-                avg = (bottom_val + left_val + right_val) // 3
-                random_offset = random.randint(-COOLING, INTENSITY)
-                
-                new_val = max(0, min(255, avg + random_offset))
-                self.fire_array[y][x] = new_val
-    
+                self._fade = None
+                self.lut = self.palette_bank[target]
+            self.palette = target
+
+        if self._fade is None:
+            return
+        source, start, fade = self._fade
+        weight = int((t - start) / fade * 256)
+        if weight >= 256:
+            self._fade = None
+            self.lut = self.palette_bank[self.palette]
+            return
+        blend = self._blend
+        np.multiply(source, 256 - weight, out=blend[0], dtype=np.uint16)
+        np.multiply(self.palette_bank[self.palette], weight, out=blend[1], dtype=np.uint16)
+        blend[0] += blend[1]
+        blend[0] >>= 8
+        np.copyto(self._fade_lut, blend[0], casting='unsafe')
+        self.lut = self._fade_lut
+
     def create_fire_image(self):
-        image = Image.new("RGB", (self.width, self.height))
-        pixels = image.load()
-        
-        for y in range(self.height):
-            for x in range(self.width):
-                fire_val = self.fire_array[y][x]
-                color_index = min(255, max(0, fire_val))
-                pixels[x, y] = fire_palette[color_index]
-        
-        return image
+        np.take(self.lut, self.fire_array[:, 1:-1], axis=0, out=self.frame)
+        return self.frame
+
+    def generate_frame(self, t, dt):
+        self.update_fire()
+        self.update_palette(t)
+        return self.create_fire_image()
+
+
+def create_plugin():
+    """Точка входа для рантайма эффектов"""
+    return FireEffect()
 
 # ===== ОСНОВНОЙ ЦИКЛ =====
 def main():
-    fire = FireEffect(FIRE_WIDTH, FIRE_HEIGHT)
-    
-    try:
-        print("Fire effect started. Press CTRL-C to stop.")
-        print(f"Settings: FPS={FPS}, DECAY={DECAY}, INTENSITY={INTENSITY}")
-        print(f"Palette: {PALETTE_STYLE}")
-        
-        while True:
-            start_time = time.time()
-            
-            # Обновляем и отрисовываем пламя
-            fire.update_fire()
-            fire_image = fire.create_fire_image()
-            
-            # Выводим на матрицу
-            matrix.SetImage(fire_image.convert("RGB"))
-            
-            # Поддерживаем стабильный FPS
-            elapsed = time.time() - start_time
-            sleep_time = max(0, 1.5/FPS - elapsed)
-            time.sleep(sleep_time)
-            
-    except KeyboardInterrupt:
-        print("\nExiting fire effect...")
-        # Гасим матрицу
-        matrix.Clear()
+    print("Fire effect started. Press CTRL-C to stop.")
+    print(f"Settings: FPS={FPS}, DECAY={DECAY}, INTENSITY={INTENSITY}")
+    print(f"Palette: {PALETTE_STYLE}")
+
+    # Цикл вывода и гашение матрицы по CTRL-C выполняет рантайм
+    run_standalone(create_plugin())
+    print("\nExiting fire effect...")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Общие часы кадров для циклов эффектов.
+
+Вместо sleep(1 / FPS) после кадра (из-за чего реальный FPS всегда ниже
+заданного) FrameClock ждёт до абсолютного дедлайна следующего кадра:
+дедлайны идут по сетке start + n / fps, поэтому ошибки сна и время
+генерации кадра не накапливаются.
+
+    clock = FrameClock(FPS)
+    while True:
+        output.show(generate_frame(clock.t))
+        clock.tick()
+
+Если кадр не уложился в свой дедлайн (overrun), следующий начинается
+сразу, а дальше действует политика догоняния:
+- CATCH_UP_SKIP (по умолчанию) - пропущенные дедлайны отбрасываются,
+  сетка сохраняется;
+- CATCH_UP_BURST - пропущенные кадры выводятся подряд без пауз, но не
+  больше max_burst, остальные отбрасываются;
+- CATCH_UP_RESET - расписание начинается заново от текущего момента.
+
+Если темп задаёт сама панель (SwapOnVSync, см. frame_output.py), часы
+переводятся в режим follow_external(): они не спят, а только считают
+кадры и опоздания.
+
+Часы считают кадры, overrun, пропущенные дедлайны и джиттер
+пробуждения; последние созданные в процессе часы доступны через
+active_clock() и попадают в статистику кадров (frame_stats.py).
+
+По тикам часов отсчитывается окно профилирования (frame_profile.py).
+"""
+
+import time
+
+import frame_profile
+
+CATCH_UP_SKIP = 'skip'
+CATCH_UP_BURST = 'burst'
+CATCH_UP_RESET = 'reset'
+
+# Сколько пропущенных кадров CATCH_UP_BURST выводит подряд
+MAX_BURST = 3
+
+_active = None
+
+
+def active_clock():
+    """Последние созданные в этом процессе часы (или None)"""
+    return _active
+
+
+def _sleep(timeout):
+    time.sleep(timeout)
+
+
+class FrameClock:
+    """
+    wait(timeout) - функция ожидания; по умолчанию time.sleep, рендерер
+    передаёт ожидание события, чтобы переключение эффекта прерывало паузу.
+    """
+
+    def __init__(self, fps, catch_up=CATCH_UP_SKIP, max_burst=MAX_BURST, wait=_sleep):
+        global _active
+        self.catch_up = catch_up
+        self.max_burst = max_burst
+        self.wait = wait
+        self.external = False
+        self.set_fps(fps)
+
+        self.frames = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.holds = 0
+        self._jitter_sum = 0.0
+        self._jitter_max = 0.0
+        self._jitter_count = 0
+        self.start = time.perf_counter()
+        self.reset()
+        _active = self
+
+    def set_fps(self, fps):
+        self.fps = fps
+        self.interval = 1.0 / fps
+
+    def follow_external(self, fps):
+        """Темп задаёт вывод (VSync панели), часы только ведут учёт"""
+        self.external = True
+        self.set_fps(fps)
+        self.reset()
+
+    def reset(self):
+        """Начать расписание заново (после паузы или смены FPS)"""
+        now = time.perf_counter()
+        self.frame_start = now
+        self.deadline = now + self.interval
+        self.dt = 0.0
+
+    @property
+    def t(self):
+        """Секунды с создания часов"""
+        return time.perf_counter() - self.start
+
+    def tick(self):
+        """
+        Ждёт начала следующего кадра.
+        Возвращает число дедлайнов, пропущенных из-за overrun.
+        """
+        frame_profile.on_tick()
+        self.frames += 1
+        now = time.perf_counter()
+        skipped = 0
+
+        if self.external:
+            late = now - self.frame_start - self.interval
+            if late > self.interval / 2:
+                self.overruns += 1
+                skipped = int(late / self.interval + 0.5)
+                self.skipped += skipped
+            woke = now
+            self.deadline = now + self.interval
+        elif now <= self.deadline:
+            self.wait(self.deadline - now)
+            woke = time.perf_counter()
+            jitter = max(0.0, woke - self.deadline)
+            self._jitter_sum += jitter
+            self._jitter_count += 1
+            if jitter > self._jitter_max:
+                self._jitter_max = jitter
+            self.deadline += self.interval
+        else:
+            self.overruns += 1
+            woke = now
+            behind = int((now - self.deadline) / self.interval)
+            if self.catch_up == CATCH_UP_RESET:
+                skipped = behind
+                self.deadline = now + self.interval
+            elif self.catch_up == CATCH_UP_BURST:
+                skipped = max(0, behind - self.max_burst)
+                self.deadline += (skipped + 1) * self.interval
+            else:
+                skipped = behind
+                self.deadline += (behind + 1) * self.interval
+            self.skipped += skipped
+
+        self.dt = woke - self.frame_start
+        self.frame_start = woke
+        return skipped
+
+    def hold(self, seconds):
+        """Намеренная пауза (показ готовой картинки), не считается overrun"""
+        self.wait(seconds)
+        self.holds += 1
+        self.reset()
+
+    def stats(self):
+        """Счётчики часов; окно джиттера сбрасывается при каждом вызове"""
+        count = self._jitter_count
+        stats = {
+            'target_fps': round(self.fps, 2),
+            'overruns': self.overruns,
+            'skipped': self.skipped,
+            'jitter_ms': {
+                'mean': round(self._jitter_sum / count * 1000, 3) if count else None,
+                'max': round(self._jitter_max * 1000, 3),
+            },
+        }
+        self._jitter_sum = 0.0
+        self._jitter_max = 0.0
+        self._jitter_count = 0
+        return stats
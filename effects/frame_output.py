@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Общий путь вывода кадров на панель с двойной буферизацией.
+
+matrix.SetImage() пишет прямо в отображаемый буфер: панель успевает
+показать половину старого и половину нового кадра (разрыв), а вызов
+ждёт посреди обновления. FrameOutput рисует кадр во внеэкранный холст
+и меняет холсты местами по VSync:
+
+    output = FrameOutput(matrix)
+    clock = FrameClock(30)
+    while True:
+        output.show(generate_frame())
+        clock.tick()
+
+Кадр - PIL.Image или массив numpy (height, width, 3) uint8. Изображение
+в режиме RGB передаётся на холст как есть, без convert("RGB") (он всегда
+копирует). Массив один раз распаковывается в изображение поверх своей
+памяти: SetImage принимает только PIL.Image в режиме RGB, а он хранит
+пиксель в 4 байтах, так что это единственная неизбежная копия.
+
+Каждый показанный кадр также попадает в общий кадровый буфер
+(frame_share.py); массив копируется туда напрямую, без tobytes().
+
+Эффекты, которые рисуют отдельными точками, пишут их пачкой в
+PixelBuffer и выводят его одним show():
+
+    pixels = PixelBuffer(matrix.width, matrix.height)
+    pixels.set_pixels(xs, ys, colors)
+    output.show(pixels.pixels)
+
+Круги и квадраты из массивов центров и радиусов рисует splat()
+(frame_splat.py) - тоже пачкой, без вызова draw.ellipse на каждую точку.
+
+Темп от панели: при LED_VSYNC_PACING=1 (или vsync_pacing=True) вывод
+меняет холсты на каждом N-м обновлении панели, где N подбирается под
+FPS часов, а часы перестают спать сами и только считают кадры.
+"""
+
+import os
+import time
+
+import numpy as np
+from PIL import Image
+
+from frame_share import shared_writer
+from frame_splat import BLEND_OVER, CIRCLE, splat
+
+# Темп цикла задаёт обновление панели, а не time.sleep
+VSYNC_PACING = os.environ.get('LED_VSYNC_PACING', '0') == '1'
+
+# Сколько обновлений панели замерять для оценки её частоты
+VSYNC_CALIBRATION_FRAMES = 10
+
+
+def to_image(frame):
+    """Приводит кадр к PIL.Image в режиме RGB с минимумом копирований"""
+    if isinstance(frame, np.ndarray):
+        if not frame.flags.c_contiguous:
+            frame = np.ascontiguousarray(frame)
+        height, width = frame.shape[:2]
+        return Image.frombuffer('RGB', (width, height), frame, 'raw', 'RGB', 0, 1)
+    if frame.mode != 'RGB':
+        return frame.convert('RGB')
+    return frame
+
+
+class PixelBuffer:
+    """
+    Кадр numpy (height, width, 3) uint8 для эффектов из отдельных точек.
+    Координаты и цвета передаются массивами и записываются одной
+    операцией numpy вместо вызова SetPixel на каждую точку.
+    Кадр не очищается сам: нарисованные точки остаются до fill().
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.pixels = np.zeros((height, width, 3), dtype=np.uint8)
+        self._flat = self.pixels.reshape(-1, 3)
+
+    def fill(self, color=(0, 0, 0)):
+        """Заливает весь кадр одним цветом"""
+        if color[0] == color[1] == color[2]:
+            # Серый (и чёрный) - заливка байтом, в разы быстрее присваивания кортежа
+            self.pixels.fill(color[0])
+        else:
+            self.pixels[:] = color
+
+    def set_pixels(self, x, y, colors):
+        """
+        x, y - массивы координат (дробные отбрасываются до целых),
+        colors - один цвет (r, g, b) или массив (n, 3).
+        Точки за пределами кадра пропускаются, как у SetPixel.
+        """
+        x = np.asarray(x).astype(np.intp)
+        y = np.asarray(y).astype(np.intp)
+        colors = np.asarray(colors).astype(np.uint8)
+        index = y * self.width + x
+        # Отрицательные координаты в беззнаковом виде больше размера кадра
+        inside = (x.view(np.uintp) < self.width) & (y.view(np.uintp) < self.height)
+        if not inside.all():
+            index = index[inside]
+            if colors.ndim == 2:
+                colors = colors[inside]
+        self._flat[index] = colors
+
+    def splat(self, x, y, radius, colors, shape=CIRCLE, blend=BLEND_OVER, supersample=1):
+        """Рисует круги (или квадраты) с центрами x, y и радиусами radius, см. frame_splat.splat"""
+        splat(self.pixels, x, y, radius, colors, shape, blend, supersample)
+
+
+class FrameOutput:
+    def __init__(self, matrix, clock=None, vsync_pacing=VSYNC_PACING):
+        self.matrix = matrix
+        self.canvas = matrix.CreateFrameCanvas()
+        self.frame_share = shared_writer(self.canvas.width, self.canvas.height)
+        self.framerate_fraction = 1
+        self.refresh_hz = None
+        if vsync_pacing and clock is not None:
+            self.pace(clock)
+
+    def show(self, frame):
+        """Выводит кадр (PIL.Image или массив (h, w, 3) uint8) со сменой холстов по VSync"""
+        image = to_image(frame)
+        self.canvas.SetImage(image)
+        self.canvas = self.matrix.SwapOnVSync(self.canvas, self.framerate_fraction)
+        self.frame_share.write(frame if isinstance(frame, np.ndarray) else image)
+
+    def clear(self):
+        """Гасит панель"""
+        self.canvas.Clear()
+        self.canvas = self.matrix.SwapOnVSync(self.canvas)
+        self.frame_share.clear()
+
+    def measure_refresh(self, frames=VSYNC_CALIBRATION_FRAMES):
+        """Оценивает частоту обновления панели по времени SwapOnVSync"""
+        self.canvas = self.matrix.SwapOnVSync(self.canvas)
+        start = time.perf_counter()
+        for _ in range(frames):
+            self.canvas = self.matrix.SwapOnVSync(self.canvas)
+        elapsed = time.perf_counter() - start
+        return frames / elapsed if elapsed > 0 else None
+
+    def pace(self, clock):
+        """
+        Переводит цикл на темп панели: холсты меняются на каждом
+        N-м обновлении, а часы только считают кадры.
+        Если SwapOnVSync не ждёт обновления (эмулятор), часы не трогаются.
+        """
+        if self.refresh_hz is None:
+            self.refresh_hz = self.measure_refresh() or 0
+        if not self.refresh_hz or self.refresh_hz > 1000:
+            return
+        self.framerate_fraction = max(1, round(self.refresh_hz / clock.fps))
+        clock.follow_external(self.refresh_hz / self.framerate_fraction)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Рендер с опережением через ограниченную очередь кадров.
+
+Обычно кадр генерируется и выводится по очереди в одном потоке, и
+медленный кадр сразу превращается в заметный рывок. FramePipeline
+генерирует кадры в отдельном потоке на depth кадров вперёд, а цикл
+вывода забирает готовые по своим часам:
+
+    pipeline = FramePipeline(render, fps=FPS)
+    pipeline.start()
+    while True:
+        output.show(pipeline.get())
+        clock.tick()
+
+render(t, dt) вызывается только из потока-производителя и получает
+время кадра по сетке n / fps, а не по часам: кадр показывается позже,
+чем генерируется. Поток, а не процесс, выбран потому, что кадр не
+приходится пересылать, а PIL и numpy отпускают GIL на тяжёлых
+операциях (фильтры, композиция слоёв).
+
+Если очередь пуста, когда выводу нужен кадр, это underrun: вывод ждёт
+кадр. Глубина очереди, underrun и время генерации попадают в
+статистику кадров (frame_stats.py) через active_pipeline().
+"""
+
+import os
+import queue
+import threading
+import time
+
+# Сколько кадров генерируется наперёд
+PIPELINE_DEPTH = int(os.environ.get('LED_PIPELINE_DEPTH', '3'))
+
+# Как часто ожидающий кадр вывод проверяет, жив ли производитель
+_POLL = 0.1
+
+_active = None
+
+
+def active_pipeline():
+    """Запущенный в этом процессе конвейер кадров (или None)"""
+    return _active
+
+
+class FramePipeline:
+    def __init__(self, render, fps, depth=PIPELINE_DEPTH):
+        self.render = render
+        self.interval = 1.0 / fps
+        self.depth = max(1, depth)
+        self.queue = queue.Queue(maxsize=self.depth)
+        self.frames = 0
+        self.underruns = 0
+        self.error = None
+        self._generate_times = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        global _active
+        self._thread = threading.Thread(target=self._produce, name='frame-pipeline', daemon=True)
+        self._thread.start()
+        _active = self
+        return self
+
+    def stop(self):
+        """Останавливает производителя; непоказанные кадры отбрасываются"""
+        global _active
+        self._stop.set()
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if _active is self:
+            _active = None
+
+    def _produce(self):
+        index = 0
+        try:
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                frame = self.render(index * self.interval, self.interval)
+                self._generate_times.append(time.perf_counter() - start)
+                index += 1
+                while not self._stop.is_set():
+                    try:
+                        self.queue.put(frame, timeout=_POLL)
+                        break
+                    except queue.Full:
+                        pass
+        except Exception as e:
+            self.error = e
+
+    def get(self):
+        """
+        Следующий готовый кадр. Если очередь пуста - ждёт его и
+        считает underrun. Ошибка производителя поднимается здесь.
+        """
+        try:
+            frame = self.queue.get_nowait()
+        except queue.Empty:
+            # Пока не показан первый кадр, ожидание - это разгон, а не underrun
+            if self.frames:
+                self.underruns += 1
+            while True:
+                if self.error is not None:
+                    raise self.error
+                try:
+                    frame = self.queue.get(timeout=_POLL)
+                    break
+                except queue.Empty:
+                    pass
+        self.frames += 1
+        return frame
+
+    def take_generate_times(self):
+        """Время генерации кадров (секунды) с прошлого вызова"""
+        times, self._generate_times = self._generate_times, []
+        return times
+
+    def stats(self):
+        return {
+            'queue_depth': self.queue.qsize(),
+            'queue_capacity': self.depth,
+            'underruns': self.underruns,
+        }
@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Профилирование работающего эффекта по запросу.
+
+Профиль снимается с окна из заданного числа кадров, считая по
+FrameClock.tick(): профилировщик включается на ближайшем кадре и
+выключается через frames кадров, эффект при этом не перезапускается
+и не теряет состояние анимации. Режимы (MODES):
+- cprofile - детерминированный cProfile в потоке, который ведёт часы
+  кадров; результат - файл pstats (.prof), его открывают
+  python -m pstats или snakeviz;
+- sample - поток-сэмплер раз в SAMPLE_INTERVAL снимает стеки потока
+  часов и потока конвейера кадров (frame_pipeline.py); результат -
+  свёрнутые стеки (.txt, формат flamegraph.pl / speedscope). Почти не
+  замедляет эффект и видит время генерации кадров наперёд.
+
+Профили пишутся в PROFILE_DIR (LED_PROFILE_DIR) под именем
+<эффект>-<pid>-<время>.prof|.txt. Запустить профиль можно:
+- переменной окружения: LED_PROFILE=cprofile|sample профилирует первые
+  LED_PROFILE_FRAMES кадров эффекта;
+- в эффекте, запущенном зиготой, - сигналом SIGUSR1 с параметрами в
+  файле request-<pid>.json (так это делает POST /api/effects/profile);
+- из кода - вызовом request().
+"""
+
+import cProfile
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+MODES = ('cprofile', 'sample')
+DEFAULT_MODE = 'cprofile'
+
+PROFILE_DIR = Path(os.environ.get('LED_PROFILE_DIR', '/tmp/led-profiles'))
+
+# Размер окна профилирования по умолчанию и максимальный (кадры)
+MAX_FRAMES = 10000
+try:
+    DEFAULT_FRAMES = min(max(int(os.environ.get('LED_PROFILE_FRAMES', '300')), 1), MAX_FRAMES)
+except ValueError:
+    # Модуль импортируют часы кадров и веб-приложение - кривое значение не должно их ронять
+    DEFAULT_FRAMES = 300
+
+# Период сэмплирования стеков в режиме sample (секунды)
+SAMPLE_INTERVAL = 0.005
+
+# Потоки, которые сэмплируются вместе с потоком часов кадров
+SAMPLED_THREADS = ('frame-pipeline',)
+
+EXTENSIONS = {'cprofile': '.prof', 'sample': '.txt'}
+
+_pending = None
+_session = None
+_on_done = None
+
+
+def clamp_frames(frames):
+    """Размер окна в допустимых пределах"""
+    return min(max(int(frames or DEFAULT_FRAMES), 1), MAX_FRAMES)
+
+
+def request(mode=DEFAULT_MODE, frames=DEFAULT_FRAMES, name=None, on_done=None):
+    """
+    Запросить профиль следующих frames кадров. Профилировщик включится
+    на ближайшем тике часов кадров; on_done(path) вызывается из потока
+    часов, когда профиль записан. Можно вызывать из любого потока и из
+    обработчика сигнала.
+    """
+    global _pending
+    if mode not in MODES:
+        raise ValueError(f"Неизвестный режим профилирования: {mode} (доступны: {', '.join(MODES)})")
+    _pending = {'mode': mode, 'frames': clamp_frames(frames), 'name': name,
+                'on_done': on_done or _on_done}
+
+
+def on_tick():
+    """Вызывается из FrameClock.tick() на каждом кадре"""
+    global _pending, _session
+    if _pending is not None:
+        pending, _pending = _pending, None
+        if _session is not None:
+            _session.stop()
+        _session = ProfileSession(**pending)
+        _session.start()
+        return
+    if _session is not None:
+        _session.frames_done += 1
+        if _session.frames_done >= _session.frames:
+            flush()
+
+
+def flush():
+    """Завершает текущий профиль (в том числе неполный) и записывает его"""
+    global _session
+    session, _session = _session, None
+    if session is None:
+        return None
+    session.stop()
+    path = session.save()
+    print(f"Профиль {session.mode} ({session.frames_done} кадров за {session.elapsed:.1f} с) сохранён: {path}")
+    if session.on_done:
+        session.on_done(str(path))
+    return path
+
+
+def request_file(pid):
+    """Файл с параметрами запроса профиля для процесса pid"""
+    return PROFILE_DIR / f'request-{pid}.json'
+
+
+def send_request(pid, mode=DEFAULT_MODE, frames=DEFAULT_FRAMES):
+    """Запросить профиль у другого процесса эффекта (SIGUSR1)"""
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    with open(request_file(pid), 'w', encoding='utf-8') as f:
+        json.dump({'mode': mode, 'frames': frames}, f)
+    os.kill(pid, signal.SIGUSR1)
+
+
+def _handle_signal(_sig, _frame):
+    params = {}
+    path = request_file(os.getpid())
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            params = json.load(f)
+        os.unlink(path)
+    except (OSError, ValueError):
+        pass
+    try:
+        request(params.get('mode', DEFAULT_MODE), params.get('frames', DEFAULT_FRAMES))
+    except ValueError as e:
+        print(e)
+
+
+def install(on_done=None):
+    """
+    Готовит профилирование в процессе эффекта: сбрасывает сеанс,
+    унаследованный через fork(), применяет LED_PROFILE и ставит
+    обработчик SIGUSR1. Вызывать из главного потока.
+    """
+    global _pending, _session, _on_done
+    _session = None
+    _pending = None
+    _on_done = on_done
+    _request_from_env()
+    if hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1, _handle_signal)
+
+
+def _request_from_env():
+    mode = os.environ.get('LED_PROFILE')
+    if not mode:
+        return
+    try:
+        request(mode, DEFAULT_FRAMES)
+    except ValueError as e:
+        print(e)
+
+
+def list_profiles():
+    """Записанные профили, новые первыми"""
+    profiles = []
+    for path in PROFILE_DIR.glob('*-*-*.*'):
+        mode = next((m for m, ext in EXTENSIONS.items() if ext == path.suffix), None)
+        if mode is None:
+            continue
+        stat = path.stat()
+        profiles.append({
+            'name': path.name,
+            'effect': path.stem.rsplit('-', 2)[0],
+            'mode': mode,
+            'size': stat.st_size,
+            'created': stat.st_mtime,
+        })
+    profiles.sort(key=lambda profile: profile['created'], reverse=True)
+    return profiles
+
+
+class ProfileSession:
+    """Один профиль: окно из frames кадров в потоке, который ведёт часы"""
+
+    def __init__(self, mode, frames, name=None, on_done=None):
+        self.mode = mode
+        self.frames = frames
+        self.name = name or (Path(sys.argv[0]).stem if sys.argv and sys.argv[0] else 'effect')
+        self.on_done = on_done
+        self.frames_done = 0
+        self.thread_id = None
+        self.started = None
+        self.elapsed = 0.0
+        self.profiler = None
+        self.stacks = Counter()
+        self._sampler = None
+        self._stop = threading.Event()
+
+    def start(self):
+        self.thread_id = threading.get_ident()
+        self.started = time.perf_counter()
+        if self.mode == 'cprofile':
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        else:
+            self._sampler = threading.Thread(target=self._sample, name='frame-profile', daemon=True)
+            self._sampler.start()
+
+    def stop(self):
+        if self.started is None:
+            return
+        self.elapsed = time.perf_counter() - self.started
+        self.started = None
+        if self.profiler is not None and threading.get_ident() == self.thread_id:
+            self.profiler.disable()
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+
+    def _sample(self):
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            names = {thread.ident: thread.name for thread in threading.enumerate()
+                     if thread.name in SAMPLED_THREADS}
+            names[self.thread_id] = 'frames'
+            for ident, frame in sys._current_frames().items():
+                if ident not in names:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                    frame = frame.f_back
+                stack.append(names[ident])
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def save(self):
+        """Записывает профиль в PROFILE_DIR и возвращает путь"""
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime('%Y%m%d%H%M%S')
+        path = PROFILE_DIR / f'{self.name}-{os.getpid()}-{stamp}{EXTENSIONS[self.mode]}'
+        # Пишем во временный файл, чтобы API не отдал недописанный профиль
+        temp = path.with_name(path.name + '.tmp')
+        if self.mode == 'cprofile':
+            self.profiler.create_stats()
+            self.profiler.dump_stats(str(temp))
+        else:
+            with open(temp, 'w', encoding='utf-8') as f:
+                for stack, count in self.stacks.most_common():
+                    f.write(f'{stack} {count}\n')
+        os.replace(temp, path)
+        return path
+
+
+_request_from_env()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Общий кадровый буфер в разделяемой памяти.
+
+Каждый выведенный на матрицу кадр дополнительно копируется в файл
+фиксированного размера в /dev/shm, отображённый через mmap. Веб-сервер
+и другие инструменты читают текущий кадр напрямую из памяти, без
+сериализации и без участия процесса эффекта.
+
+Формат файла:
+- заголовок (16 байт): счётчик sequence (uint64), ширина и высота (uint32);
+- пиксели: height * width * 3 байт RGB построчно.
+
+Размер кадра задаёт писатель (размер холста матрицы); читатель берёт
+его из заголовка и переоткрывает буфер, если размер изменился.
+
+Запись защищена seqlock: перед записью счётчик становится нечётным,
+после - снова чётным. Читатель повторяет чтение, если счётчик нечётный
+или изменился за время копирования. Писатель никогда не ждёт читателей.
+"""
+
+import mmap
+import os
+import struct
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Путь к буферу (в /dev/shm, где он есть)
+_SHM_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+FRAME_SHM = os.environ.get('LED_FRAME_SHM', os.path.join(_SHM_DIR, 'led-frame'))
+
+FRAME_WIDTH = 64
+FRAME_HEIGHT = 64
+
+HEADER = struct.Struct('<QII')
+HEADER_SIZE = 16
+
+# Сколько раз читатель повторяет чтение, если попал на запись
+READ_RETRIES = 100
+
+
+def buffer_size(width=FRAME_WIDTH, height=FRAME_HEIGHT):
+    return HEADER_SIZE + width * height * 3
+
+
+class FrameWriter:
+    """
+    Пишет кадры в разделяемый буфер. Если буфер не удалось открыть
+    (нет прав, нет места), запись молча отключается - вывод на матрицу
+    не должен от этого зависеть.
+    """
+
+    def __init__(self, path=FRAME_SHM, width=FRAME_WIDTH, height=FRAME_HEIGHT):
+        self.width = width
+        self.height = height
+        self.frame_size = width * height * 3
+        self.mm = None
+        self.pixels = None
+        try:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                # Файл только растёт: читатель, ещё не заметивший смену
+                # размера, не должен читать за концом файла
+                if os.fstat(fd).st_size < buffer_size(width, height):
+                    os.ftruncate(fd, buffer_size(width, height))
+                self.mm = mmap.mmap(fd, buffer_size(width, height))
+            finally:
+                os.close(fd)
+        except OSError:
+            return
+
+        struct.pack_into('<II', self.mm, 8, width, height)
+        self.pixels = np.ndarray((height, width, 3), dtype=np.uint8,
+                                 buffer=self.mm, offset=HEADER_SIZE)
+
+    def write(self, frame):
+        """Копирует кадр (PIL.Image в режиме RGB или массив (h, w, 3) uint8)"""
+        if self.mm is None:
+            return
+
+        if isinstance(frame, np.ndarray):
+            if frame.shape != self.pixels.shape:
+                return
+            self._begin()
+            self.pixels[...] = frame
+        else:
+            if frame.size != (self.width, self.height) or frame.mode != 'RGB':
+                return
+            data = frame.tobytes()
+            self._begin()
+            self.mm[HEADER_SIZE:HEADER_SIZE + self.frame_size] = data
+        self._end()
+
+    def clear(self):
+        """Чёрный кадр (матрица погашена)"""
+        if self.mm is None:
+            return
+        self._begin()
+        self.pixels[...] = 0
+        self._end()
+
+    def _begin(self):
+        # Счётчик берётся из файла: буфер по очереди пишут зигота и
+        # дочерние процессы, и номер кадра не должен идти назад.
+        # Нечётный счётчик, оставленный упавшим писателем, так и остаётся
+        # нечётным до конца записи.
+        self.sequence = struct.unpack_from('<Q', self.mm, 0)[0] | 1
+        struct.pack_into('<Q', self.mm, 0, self.sequence)
+
+    def _end(self):
+        self.sequence += 1
+        struct.pack_into('<Q', self.mm, 0, self.sequence)
+
+    def close(self):
+        if self.mm is not None:
+            self.pixels = None
+            self.mm.close()
+            self.mm = None
+
+
+_shared_writer = None
+
+
+def shared_writer(width=FRAME_WIDTH, height=FRAME_HEIGHT):
+    """Один писатель на процесс: его используют все пути вывода кадров"""
+    global _shared_writer
+    if _shared_writer is None or (_shared_writer.width, _shared_writer.height) != (width, height):
+        if _shared_writer is not None:
+            _shared_writer.close()
+        _shared_writer = FrameWriter(width=width, height=height)
+    return _shared_writer
+
+
+class FrameReader:
+    """Читает текущий кадр из разделяемого буфера"""
+
+    def __init__(self, path=FRAME_SHM):
+        self.path = Path(path)
+        self.mm = None
+        self.width = self.height = 0
+
+    def _open(self):
+        if self.mm is not None:
+            # Писатель пересоздал буфер под другой размер холста
+            if HEADER.unpack_from(self.mm, 0)[1:] == (self.width, self.height):
+                return True
+            self.close()
+        try:
+            with open(self.path, 'rb') as f:
+                self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return False
+        _, self.width, self.height = HEADER.unpack_from(self.mm, 0)
+        if len(self.mm) < buffer_size(self.width, self.height):
+            self.close()
+            return False
+        return True
+
+    def sequence(self):
+        """Номер последнего записанного кадра (0 - кадров ещё не было)"""
+        if not self._open():
+            return 0
+        return HEADER.unpack_from(self.mm, 0)[0] // 2
+
+    def view(self):
+        """
+        Массив (h, w, 3) прямо поверх разделяемой памяти, без копирования.
+        Во время записи кадра данные могут быть смешаны из двух кадров.
+        """
+        if not self._open():
+            return None
+        return np.ndarray((self.height, self.width, 3), dtype=np.uint8,
+                          buffer=self.mm, offset=HEADER_SIZE)
+
+    def read(self):
+        """
+        Согласованная копия кадра: (sequence, bytes) или None,
+        если буфера нет или писатель слишком часто его перезаписывает.
+        """
+        if not self._open():
+            return None
+        frame_size = self.width * self.height * 3
+        for _ in range(READ_RETRIES):
+            before = HEADER.unpack_from(self.mm, 0)[0]
+            if before & 1:
+                time.sleep(0)
+                continue
+            data = self.mm[HEADER_SIZE:HEADER_SIZE + frame_size]
+            if HEADER.unpack_from(self.mm, 0)[0] == before:
+                return before // 2, data
+        return None
+
+    def close(self):
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Пакетная отрисовка точек (splat) в кадр numpy.
+
+Эффекты из множества мелких кругов и квадратов вместо сотен вызовов
+draw.ellipse / draw.rectangle на кадр передают центры, радиусы и цвета
+массивами, и все точки рисуются за несколько операций numpy: время
+зависит от числа закрашенных пикселей, а не от числа вызовов.
+
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    splat(frame, x, y, radius, colors)                 # круги
+    splat(frame, x, y, half, colors, shape=SQUARE)     # квадраты
+    output.show(frame)
+
+Пиксель (i, j) - квадрат с центром (i + 0.5, j + 0.5). Точка
+закрашивает пиксели, центры которых не дальше radius + 0.5 от её
+центра (для квадрата - по каждой оси): как и у PIL, крайние пиксели
+рамки [x - r, y - r, x + r, y + r] входят в фигуру. В отличие от PIL,
+который отбрасывает у рамки дробную часть, центр точки не округляется,
+поэтому медленно движущиеся точки не дёргаются на целый пиксель. Точка
+любого размера закрашивает хотя бы ближайший пиксель.
+
+Смешивание (blend):
+- BLEND_OVER - непрозрачные точки, каждая следующая поверх предыдущих
+  (как последовательные вызовы draw.ellipse);
+- BLEND_ADD - цвета складываются с насыщением на 255;
+- BLEND_MAX - покомпонентный максимум.
+
+supersample=2 сглаживает края: покрытие пикселя считается по 2x2
+подвыборкам и умножает цвет точки (для BLEND_OVER - смешивает с фоном).
+"""
+
+import numpy as np
+
+CIRCLE = 'circle'
+SQUARE = 'square'
+
+BLEND_OVER = 'over'
+BLEND_ADD = 'add'
+BLEND_MAX = 'max'
+
+# Круг меньше этого радиуса (от центра до угла пикселя) всё равно задевает ближайший пиксель
+MIN_CIRCLE_EXTENT = 0.7072
+
+
+def _expand(counts):
+    """Для отрезков длины counts: номер отрезка и смещение внутри него для каждого элемента"""
+    starts = np.cumsum(counts) - counts
+    owner = np.repeat(np.arange(len(counts)), counts)
+    return owner, np.arange(len(owner)) - starts[owner]
+
+
+def _spans(x, y, extent, shape, width, height):
+    """
+    Пиксели, которые закрашивают точки: индексы точек и плоские индексы
+    пикселей. Для каждой строки пикселей точки сразу считается отрезок
+    закрашенных столбцов, поэтому работа пропорциональна числу
+    закрашенных пикселей, а не числу точек.
+    """
+    top = np.ceil(y - extent - 0.5).astype(np.intp)
+    np.maximum(top, 0, out=top)
+    bottom = np.floor(y + extent - 0.5).astype(np.intp)
+    np.minimum(bottom, height - 1, out=bottom)
+    point, row = _expand(np.maximum(bottom - top + 1, 0))
+    row += top[point]
+
+    half = extent[point]
+    if shape == CIRCLE:
+        dy = row + 0.5 - y[point]
+        half *= half
+        half -= dy * dy
+        np.maximum(half, 0, out=half)
+        np.sqrt(half, out=half)
+    center = x[point] - 0.5
+    start = np.ceil(center - half).astype(np.intp)
+    np.maximum(start, 0, out=start)
+    length = np.floor(center + half).astype(np.intp)
+    np.minimum(length, width - 1, out=length)
+    length -= start - 1
+    np.maximum(length, 0, out=length)
+
+    segment, offset = _expand(length)
+    row *= width
+    row += start
+    return point[segment], row[segment] + offset
+
+
+def _coverage(x, y, extent, shape, supersample, width, height):
+    """
+    Как _spans, но с покрытием 0-1 по supersample x supersample
+    подвыборкам пикселя: для каждой подстроки считается отрезок
+    попавших в точку подвыборок.
+    """
+    # Центры подвыборок внутри пикселя относительно его центра
+    subsamples = (np.arange(supersample) + 0.5) / supersample - 0.5
+    pad = subsamples[-1]
+    top = np.maximum(np.ceil(y - extent - 0.5 - pad).astype(np.intp), 0)
+    bottom = np.minimum(np.floor(y + extent - 0.5 + pad).astype(np.intp), height - 1)
+    point, row = _expand(np.maximum(bottom - top + 1, 0))
+    row += top[point]
+
+    # Подстроки (подвыборка, пара точка-строка) и отрезки подвыборок в них
+    dy = row + 0.5 + subsamples[:, None] - y[point]
+    limit = extent[point]
+    if shape == CIRCLE:
+        square = limit * limit - dy * dy
+        inside = square >= 0
+        half = np.sqrt(np.maximum(square, 0)) * supersample
+    else:
+        inside = np.abs(dy) <= limit
+        half = np.broadcast_to(limit * supersample, dy.shape)
+    center = x[point] * supersample - 0.5
+    start = np.maximum(np.ceil(center - half).astype(np.intp), 0)
+    stop = np.minimum(np.floor(center + half).astype(np.intp), width * supersample - 1)
+    start[~inside] = width * supersample
+    stop[~inside] = -1
+
+    first = np.minimum.reduce(start) // supersample
+    last = np.maximum.reduce(stop) // supersample
+    segment, offset = _expand(np.maximum(last - first + 1, 0))
+    col = first[segment] + offset
+    ids = point[segment]
+    pixels = row[segment] * width + col
+
+    # Сколько подвыборок каждой подстроки попало в столбец пикселя
+    low = col * supersample
+    high = low + supersample - 1
+    count = np.zeros(len(col), dtype=np.intp)
+    for sub_start, sub_stop in zip(start, stop):
+        count += np.maximum(np.minimum(sub_stop[segment], high) - np.maximum(sub_start[segment], low) + 1, 0)
+    hit = count > 0
+    return ids[hit], pixels[hit], count[hit] / (supersample * supersample)
+
+
+def splat(frame, x, y, radius, colors, shape=CIRCLE, blend=BLEND_OVER, supersample=1):
+    """
+    Рисует точки в кадр frame (height, width, 3) uint8 на месте.
+    x, y, radius - массивы (или числа) одной длины; colors - один цвет
+    (r, g, b) или массив (n, 3). При BLEND_OVER точки ложатся в порядке
+    массивов: последняя - сверху.
+    """
+    if not frame.flags.c_contiguous:
+        raise ValueError('Кадр должен быть непрерывным массивом (h, w, 3)')
+    if blend not in (BLEND_OVER, BLEND_ADD, BLEND_MAX):
+        raise ValueError(f"Неизвестный режим смешивания: {blend}")
+    height, width = frame.shape[:2]
+    x, y, radius = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(y, dtype=float),
+                                       np.asarray(radius, dtype=float))
+    x, y, radius = x.ravel(), y.ravel(), radius.ravel()
+    if not len(x):
+        return frame
+    colors = np.broadcast_to(np.asarray(colors, dtype=float), (len(x), 3))
+
+    extent = radius + 0.5
+    if shape == CIRCLE:
+        extent = np.maximum(extent, MIN_CIRCLE_EXTENT)
+    if supersample == 1:
+        ids, pixels = _spans(x, y, extent, shape, width, height)
+        cover = 1
+    else:
+        ids, pixels, cover = _coverage(x, y, extent, shape, supersample, width, height)
+    flat = frame.reshape(-1, 3)
+
+    if blend == BLEND_OVER:
+        # В каждом пикселе остаётся точка с наибольшим номером
+        topmost = np.full(width * height, -1, dtype=np.intp)
+        np.maximum.at(topmost, pixels, ids)
+        if supersample == 1:
+            # Пиксель кадра и цвет точки - по одному трёхбайтовому элементу
+            palette = np.ascontiguousarray(np.rint(colors), dtype=np.uint8).view('V3').ravel()
+            touched = np.flatnonzero(topmost >= 0)
+            frame.view('V3').ravel()[touched] = palette[topmost[touched]]
+        else:
+            winners = topmost[pixels] == ids
+            ids, pixels, alpha = ids[winners], pixels[winners], cover[winners, None]
+            flat[pixels] = flat[pixels] * (1 - alpha) + colors[ids] * alpha + 0.5
+    elif blend == BLEND_ADD:
+        total = flat.astype(float)
+        for channel in range(3):
+            total[:, channel] += np.bincount(pixels, colors[ids, channel] * cover, minlength=len(flat))
+        flat[:] = np.minimum(total + 0.5, 255)
+    else:
+        for channel in range(3):
+            brightest = np.zeros(len(flat))
+            np.maximum.at(brightest, pixels, colors[ids, channel] * cover)
+            np.maximum(flat[:, channel], brightest + 0.5, out=flat[:, channel], casting='unsafe')
+    return frame
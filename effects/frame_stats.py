@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Единая статистика кадров эффекта.
+
+FrameStats вызывается после вывода каждого кадра и раз в STATS_INTERVAL
+секунд отдаёт сводку: фактический FPS, перцентили времени кадра,
+время генерации и вывода кадра, пропущенные кадры, загрузку CPU и
+потребление памяти процессом.
+
+Пропущенными считаются кадры, на месте которых не успел выйти ни один
+кадр: интервал между кадрами в N бюджетов кадра даёт N - 1 пропуск.
+Бюджет берётся из часов кадров эффекта (frame_clock.py), а если их
+нет - медиана интервалов за последний период. Счётчики часов (целевой
+FPS, overrun, джиттер) добавляются в сводку.
+
+Если эффект генерирует кадры с опережением (frame_pipeline.py), время
+генерации берётся из потока-производителя, а в сводку добавляются
+глубина очереди кадров и число underrun.
+
+Перцентили считаются за последний период, а число и сумма интервалов,
+времени генерации и вывода (totals) копятся с запуска эффекта - из них
+/metrics строит _count и _sum сводок Prometheus.
+"""
+
+import os
+import time
+
+from frame_clock import active_clock
+from frame_pipeline import active_pipeline
+
+# Как часто отдаётся сводка (секунды)
+STATS_INTERVAL = 1.0
+
+QUANTILES = (50, 95, 99)
+
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = None
+
+
+def rss_bytes():
+    """Резидентная память текущего процесса (только Linux)"""
+    if _PAGE_SIZE is None:
+        return None
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def percentiles(values):
+    """Перцентили QUANTILES в миллисекундах по значениям в секундах"""
+    if not values:
+        return None
+    values = sorted(values)
+    last = len(values) - 1
+    return {
+        f'p{q}': round(values[min(last, int(round(last * q / 100)))] * 1000, 2)
+        for q in QUANTILES
+    }
+
+
+class FrameStats:
+    """
+    on_stats(stats) вызывается раз в interval секунд из того же потока,
+    что и frame(). clock и pipeline - часы и конвейер кадров эффекта;
+    если не заданы, используются созданные эффектом в этом процессе.
+    """
+
+    def __init__(self, on_stats, clock=None, interval=STATS_INTERVAL, pipeline=None):
+        self.on_stats = on_stats
+        self.clock = clock
+        self.pipeline = pipeline
+        self.interval = interval
+        self.frames = 0
+        self.dropped = 0
+        self._last = None
+        self._holds = 0
+        self._totals = {'frame': [0, 0.0], 'generate': [0, 0.0], 'push': [0, 0.0]}
+        self._reset(time.perf_counter())
+
+    def _reset(self, now):
+        self._since = now
+        self._cpu_since = time.process_time()
+        self._frame_times = []
+        self._generate_times = []
+        self._push_times = []
+        self._window_frames = 0
+
+    def frame(self, generate_s=None, push_s=None):
+        """Отметить выведенный кадр (с длительностью генерации и вывода, если известны)"""
+        now = time.perf_counter()
+        clock = self.clock or active_clock()
+        # Интервал, в который попала намеренная пауза (FrameClock.hold), не учитывается
+        holds = clock.holds if clock else 0
+        if self._last is not None and holds == self._holds:
+            self._frame_times.append(now - self._last)
+        self._holds = holds
+        self._last = now
+        self.frames += 1
+        self._window_frames += 1
+        if generate_s is not None:
+            self._generate_times.append(generate_s)
+        if push_s is not None:
+            self._push_times.append(push_s)
+
+        if now - self._since >= self.interval:
+            self.report(now)
+
+    def report(self, now=None):
+        now = time.perf_counter() if now is None else now
+        elapsed = now - self._since
+        if elapsed <= 0:
+            return
+
+        clock = self.clock or active_clock()
+        pipeline = self.pipeline or active_pipeline()
+        frame_times = self._frame_times
+        frame_ms = percentiles(frame_times)
+        budget = clock.interval if clock else (frame_ms and frame_ms['p50'] / 1000)
+        if budget:
+            self.dropped += sum(max(0, int(t / budget + 0.5) - 1) for t in frame_times)
+
+        generate_times = pipeline.take_generate_times() if pipeline else self._generate_times
+        self._accumulate('frame', frame_times)
+        self._accumulate('generate', generate_times)
+        self._accumulate('push', self._push_times)
+
+        stats = {
+            'fps': round(self._window_frames / elapsed, 1),
+            'frames': self.frames,
+            'dropped': self.dropped,
+            'frame_ms': frame_ms,
+            'generate_ms': percentiles(generate_times),
+            'push_ms': percentiles(self._push_times),
+            'totals': {name: {'count': count, 'sum': round(total, 6)}
+                       for name, (count, total) in self._totals.items() if count},
+            'cpu_percent': round((time.process_time() - self._cpu_since) / elapsed * 100, 1),
+            'rss_bytes': rss_bytes(),
+        }
+        if clock:
+            stats.update(clock.stats())
+        if pipeline:
+            stats.update(pipeline.stats())
+        self.on_stats(stats)
+        self._reset(now)
+
+    def _accumulate(self, name, times):
+        total = self._totals[name]
+        total[0] += len(times)
+        total[1] += sum(times)
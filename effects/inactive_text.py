@@ -1,21 +1,19 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 """
-Красивый вывод текста на LED панель 64x64 с эффектами
+Красивый вывод текста на LED панель с эффектами
 """
 
-import sys
 import time
 import argparse
-from RGBMatrixEmulator import RGBMatrix, RGBMatrixOptions
 from PIL import Image, ImageDraw, ImageFont
+from frame_clock import FrameClock
+from frame_output import FrameOutput
+from led_matrix import create_matrix, scale_factor
 
 # ========== НАСТРОЙКИ ==========
-MATRIX_ROWS = 64
-MATRIX_COLS = 64
-CHAIN_LENGTH = 1
-PARALLEL = 1
-HARDWARE_MAPPING = 'regular'
+# Размер шрифта по умолчанию для панели 64x64, на большом холсте он растёт
+FONT_SIZE = 10
 
 # Цветовые схемы
 COLOR_SCHEMES = {
@@ -63,8 +61,9 @@ class TextDisplay:
     
     def __init__(self, matrix, color_scheme='blue'):
         self.matrix = matrix
-        self.width = MATRIX_COLS
-        self.height = MATRIX_ROWS
+        self.output = FrameOutput(matrix)
+        self.width = matrix.width
+        self.height = matrix.height
         self.colors = COLOR_SCHEMES.get(color_scheme, COLOR_SCHEMES['blue'])
         
     def get_font(self, size=10):
@@ -129,7 +128,7 @@ class TextDisplay:
             y_offset += text_height + spacing
         
         # Отображаем на матрице
-        self.matrix.SetImage(image.convert("RGB"))
+        self.output.show(image)
         
         if duration > 0:
             time.sleep(duration)
@@ -156,6 +155,7 @@ class TextDisplay:
         y = (self.height - text_height) // 2
         
         # Начинаем справа от экрана и двигаем влево
+        clock = FrameClock(1.0 / speed)
         for x_pos in range(self.width, -text_width - 10, -1):
             image = Image.new("RGB", (self.width, self.height), 
                             self.colors['background'])
@@ -171,14 +171,14 @@ class TextDisplay:
             # Основной текст
             draw.text((x_pos, y), text, font=font, fill=self.colors['main'])
             
-            self.matrix.SetImage(image.convert("RGB"))
-            time.sleep(speed)
+            self.output.show(image)
+            clock.tick()
 
 
 def main():
     """Главная функция"""
     parser = argparse.ArgumentParser(
-        description='Отображение текста на LED матрице 64x64',
+        description='Отображение текста на LED матрице',
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 Примеры использования:
@@ -192,8 +192,8 @@ def main():
     parser.add_argument('text', type=str, help='Текст для отображения (используйте \\n для переноса строк)')
     parser.add_argument('-d', '--duration', type=float, default=0,
                        help='Время отображения в секундах (0 = бесконечно, по умолчанию: 0)')
-    parser.add_argument('-s', '--size', type=int, default=10,
-                       help='Размер шрифта (по умолчанию: 10)')
+    parser.add_argument('-s', '--size', type=int, default=round(FONT_SIZE * scale_factor()),
+                       help='Размер шрифта (по умолчанию: 10 на панели 64x64)')
     parser.add_argument('-c', '--color', choices=COLOR_SCHEMES.keys(), default='blue',
                        help='Цветовая схема (по умолчанию: blue)')
     parser.add_argument('--scroll', action='store_true',
@@ -204,19 +204,14 @@ def main():
                        help='Отключить эффект свечения')
     
     args = parser.parse_args()
+    if not args.speed > 0:
+        parser.error('--speed должна быть больше 0')
     
     # Обрабатываем escape-последовательности в тексте
     args.text = args.text.replace('\\n', '\n').replace('\\t', '\t')
     
-    # Инициализация матрицы
-    options = RGBMatrixOptions()
-    options.rows = MATRIX_ROWS
-    options.cols = MATRIX_COLS
-    options.chain_length = CHAIN_LENGTH
-    options.parallel = PARALLEL
-    options.hardware_mapping = HARDWARE_MAPPING
-    
-    matrix = RGBMatrix(options=options)
+    # Инициализация матрицы (секция hardware: в config.yaml)
+    matrix = create_matrix()
     display = TextDisplay(matrix, color_scheme=args.color)
     
     try:
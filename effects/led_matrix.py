@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Размер и создание LED матрицы по runtime-конфигурации.
+
+Панели можно собирать в стену: chain_length панелей в цепочке по
+горизонтали и parallel цепочек по вертикали. Размер холста эффекта:
+
+    width = cols * chain_length
+    height = rows * parallel
+
+Параметры берутся из секции hardware: файла config.yaml (путь можно
+переопределить переменной LED_CONFIG):
+
+    hardware:
+      rows: 64
+      cols: 64
+      chain_length: 2
+      parallel: 2
+
+Там же задаются параметры вывода, от которых зависят частота
+обновления панели и загрузка CPU (PERFORMANCE_OPTIONS): глубина цвета
+pwm_bits, длительность младшего бита pwm_lsb_nanoseconds, замедление
+GPIO gpio_slowdown, ограничение частоты limit_refresh_rate_hz и т. д.
+Незаданные параметры остаются значениями библиотеки по умолчанию.
+
+Эффект может переопределить любой параметр ключом hardware: в своей
+записи списка effects: (эффект определяется по имени файла):
+
+    effects:
+      - file: processing_wave
+        hardware:
+          pwm_bits: 7
+
+Backend матрицы выбирается переменной LED_BACKEND или ключом backend:
+секции hardware: (BACKENDS): rgbmatrix - настоящая панель, emulator -
+RGBMatrixEmulator, null - безголовая матрица в массивах numpy
+(null_matrix.py). По умолчанию - emulator на Windows и rgbmatrix на
+остальных системах; если rgbmatrix не установлен, а backend явно не
+задан, кадры уходят в null.
+
+Эффекты написаны под панель 64x64 (BASE_SIZE) и масштабируют геометрию
+через scale_factor() (размеры, радиусы, шрифты) и scaled_count()
+(число объектов растёт с площадью холста).
+"""
+
+import importlib
+import importlib.util
+import os
+import platform
+import sys
+from pathlib import Path
+
+import yaml
+
+CONFIG_FILE = Path(os.environ.get('LED_CONFIG', Path(__file__).resolve().parent.parent / 'config.yaml'))
+
+# Размер одной панели, под который написаны эффекты
+BASE_SIZE = 64
+
+# Имя backend -> модуль с классами RGBMatrix и RGBMatrixOptions
+BACKENDS = {
+    'rgbmatrix': 'rgbmatrix',
+    'emulator': 'RGBMatrixEmulator',
+    'null': 'null_matrix',
+}
+
+DEFAULT_HARDWARE = {
+    'backend': None,
+    'rows': 64,
+    'cols': 64,
+    'chain_length': 1,
+    'parallel': 1,
+    'hardware_mapping': 'adafruit-hat',
+}
+
+# Параметры RGBMatrixOptions, влияющие на частоту обновления и CPU
+PERFORMANCE_OPTIONS = (
+    'brightness',             # яркость, 1-100
+    'pwm_bits',               # глубина цвета, 1-11: меньше бит - выше частота
+    'pwm_lsb_nanoseconds',    # длительность младшего бита PWM
+    'pwm_dither_bits',        # временной дизеринг младших бит
+    'gpio_slowdown',          # замедление GPIO для быстрых Raspberry Pi
+    'limit_refresh_rate_hz',  # потолок частоты обновления (0 - без ограничения)
+    'show_refresh_rate',      # печатать частоту обновления в терминал
+    'scan_mode',              # 0 - прогрессивная развёртка, 1 - чересстрочная
+    'disable_hardware_pulsing',
+)
+
+_config = None
+_config_mtime = None
+
+
+def load_config():
+    """config.yaml целиком; перечитывается, если файл изменился"""
+    global _config, _config_mtime
+    try:
+        mtime = os.stat(CONFIG_FILE).st_mtime
+    except OSError:
+        mtime = None
+    if _config is None or mtime != _config_mtime:
+        config = {}
+        try:
+            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+                config = yaml.safe_load(f) or {}
+        except (OSError, yaml.YAMLError) as e:
+            print(f"Ошибка при загрузке конфигурации матрицы: {e}")
+        _config, _config_mtime = config, mtime
+    return _config
+
+
+def current_effect():
+    """Имя запущенного эффекта - имя файла скрипта без .py"""
+    return Path(sys.argv[0]).stem if sys.argv and sys.argv[0] else None
+
+
+def effect_config(effect=None):
+    """Запись эффекта effect (по умолчанию - текущего скрипта) из списка effects: или {}"""
+    effect = effect or current_effect()
+    for entry in load_config().get('effects') or []:
+        if isinstance(entry, dict) and entry.get('file') == effect:
+            return entry
+    return {}
+
+
+def hardware_config(effect=None):
+    """
+    Секция hardware: из config.yaml, дополненная значениями по умолчанию
+    и переопределениями эффекта effect (по умолчанию - текущего скрипта)
+    """
+    hardware = dict(DEFAULT_HARDWARE)
+    hardware.update(load_config().get('hardware') or {})
+    hardware.update(effect_config(effect).get('hardware') or {})
+    return hardware
+
+
+def backend_name(effect=None):
+    """Явно выбранный backend (LED_BACKEND или hardware: backend:) или None"""
+    name = os.environ.get('LED_BACKEND') or hardware_config(effect)['backend']
+    if name is not None and name not in BACKENDS:
+        raise ValueError(f"Неизвестный backend матрицы: {name} (доступны: {', '.join(BACKENDS)})")
+    return name
+
+
+def backend_module_name(effect=None):
+    """Имя модуля матрицы, которую создаст create_matrix()"""
+    name = backend_name(effect)
+    if name is not None:
+        return BACKENDS[name]
+    if platform.system() == "Windows":
+        return BACKENDS['emulator']
+    if importlib.util.find_spec(BACKENDS['rgbmatrix']) is None:
+        return BACKENDS['null']
+    return BACKENDS['rgbmatrix']
+
+
+def backend_module(effect=None):
+    """
+    Модуль матрицы. Класс берётся из модуля при каждом вызове: зигота
+    подменяет RGBMatrix в дочернем процессе уже после импорта модуля.
+    """
+    return importlib.import_module(backend_module_name(effect))
+
+
+def panel_size(effect=None):
+    """Размер холста (width, height) с учётом цепочки и параллельных панелей"""
+    hardware = hardware_config(effect)
+    return (hardware['cols'] * hardware['chain_length'],
+            hardware['rows'] * hardware['parallel'])
+
+
+def scale_factor():
+    """Во сколько раз холст больше панели 64x64 (по меньшей стороне)"""
+    return min(panel_size()) / BASE_SIZE
+
+
+def scaled_count(count):
+    """Число объектов для холста, пропорциональное его площади"""
+    width, height = panel_size()
+    return max(1, round(count * width * height / (BASE_SIZE * BASE_SIZE)))
+
+
+def matrix_options(effect=None):
+    """RGBMatrixOptions по секции hardware: (с переопределениями эффекта)"""
+    hardware = hardware_config(effect)
+    options = backend_module(effect).RGBMatrixOptions()
+    options.rows = hardware['rows']
+    options.cols = hardware['cols']
+    options.chain_length = hardware['chain_length']
+    options.parallel = hardware['parallel']
+    options.hardware_mapping = hardware['hardware_mapping']
+    for name in PERFORMANCE_OPTIONS:
+        if hardware.get(name) is not None:
+            setattr(options, name, hardware[name])
+    unknown = set(hardware) - set(DEFAULT_HARDWARE) - set(PERFORMANCE_OPTIONS)
+    if unknown:
+        print(f"Неизвестные параметры hardware: {', '.join(sorted(unknown))}")
+    # Матрицу создаёт и зигота (для плагинов); без этого rgbmatrix сбросит
+    # root, и эффекты, запущенные после неё, уже не смогут открыть GPIO
+    options.drop_privileges = False
+    return options
+
+
+def create_matrix(effect=None):
+    """Создаёт матрицу по секции hardware: config.yaml"""
+    module = backend_module(effect)
+    if module.__name__ == BACKENDS['null'] and backend_name(effect) is None:
+        print("rgbmatrix не установлен, кадры выводятся в null-матрицу (LED_BACKEND=null)")
+    return module.RGBMatrix(options=matrix_options(effect))
@@ -1,32 +1,17 @@
 #!/usr/bin/env python
-import time
 import random
 import math
-import platform
-
-if platform.system() == "Windows":
-    from RGBMatrixEmulator import RGBMatrix, RGBMatrixOptions
-    graphics = None  # если нужно
-else:
-    from rgbmatrix import RGBMatrix, RGBMatrixOptions, graphics
 from PIL import Image, ImageDraw
+from frame_clock import FrameClock
+from frame_output import FrameOutput
+from led_matrix import create_matrix, panel_size, scale_factor
 
 # ============ НАСТРОЙКИ МАТРИЦЫ ============
-MATRIX_WIDTH = 64
-MATRIX_HEIGHT = 64
-CHAIN_LENGTH = 1
-PARALLEL = 1
-HARDWARE_MAPPING = 'adafruit-hat'
-
-# Конфигурация для матрицы
-options = RGBMatrixOptions()
-options.rows = MATRIX_HEIGHT
-options.cols = MATRIX_WIDTH
-options.chain_length = CHAIN_LENGTH
-options.parallel = PARALLEL
-options.hardware_mapping = HARDWARE_MAPPING
-
-matrix = RGBMatrix(options=options)
+# Размер холста из секции hardware: config.yaml, эффекты рассчитаны на 64x64
+matrix = create_matrix()
+MATRIX_WIDTH, MATRIX_HEIGHT = panel_size()
+SCALE = scale_factor()
+LINE_WIDTH = max(1, round(SCALE))
 
 
 # ============================================
@@ -35,14 +20,14 @@ matrix = RGBMatrix(options=options)
 class RGBLinesEffect:
     def __init__(self):
         self.name = "RGB линии"
-        self.line_positions = [32.0, 32.0, 32.0]
+        self.line_positions = [MATRIX_HEIGHT / 2] * 3
         self.line_velocities = [0.0, 0.0, 0.0]
         self.target_velocities = [0.0, 0.0, 0.0]
         self.state = "starting"
         self.state_timer = 0
 
         # Рандомизация параметров
-        self.speed = random.uniform(0.3, 0.8)
+        self.speed = random.uniform(0.3, 0.8) * SCALE
         self.start_delay = random.uniform(1, 3)
         self.disperse_time = random.uniform(15, 25)
         self.return_time = random.uniform(2, 4)
@@ -89,11 +74,11 @@ class RGBLinesEffect:
 
         elif self.state == "returning":
             for i in range(len(self.line_positions)):
-                diff = 32 - self.line_positions[i]
+                diff = MATRIX_HEIGHT / 2 - self.line_positions[i]
                 if abs(diff) > 0.1:
                     self.line_positions[i] += diff * 0.1
                 else:
-                    self.line_positions[i] = 32
+                    self.line_positions[i] = MATRIX_HEIGHT / 2
 
         # Рисуем линии
         for y in range(MATRIX_HEIGHT):
@@ -101,7 +86,7 @@ class RGBLinesEffect:
                 r, g, b = 0, 0, 0
 
                 for i, (pos, color) in enumerate(zip(self.line_positions, self.line_colors)):
-                    if int(pos) <= y < int(pos) + 1:
+                    if int(pos) <= y < int(pos) + LINE_WIDTH:
                         r += color[0]
                         g += color[1]
                         b += color[2]
@@ -154,7 +139,7 @@ class RotatingLineEffect:
         x2 = MATRIX_WIDTH/2 + half_length * math.cos(angle_rad)
         y2 = MATRIX_HEIGHT/2 + half_length * math.sin(angle_rad)
 
-        draw.line([(x1, y1), (x2, y2)], fill=self.color, width=1)
+        draw.line([(x1, y1), (x2, y2)], fill=self.color, width=LINE_WIDTH)
 
         return image
 
@@ -164,9 +149,9 @@ class RotatingLineEffect:
 class ChangingSquareEffect:
     def __init__(self):
         self.name = "Меняющийся квадрат"
-        self.current_width = 64.0
+        self.current_width = float(MATRIX_WIDTH)
         self.current_height = 0.0
-        self.target_width = 64.0
+        self.target_width = float(MATRIX_WIDTH)
         self.target_height = 0.0
         self.change_counter = 0
         self.last_change_time = 0
@@ -186,10 +171,10 @@ class ChangingSquareEffect:
         change_dimension = random.choice(['width', 'height'])
 
         if change_dimension == 'width':
-            new_width = random.randint(10, 64)
+            new_width = random.randint(round(10 * SCALE), MATRIX_WIDTH)
             return new_width, self.target_height
         else:
-            new_height = random.randint(0, 50)
+            new_height = random.randint(0, MATRIX_HEIGHT * 50 // 64)
             return self.target_width, new_height
 
     def generate_frame(self):
@@ -225,9 +210,9 @@ class ChangingSquareEffect:
         y2 = y1 + self.current_height - 1
 
         if self.current_height > 1:
-            draw.rectangle([x1, y1, x2, y2], outline=self.color, width=1)
+            draw.rectangle([x1, y1, x2, y2], outline=self.color, width=LINE_WIDTH)
         else:
-            draw.line([(x1, MATRIX_HEIGHT // 2), (x2, MATRIX_HEIGHT // 2)], fill=self.color, width=1)
+            draw.line([(x1, MATRIX_HEIGHT // 2), (x2, MATRIX_HEIGHT // 2)], fill=self.color, width=LINE_WIDTH)
 
         return img
 
@@ -240,7 +225,7 @@ class ThreeSinesEffect:
         self.elapsed = 0
 
         # Рандомизация
-        self.sine_amplitude = random.randint(10, 15)
+        self.sine_amplitude = random.randint(10, 15) * SCALE
         self.sine_frequency = random.uniform(1.5, 2.5)
         self.sine_speed = random.uniform(1.5, 2.5)
         self.amplitude_rise_time = random.uniform(1.5, 2.5)
@@ -268,7 +253,7 @@ class ThreeSinesEffect:
             points.append((x, y))
 
         if len(points) > 1:
-            draw.line(points, fill=color, width=1)
+            draw.line(points, fill=color, width=LINE_WIDTH)
 
     def generate_frame(self):
         self.elapsed += 1.0 / 60
@@ -283,11 +268,11 @@ class ThreeSinesEffect:
 
         if self.elapsed < 3:
             # Одна линия
-            draw.line([(0, int(center_y)), (MATRIX_WIDTH - 1, int(center_y))], fill=(255, 255, 255), width=1)
+            draw.line([(0, int(center_y)), (MATRIX_WIDTH - 1, int(center_y))], fill=(255, 255, 255), width=LINE_WIDTH)
         elif self.elapsed < 4:
             # Разделение на 5 линий
             progress = (self.elapsed - 3) / 1.0
-            border_distance = self.sine_amplitude + 2
+            border_distance = self.sine_amplitude + 2 * SCALE
 
             target_positions = [
                 center_y - border_distance,
@@ -299,18 +284,18 @@ class ThreeSinesEffect:
 
             for target_y in target_positions:
                 current_y = center_y + (target_y - center_y) * progress
-                draw.line([(0, int(current_y)), (MATRIX_WIDTH - 1, int(current_y))], fill=(255, 255, 255), width=1)
+                draw.line([(0, int(current_y)), (MATRIX_WIDTH - 1, int(current_y))], fill=(255, 255, 255), width=LINE_WIDTH)
         elif self.elapsed < 4 + self.sine_duration:
             # Синусоиды
             sine_time = self.elapsed - 4
             time_offset = sine_time * self.sine_speed
             amplitude = self.calculate_amplitude(sine_time)
 
-            border_distance = amplitude + 2
+            border_distance = amplitude + 2 * SCALE
             upper_border_y = int(center_y - border_distance)
             lower_border_y = int(center_y + border_distance)
-            draw.line([(0, upper_border_y), (MATRIX_WIDTH - 1, upper_border_y)], fill=(255, 255, 255), width=1)
-            draw.line([(0, lower_border_y), (MATRIX_WIDTH - 1, lower_border_y)], fill=(255, 255, 255), width=1)
+            draw.line([(0, upper_border_y), (MATRIX_WIDTH - 1, upper_border_y)], fill=(255, 255, 255), width=LINE_WIDTH)
+            draw.line([(0, lower_border_y), (MATRIX_WIDTH - 1, lower_border_y)], fill=(255, 255, 255), width=LINE_WIDTH)
 
             phase_shift = 2 * math.pi / 3
             self.draw_sine_wave(draw, center_y, 0, amplitude, time_offset, self.color_sine_1)
@@ -319,7 +304,7 @@ class ThreeSinesEffect:
         else:
             # Возврат в линию
             progress = 1.0 - (self.elapsed - 4 - self.sine_duration) / 1.0
-            border_distance = self.sine_amplitude + 2
+            border_distance = self.sine_amplitude + 2 * SCALE
 
             positions = [
                 center_y - border_distance,
@@ -331,7 +316,7 @@ class ThreeSinesEffect:
 
             for pos_y in positions:
                 current_y = center_y + (pos_y - center_y) * progress
-                draw.line([(0, int(current_y)), (MATRIX_WIDTH - 1, int(current_y))], fill=(255, 255, 255), width=1)
+                draw.line([(0, int(current_y)), (MATRIX_WIDTH - 1, int(current_y))], fill=(255, 255, 255), width=LINE_WIDTH)
 
         return image
 
@@ -346,7 +331,8 @@ class GravityEffect:
         # Рандомизация
         self.spread_duration = random.uniform(18, 22)
         self.gather_duration = random.uniform(18, 22)
-        self.num_particles = 64
+        # Частица на каждый столбец: в конце они собираются в линию
+        self.num_particles = MATRIX_WIDTH
         self.gravity_strength = random.uniform(0.3, 0.7)
         self.damping = random.uniform(0.96, 0.99)
         self.spread_force = random.uniform(1.5, 2.5)
@@ -458,7 +444,7 @@ class OneSineEffect:
         self.static_duration = random.uniform(2, 4)
         self.increase_duration = random.uniform(18, 22)
         self.decrease_duration = random.uniform(18, 22)
-        self.max_amplitude = random.randint(20, 30)
+        self.max_amplitude = random.randint(20, 30) * SCALE
         self.max_frequency = random.uniform(3, 5)
         self.color = (random.randint(200, 255), random.randint(200, 255), random.randint(200, 255))
 
@@ -501,7 +487,7 @@ class OneSineEffect:
             y = max(0, min(MATRIX_HEIGHT - 1, y))
 
             if x > 0:
-                draw.line([(prev_x, prev_y), (x, y)], fill=self.color, width=1)
+                draw.line([(prev_x, prev_y), (x, y)], fill=self.color, width=LINE_WIDTH)
             else:
                 draw.point((x, int(y)), fill=self.color)
 
@@ -556,8 +542,8 @@ class EffectManager:
             print("=" * 50)
             print("Нажмите CTRL-C для остановки\n")
 
-            fps = 60
-            frame_delay = 1.0 / fps
+            clock = FrameClock(60)
+            output = FrameOutput(matrix, clock)
 
             while True:
                 effect = self.get_next_effect()
@@ -569,8 +555,8 @@ class EffectManager:
                         print(f"<<< Эффект '{effect.name}' завершен\n")
                         break
 
-                    matrix.SetImage(frame.convert("RGB"))
-                    time.sleep(frame_delay)
+                    output.show(frame)
+                    clock.tick()
 
         except KeyboardInterrupt:
             print("\n\nОстановка программы...")
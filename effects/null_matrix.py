@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Безголовый backend матрицы: тот же интерфейс, что у rgbmatrix, но кадры
+пишутся в массивы numpy (height, width, 3) uint8 вместо панели.
+
+Позволяет запускать и замерять эффекты на обычной Linux-машине без
+панели и эмулятора (LED_BACKEND=null, см. led_matrix.py):
+
+    matrix = create_matrix()
+    ...
+    matrix.pixels            # что сейчас "на панели"
+    matrix.frame_count       # сколько кадров показано
+    matrix.frames            # последние LED_NULL_RECORD кадров
+
+SwapOnVSync не ждёт обновления панели и меняет буферы местами без
+копирования, как настоящая матрица: возвращённый холст содержит
+предыдущий кадр. Копии кадров снимаются, только если включена запись
+(LED_NULL_RECORD > 0).
+"""
+
+import os
+from collections import deque
+
+import numpy as np
+
+# Сколько последних показанных кадров хранить (0 - не записывать)
+RECORD_FRAMES = int(os.environ.get('LED_NULL_RECORD', '0'))
+
+
+class RGBMatrixOptions:
+    """Параметры матрицы со значениями по умолчанию rpi-rgb-led-matrix"""
+
+    def __init__(self):
+        self.rows = 32
+        self.cols = 32
+        self.chain_length = 1
+        self.parallel = 1
+        self.hardware_mapping = 'regular'
+        self.brightness = 100
+        self.pwm_bits = 11
+        self.pwm_lsb_nanoseconds = 130
+        self.pwm_dither_bits = 0
+        self.gpio_slowdown = 1
+        self.limit_refresh_rate_hz = 0
+        self.show_refresh_rate = False
+        self.scan_mode = 0
+        self.disable_hardware_pulsing = False
+
+
+class FrameCanvas:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.pixels = np.zeros((height, width, 3), dtype=np.uint8)
+
+    def SetImage(self, image, offset_x=0, offset_y=0, unsafe=True):
+        """Копирует PIL.Image в буфер; части за пределами холста отбрасываются"""
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        frame = np.asarray(image)
+        x0, y0 = max(0, offset_x), max(0, offset_y)
+        x1 = min(self.width, offset_x + frame.shape[1])
+        y1 = min(self.height, offset_y + frame.shape[0])
+        if x0 < x1 and y0 < y1:
+            self.pixels[y0:y1, x0:x1] = frame[y0 - offset_y:y1 - offset_y, x0 - offset_x:x1 - offset_x]
+
+    def SetPixel(self, x, y, r, g, b):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.pixels[y, x] = (r, g, b)
+
+    def Clear(self):
+        self.pixels[:] = 0
+
+    def Fill(self, r, g, b):
+        self.pixels[:] = (r, g, b)
+
+
+class RGBMatrix(FrameCanvas):
+    """
+    Сама матрица - отображаемый холст. Показанным кадром считается
+    SetImage на матрице и каждая смена холстов SwapOnVSync.
+    """
+
+    def __init__(self, options=None):
+        self.options = options or RGBMatrixOptions()
+        super().__init__(self.options.cols * self.options.chain_length,
+                         self.options.rows * self.options.parallel)
+        self.brightness = self.options.brightness
+        self.frame_count = 0
+        self.frames = deque(maxlen=RECORD_FRAMES) if RECORD_FRAMES else None
+
+    def _record(self):
+        self.frame_count += 1
+        if self.frames is not None:
+            self.frames.append(self.pixels.copy())
+
+    def SetImage(self, image, offset_x=0, offset_y=0, unsafe=True):
+        super().SetImage(image, offset_x, offset_y, unsafe)
+        self._record()
+
+    def CreateFrameCanvas(self):
+        return FrameCanvas(self.width, self.height)
+
+    def SwapOnVSync(self, canvas, framerate_fraction=1):
+        """Показывает холст и возвращает бывший на панели"""
+        self.pixels, canvas.pixels = canvas.pixels, self.pixels
+        self._record()
+        return canvas
@@ -1,42 +1,40 @@
 #!/usr/bin/env python
 # НАЗВАНИЕ: Пересечение фигур
 # ОПИСАНИЕ: Движущиеся геометрические фигуры с подсветкой точек пересечения
-import time
 import math
 import random
-import platform
-
-if platform.system() == "Windows":
-    from RGBMatrixEmulator import RGBMatrix, RGBMatrixOptions
-    graphics = None  # если нужно
-else:
-    from rgbmatrix import RGBMatrix, RGBMatrixOptions, graphics
+import numpy as np
 from PIL import Image, ImageDraw
+from frame_clock import FrameClock
+from frame_output import FrameOutput
+from led_matrix import create_matrix, panel_size, scale_factor, scaled_count
 
 
 
 # ============= НАСТРОЙКИ =============
-# Параметры матрицы
-MATRIX_WIDTH = 64
-MATRIX_HEIGHT = 64
+# Параметры матрицы (секция hardware: в config.yaml)
+MATRIX_WIDTH, MATRIX_HEIGHT = panel_size()
+# Размеры ниже заданы для панели 64x64 и растут вместе с холстом
+SCALE = scale_factor()
+LINE_WIDTH = max(1, round(SCALE))
 
 # Параметры фигур
-NUM_SHAPES = 6  # Количество фигур
+NUM_SHAPES = scaled_count(6)  # Количество фигур
 SHAPE_TYPES = ["circle", "line", "rectangle", "square"]  # Типы фигур
-MIN_RADIUS = 5  # Минимальный радиус окружности
-MAX_RADIUS = 15  # Максимальный радиус окружности
-LINE_LENGTH_MIN = 10  # Минимальная длина линии
-LINE_LENGTH_MAX = 25  # Максимальная длина линии
-RECT_WIDTH_MIN = 8  # Минимальная ширина прямоугольника
-RECT_WIDTH_MAX = 20  # Максимальная ширина прямоугольника
-RECT_HEIGHT_MIN = 8  # Минимальная высота прямоугольника
-RECT_HEIGHT_MAX = 20  # Максимальная высота прямоугольника
-SQUARE_SIZE_MIN = 8  # Минимальный размер квадрата
-SQUARE_SIZE_MAX = 18  # Максимальный размер квадрата
+MIN_RADIUS = 5 * SCALE  # Минимальный радиус окружности
+MAX_RADIUS = 15 * SCALE  # Максимальный радиус окружности
+LINE_LENGTH_MIN = 10 * SCALE  # Минимальная длина линии
+LINE_LENGTH_MAX = 25 * SCALE  # Максимальная длина линии
+RECT_WIDTH_MIN = 8 * SCALE  # Минимальная ширина прямоугольника
+RECT_WIDTH_MAX = 20 * SCALE  # Максимальная ширина прямоугольника
+RECT_HEIGHT_MIN = 8 * SCALE  # Минимальная высота прямоугольника
+RECT_HEIGHT_MAX = 20 * SCALE  # Максимальная высота прямоугольника
+SQUARE_SIZE_MIN = 8 * SCALE  # Минимальный размер квадрата
+SQUARE_SIZE_MAX = 18 * SCALE  # Максимальный размер квадрата
 
 # Параметры движения
-SPEED_MIN = 0.3  # Минимальная скорость
-SPEED_MAX = 1.0  # Максимальная скорость
+SPEED_MIN = 0.3 * SCALE  # Минимальная скорость
+SPEED_MAX = 1.0 * SCALE  # Максимальная скорость
 FPS = 30  # Частота обновления кадров
 
 # Цвета
@@ -45,16 +43,7 @@ INTERSECTION_COLOR = (255, 0, 0)  # Красный цвет пересечени
 BACKGROUND_COLOR = (0, 0, 0)  # Черный фон
 # =====================================
 
-# Конфигурация для матрицы
-options = RGBMatrixOptions()
-options.rows = MATRIX_HEIGHT
-options.cols = MATRIX_WIDTH
-options.chain_length = 1
-options.parallel = 1
-# options.hardware_mapping = 'regular'
-options.hardware_mapping = 'adafruit-hat'
-
-matrix = RGBMatrix(options=options)
+matrix = create_matrix()
 
 class Shape:
     def __init__(self, shape_type):
@@ -168,25 +157,30 @@ class Shape:
                 points.append((self.x, self.y + self.size - t * self.size))
         return points
 
-def point_distance(p1, p2):
-    return math.sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2)
-
 def find_intersections(shapes):
     """Находит точки пересечения фигур"""
     intersections = []
-    threshold = 1.5  # Порог для определения пересечения
+    threshold = 1.5 * SCALE  # Порог для определения пересечения
+
+    # Точки и габариты каждой фигуры считаются один раз за кадр
+    points = [np.array(shape.get_points()) for shape in shapes]
+    bounds = [(*p.min(axis=0), *p.max(axis=0)) for p in points]
     
     for i in range(len(shapes)):
-        points_i = shapes[i].get_points()
+        points_i = points[i]
         for j in range(i + 1, len(shapes)):
-            points_j = shapes[j].get_points()
+            # Фигуры, чьи габариты не сближаются до порога, не пересекаются
+            if bounds[i][0] > bounds[j][2] + threshold or bounds[j][0] > bounds[i][2] + threshold or \
+               bounds[i][1] > bounds[j][3] + threshold or bounds[j][1] > bounds[i][3] + threshold:
+                continue
+            points_j = points[j]
             
-            # Проверяем близость точек между двумя фигурами
-            for pi in points_i:
-                for pj in points_j:
-                    if point_distance(pi, pj) < threshold:
-                        # Добавляем среднюю точку как пересечение
-                        intersections.append(((pi[0] + pj[0]) / 2, (pi[1] + pj[1]) / 2))
+            # Близость точек двух фигур - одной матрицей попарных расстояний
+            delta = points_i[:, None, :] - points_j[None, :, :]
+            close_i, close_j = np.nonzero((delta ** 2).sum(axis=2) < threshold ** 2)
+            # Средняя точка каждой близкой пары - пересечение
+            middle = (points_i[close_i] + points_j[close_j]) / 2
+            intersections.extend(map(tuple, middle.tolist()))
     
     return intersections
 
@@ -195,6 +189,8 @@ shapes = [Shape(random.choice(SHAPE_TYPES)) for _ in range(NUM_SHAPES)]
 
 try:
     print("Press CTRL-C to stop.")
+    clock = FrameClock(FPS)
+    output = FrameOutput(matrix, clock)
     while True:
         # Обновление позиций
         for shape in shapes:
@@ -211,32 +207,32 @@ try:
                 y1 = shape.y - shape.radius
                 x2 = shape.x + shape.radius
                 y2 = shape.y + shape.radius
-                draw.ellipse([x1, y1, x2, y2], outline=SHAPE_COLOR, width=1)
+                draw.ellipse([x1, y1, x2, y2], outline=SHAPE_COLOR, width=LINE_WIDTH)
             elif shape.type == "line":
                 x2 = shape.x + shape.x2_offset
                 y2 = shape.y + shape.y2_offset
-                draw.line([shape.x, shape.y, x2, y2], fill=SHAPE_COLOR, width=1)
+                draw.line([shape.x, shape.y, x2, y2], fill=SHAPE_COLOR, width=LINE_WIDTH)
             elif shape.type == "rectangle":
                 x1 = shape.x
                 y1 = shape.y
                 x2 = shape.x + shape.width
                 y2 = shape.y + shape.height
-                draw.rectangle([x1, y1, x2, y2], outline=SHAPE_COLOR, width=1)
+                draw.rectangle([x1, y1, x2, y2], outline=SHAPE_COLOR, width=LINE_WIDTH)
             elif shape.type == "square":
                 x1 = shape.x
                 y1 = shape.y
                 x2 = shape.x + shape.size
                 y2 = shape.y + shape.size
-                draw.rectangle([x1, y1, x2, y2], outline=SHAPE_COLOR, width=1)
+                draw.rectangle([x1, y1, x2, y2], outline=SHAPE_COLOR, width=LINE_WIDTH)
         
         # Поиск и отрисовка пересечений
         intersections = find_intersections(shapes)
         for ix, iy in intersections:
             # Рисуем точку пересечения (маленький круг)
-            draw.ellipse([ix-1, iy-1, ix+1, iy+1], fill=INTERSECTION_COLOR)
+            draw.ellipse([ix-SCALE, iy-SCALE, ix+SCALE, iy+SCALE], fill=INTERSECTION_COLOR)
         
-        matrix.SetImage(image.convert("RGB"))
-        time.sleep(1.0 / FPS)
+        output.show(image)
+        clock.tick()
         
 except KeyboardInterrupt:
     print("Exiting...")
\ No newline at end of file
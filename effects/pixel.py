@@ -1,28 +1,19 @@
 #!/usr/bin/env python
 # НАЗВАНИЕ: пиксельная матрица
 # ОПИСАНИЕ: сменяймые цвета
-import time
 import random
 import math
-import platform
-
-if platform.system() == "Windows":
-    from RGBMatrixEmulator import RGBMatrix, RGBMatrixOptions
-    graphics = None  # если нужно
-else:
-    from rgbmatrix import RGBMatrix, RGBMatrixOptions, graphics
-from PIL import Image, ImageDraw
+import numpy as np
+from frame_clock import FrameClock
+from frame_output import FrameOutput, PixelBuffer
+from frame_splat import SQUARE
+from led_matrix import create_matrix
 
 # ==================== НАСТРОЙКИ ====================
-# Настройки матрицы
-MATRIX_ROWS = 64
-MATRIX_COLS = 64
-MATRIX_CHAIN_LENGTH = 1
-MATRIX_PARALLEL = 1
-MATRIX_HARDWARE_MAPPING = 'adafruit-hat'
+# Размер матрицы задаётся секцией hardware: в config.yaml
 
 # Настройки анимации
-PIXEL_GAP = 6  # Расстояние между пикселями
+PIXEL_GAP = 6  # Расстояние между пикселями (число пикселей растёт с площадью холста)
 ANIMATION_SPEED = 0.15  # Скорость анимации (0.008-0.25)
 FPS = 60  # Кадров в секунду
 MAX_TICKER = 360  # Максимальное значение счётчика анимации
@@ -59,26 +50,6 @@ class Pixel:
         self.is_hidden = False
         self.is_flicking = False
     
-    def draw(self, draw_obj):
-        """Рисует пиксель на изображении"""
-        # Проверяем, что размер больше минимального порога
-        if self.size < 0.5:
-            return
-        
-        center_offset = self.max_size_available * 0.5 - self.size * 0.5
-        x1 = int(self.x + center_offset)
-        y1 = int(self.y + center_offset)
-        x2 = int(self.x + center_offset + self.size)
-        y2 = int(self.y + center_offset + self.size)
-        
-        # Убеждаемся, что x2 > x1 и y2 > y1
-        if x2 <= x1:
-            x2 = x1 + 1
-        if y2 <= y1:
-            y2 = y1 + 1
-        
-        draw_obj.rectangle([x1, y1, x2, y2], fill=self.color)
-    
     def show(self):
         """Показывает пиксель с анимацией появления"""
         self.is_hidden = False
@@ -135,6 +106,35 @@ class Pixel:
             self.size = self.min_size
 
 
+def pixel_layout(pixels):
+    """Неизменные параметры пикселей массивами: углы сетки, место под пиксель и цвета"""
+    x = np.array([p.x for p in pixels], dtype=float)
+    y = np.array([p.y for p in pixels], dtype=float)
+    available = np.array([p.max_size_available for p in pixels], dtype=float)
+    colors = np.array([p.color for p in pixels], dtype=np.uint8)
+    return x, y, available, colors
+
+
+def draw_pixels(frame, pixels, layout):
+    """
+    Рисует видимые пиксели квадратами одним вызовом splat. Пиксель
+    размера size стоит по центру своего места; рамка [x1, x2] округляется
+    до целых вниз и не уже одного пикселя.
+    """
+    x, y, available, colors = layout
+    size = np.fromiter((p.size for p in pixels), dtype=float, count=len(pixels))
+    # Проверяем, что размер больше минимального порога
+    visible = size >= 0.5
+    offset = available * 0.5 - size * 0.5
+    x1 = np.floor(x + offset)
+    y1 = np.floor(y + offset)
+    x2 = np.maximum(np.floor(x + offset + size), x1 + 1)
+    y2 = np.maximum(np.floor(y + offset + size), y1 + 1)
+    # Рамка [x1, x2] - квадрат с центром (x1 + x2 + 1) / 2 и половиной стороны (x2 - x1) / 2
+    frame.splat(((x1 + x2 + 1) / 2)[visible], ((y1 + y2 + 1) / 2)[visible],
+                ((x2 - x1) / 2)[visible], colors[visible], shape=SQUARE)
+
+
 def get_delay(x, y, width, height, direction=0):
     """Вычисляет задержку на основе расстояния от центра"""
     dx = x - width * 0.5
@@ -207,21 +207,14 @@ def hsl_to_rgb(h, s, l):
 
 
 def main():
-    # Конфигурация для матрицы
-    options = RGBMatrixOptions()
-    options.rows = MATRIX_ROWS
-    options.cols = MATRIX_COLS
-    options.chain_length = MATRIX_CHAIN_LENGTH
-    options.parallel = MATRIX_PARALLEL
-    options.hardware_mapping = MATRIX_HARDWARE_MAPPING
+    matrix = create_matrix()
     
-    matrix = RGBMatrix(options=options)
-    
-    width = MATRIX_COLS
-    height = MATRIX_ROWS
+    width = matrix.width
+    height = matrix.height
     
     # Инициализация пикселей
     pixels = init_pixels(width, height)
+    layout = pixel_layout(pixels)
     
     ticker = 0
     animation_direction = 1
@@ -229,12 +222,11 @@ def main():
     print("Press CTRL-C to stop.")
     print(f"Pixels initialized: {len(pixels)}")
     
+    clock = FrameClock(FPS)
+    output = FrameOutput(matrix, clock)
+    frame = PixelBuffer(width, height)
     try:
         while True:
-            # Создаём новый кадр
-            frame = Image.new("RGB", (width, height), (0, 0, 0))
-            draw = ImageDraw.Draw(frame)
-            
             # Управление направлением анимации
             if ticker >= MAX_TICKER:
                 animation_direction = -1
@@ -244,18 +236,21 @@ def main():
                 if all(p.is_hidden for p in pixels):
                     print("Reinitializing pixels with new colors...")
                     pixels = init_pixels(width, height)
+                    layout = pixel_layout(pixels)
             
             all_hidden = True
             
-            # Обновляем и рисуем каждый пиксель
+            # Обновляем каждый пиксель
             for pixel in pixels:
                 if animation_direction > 0:
                     pixel.show()
                 else:
                     pixel.hide()
                     all_hidden = all_hidden and pixel.is_hidden
-                
-                pixel.draw(draw)
+            
+            # Рисуем все пиксели разом
+            frame.fill()
+            draw_pixels(frame, pixels, layout)
             
             ticker += animation_direction
             
@@ -263,8 +258,8 @@ def main():
                 ticker = 0
             
             # Отображаем кадр на матрице
-            matrix.SetImage(frame.convert("RGB"))
-            time.sleep(1.0 / FPS)
+            output.show(frame.pixels)
+            clock.tick()
             
     except KeyboardInterrupt:
         print("\nExiting...")
@@ -2,32 +2,18 @@
 # НАЗВАНИЕ: Активные фигуры
 # ОПИСАНИЕ: Динамичные геометрические фигуры с плавными анимациями и трансформациями
 # https://openprocessing.org/sketch/2421742
-import time
 import random
 import math
-import platform
-
-if platform.system() == "Windows":
-    from RGBMatrixEmulator import RGBMatrix, RGBMatrixOptions
-    graphics = None  # если нужно
-else:
-    from rgbmatrix import RGBMatrix, RGBMatrixOptions, graphics
 from PIL import Image, ImageDraw
+from frame_clock import FrameClock
+from frame_output import FrameOutput
+from led_matrix import create_matrix, panel_size, scaled_count
 
-# Конфигурация для матрицы
-options = RGBMatrixOptions()
-options.rows = 64
-options.cols = 64
-options.chain_length = 1
-options.parallel = 1
-# options.hardware_mapping = 'regular'
-options.hardware_mapping = 'adafruit-hat'
-
-matrix = RGBMatrix(options=options)
+# Конфигурация для матрицы (секция hardware: в config.yaml)
+matrix = create_matrix()
 
 # Константы
-WIDTH = 64
-HEIGHT = 64
+WIDTH, HEIGHT = panel_size()
 COLORS = ['#f71735', '#f7d002', '#1A53C0', '#232323']
 
 # Глобальные переменные
@@ -71,7 +57,7 @@ class DynamicShape:
         self.action_points = self.max_action_points
         self.elapsed_t = 0
         self.size = 0
-        self.size_max = WIDTH * random.uniform(0.01, 0.05)
+        self.size_max = min(WIDTH, HEIGHT) * random.uniform(0.01, 0.05)
         self.from_size = 0
         self.is_dead = False
         self.clr = random.choice(COLORS)
@@ -178,7 +164,7 @@ def generate_frame():
     
     # Добавление новых объектов
     if frame_count % random.choice([15, 30]) == 0:
-        add_num = random.randint(1, 30)
+        add_num = random.randint(1, scaled_count(30))
         for _ in range(add_num):
             objs.append(DynamicShape())
     
@@ -196,10 +182,12 @@ try:
     # Добавляем первый объект
     objs.append(DynamicShape())
     
+    clock = FrameClock(30)
+    output = FrameOutput(matrix, clock)
     while True:
         frame = generate_frame()
-        matrix.SetImage(frame.convert("RGB"))
-        time.sleep(0.033)  # ~30 FPS
+        output.show(frame)
+        clock.tick()
         
 except KeyboardInterrupt:
     print("\nExiting...")
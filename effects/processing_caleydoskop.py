@@ -3,27 +3,14 @@
 # ОПИСАНИЕ: Психоделический калейдоскопический эффект с плавными цветовыми переходами
 import time
 import numpy as np
-import platform
+from frame_clock import FrameClock
+from frame_output import FrameOutput
+from led_matrix import create_matrix, panel_size
 
-if platform.system() == "Windows":
-    from RGBMatrixEmulator import RGBMatrix, RGBMatrixOptions
-    graphics = None  # если нужно
-else:
-    from rgbmatrix import RGBMatrix, RGBMatrixOptions, graphics
-from PIL import Image
+# Конфигурация (секция hardware: в config.yaml)
+matrix = create_matrix()
 
-# Конфигурация
-options = RGBMatrixOptions()
-options.rows = 64
-options.cols = 64
-options.chain_length = 1
-options.parallel = 1
-# options.hardware_mapping = 'regular'
-options.hardware_mapping = 'adafruit-hat'
-
-matrix = RGBMatrix(options=options)
-
-WIDTH, HEIGHT = 64, 64
+WIDTH, HEIGHT = panel_size()
 start_time = time.time()
 
 # Палитра
@@ -60,16 +47,17 @@ def generate_frame(current_time):
 
         final_color += col * d[..., np.newaxis]
 
-    final_color = np.clip(final_color * 255, 0, 255).astype(np.uint8)
-    return Image.fromarray(final_color, 'RGB')
+    return np.clip(final_color * 255, 0, 255).astype(np.uint8)
 
 # Основной цикл
 try:
-    print("Запуск анимации на LED панели 64x64... (CTRL-C для остановки)")
+    print(f"Запуск анимации на LED панели {WIDTH}x{HEIGHT}... (CTRL-C для остановки)")
+    clock = FrameClock(30)
+    output = FrameOutput(matrix, clock)
     while True:
         frame = generate_frame(time.time() - start_time)
-        matrix.SetImage(frame)
-        time.sleep(0.03)
+        output.show(frame)
+        clock.tick()
 except KeyboardInterrupt:
     print("\nОстановка анимации...")
     matrix.Clear()
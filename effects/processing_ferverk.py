@@ -3,29 +3,19 @@
 # ОПИСАНИЕ: Красочный анимированный фейерверк с частицами и искрами
 # https://openprocessing.org/sketch/2326097
 #!/usr/bin/env python3
-import time
 import random
 import math
-import platform
-
-if platform.system() == "Windows":
-    from RGBMatrixEmulator import RGBMatrix, RGBMatrixOptions
-    graphics = None  # если нужно
-else:
-    from rgbmatrix import RGBMatrix, RGBMatrixOptions, graphics
 from PIL import Image, ImageDraw
+from frame_clock import FrameClock
+from frame_output import FrameOutput
+from led_matrix import create_matrix, panel_size, scale_factor
 
 # -------------------------------------------------------------
-# Конфигурация для LED-матрицы 64x64
+# Конфигурация для LED-матрицы (секция hardware: в config.yaml)
 # -------------------------------------------------------------
-options = RGBMatrixOptions()
-options.rows = 64
-options.cols = 64
-options.chain_length = 1
-options.parallel = 1
-# options.hardware_mapping = 'regular'  # для эмулятора
-options.hardware_mapping = 'adafruit-hat'
-matrix = RGBMatrix(options=options)
+matrix = create_matrix()
+MATRIX_WIDTH, MATRIX_HEIGHT = panel_size()
+SCALE = scale_factor()
 
 # -------------------------------------------------------------
 # Цвета и утилиты
@@ -46,15 +36,15 @@ class Orb:
         self.x = x
         self.y = y
         self.radius = 0
-        self.max_radius = 5
+        self.max_radius = 5 * SCALE
         self.r_step = random.uniform(0.3, 1.0)
-        self.max_circle_d = 1.5
-        self.circle_d = 1.5
+        self.max_circle_d = 1.5 * SCALE
+        self.circle_d = 1.5 * SCALE
         self.is_dead = False
         self.ang = random.random() * math.pi * 2
         self.ang_step = random.choice([-1, 1]) * random.uniform(0.05, 0.3)
-        self.x_step = random.choice([-1, 1]) * random.uniform(0.05, 0.2)
-        self.y_step = random.choice([-1, 1]) * random.uniform(0.05, 0.2)
+        self.x_step = random.choice([-1, 1]) * random.uniform(0.05, 0.2) * SCALE
+        self.y_step = random.choice([-1, 1]) * random.uniform(0.05, 0.2) * SCALE
         self.life = 0
         self.life_span = random.randint(20, 80)
         self.col = random.choice(COLORS)
@@ -85,7 +75,7 @@ class Sparkle:
     def __init__(self, x, y):
         self.x0 = x
         self.y0 = y
-        self.r = random.uniform(5, 30)
+        self.r = random.uniform(5, 30) * SCALE
         self.a = random.random() * math.pi * 2
         self.x = x
         self.y = y
@@ -116,7 +106,7 @@ class Ripple:
         self.life = 0
         self.life_span = random.randint(30, 80)
         self.col = random.choice(COLORS)
-        self.max_d = random.uniform(10, 25)
+        self.max_d = random.uniform(10, 25) * SCALE
         self.is_dead = False
 
     def move(self):
@@ -138,11 +128,11 @@ class Shape:
         self.life = 0
         self.life_span = random.randint(30, 100)
         self.col = random.choice(COLORS)
-        self.size = random.uniform(3, 10)
+        self.size = random.uniform(3, 10) * SCALE
         self.ang = random.random() * math.pi * 2
         self.ang_step = random.choice([-1, 1]) * random.uniform(0.02, 0.1)
         self.shape_type = random.randint(0, 2)
-        self.r = random.uniform(5, 25)
+        self.r = random.uniform(5, 25) * SCALE
         self.a = random.random() * math.pi * 2
         self.target_x = x + self.r * math.cos(self.a)
         self.target_y = y + self.r * math.sin(self.a)
@@ -180,8 +170,8 @@ objects = []
 
 
 def add_objs():
-    x = random.uniform(0, 64)
-    y = random.uniform(0, 64)
+    x = random.uniform(0, MATRIX_WIDTH)
+    y = random.uniform(0, MATRIX_HEIGHT)
     for _ in range(5):
         objects.append(Orb(x, y))
     for _ in range(10):
@@ -198,8 +188,10 @@ def add_objs():
 try:
     print("Запуск анимации. Нажмите CTRL+C для выхода.")
     frame_count = 0
+    clock = FrameClock(20)  # скорость кадров
+    output = FrameOutput(matrix, clock)
     while True:
-        img = Image.new("RGB", (64, 64), (0, 0, 0))
+        img = Image.new("RGB", (MATRIX_WIDTH, MATRIX_HEIGHT), (0, 0, 0))
         draw = ImageDraw.Draw(img)
 
         for obj in list(objects):
@@ -212,9 +204,9 @@ try:
         if frame_count % random.choice([10, 30, 60]) == 0:
             add_objs()
 
-        matrix.SetImage(img)
+        output.show(img)
         frame_count += 1
-        time.sleep(0.05)  # скорость кадров (~20 FPS)
+        clock.tick()
 
 except KeyboardInterrupt:
     print("Выход...")
\ No newline at end of file
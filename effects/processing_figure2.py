@@ -2,27 +2,15 @@
 # НАЗВАНИЕ: Геометрия 2
 # ОПИСАНИЕ: Продвинутые геометрические паттерны с вращением, движением и трансформацией
 # https://openprocessing.org/sketch/2494961
-import time
 import math
-import platform
-
-if platform.system() == "Windows":
-    from RGBMatrixEmulator import RGBMatrix, RGBMatrixOptions
-    graphics = None  # если нужно
-else:
-    from rgbmatrix import RGBMatrix, RGBMatrixOptions, graphics
 from PIL import Image, ImageDraw
+from frame_clock import FrameClock
+from frame_output import FrameOutput
+from led_matrix import create_matrix, panel_size
 
-# Конфигурация для матрицы
-options = RGBMatrixOptions()
-options.rows = 64
-options.cols = 64
-options.chain_length = 1
-options.parallel = 1
-# options.hardware_mapping = 'regular'
-options.hardware_mapping = 'adafruit-hat'
-
-matrix = RGBMatrix(options=options)
+# Конфигурация для матрицы (секция hardware: в config.yaml)
+matrix = create_matrix()
+MATRIX_WIDTH, MATRIX_HEIGHT = panel_size()
 
 # Новые цвета
 colors = ['#083d77', '#da4167', '#ffd639', '#81cfe5', '#FBAF00', '#00AF54']
@@ -194,18 +182,19 @@ class Motion04(Motion):
         ], 180, 360, fill=self.clr2)
 
 # Инициализация анимаций
-side = 64 * 0.8  # 51.2
+side = min(MATRIX_WIDTH, MATRIX_HEIGHT) * 0.8  # 51.2 для 64x64
 graphic_size = side * 0.4  # ~20
+cx, cy = MATRIX_WIDTH / 2, MATRIX_HEIGHT / 2
 motions = [
-    Motion01(32 - side/4, 32 - side/4, graphic_size, colors[0], colors[1]),
-    Motion02(32 + side/4, 32 - side/4, graphic_size, colors[2], colors[3]),
-    Motion03(32 - side/4, 32 + side/4, graphic_size, colors[4], colors[5]),
-    Motion04(32 + side/4, 32 + side/4, graphic_size, colors[1], colors[3])
+    Motion01(cx - side/4, cy - side/4, graphic_size, colors[0], colors[1]),
+    Motion02(cx + side/4, cy - side/4, graphic_size, colors[2], colors[3]),
+    Motion03(cx - side/4, cy + side/4, graphic_size, colors[4], colors[5]),
+    Motion04(cx + side/4, cy + side/4, graphic_size, colors[1], colors[3])
 ]
 
 def generate_frame():
     """Генерация одного кадра анимации"""
-    img = Image.new('RGB', (64, 64), 'black')
+    img = Image.new('RGB', (MATRIX_WIDTH, MATRIX_HEIGHT), 'black')
     draw = ImageDraw.Draw(img)
     
     for motion in motions:
@@ -217,9 +206,11 @@ def generate_frame():
 # Основной цикл анимации
 try:
     print("Press CTRL-C to stop.")
+    clock = FrameClock(30)
+    output = FrameOutput(matrix, clock)
     while True:
         frame = generate_frame()
-        matrix.SetImage(frame.convert("RGB"))
-        time.sleep(0.03)  # ~30 FPS
+        output.show(frame)
+        clock.tick()
 except KeyboardInterrupt:
     print("Exiting...")
\ No newline at end of file
@@ -2,34 +2,29 @@
 # НАЗВАНИЕ: Гравитация кругов
 # ОПИСАНИЕ: Движущиеся цветные круги с взаимодействием и соединительными линиями
 # https://openprocessing.org/sketch/2642304
-import time
 import random
-import platform
-
-if platform.system() == "Windows":
-    from RGBMatrixEmulator import RGBMatrix, RGBMatrixOptions
-    graphics = None  # если нужно
-else:
-    from rgbmatrix import RGBMatrix, RGBMatrixOptions, graphics
 from PIL import Image, ImageDraw
+from frame_clock import FrameClock
+from frame_output import FrameOutput
+from led_matrix import create_matrix, panel_size, scale_factor, scaled_count
 
 import math
 # ==================== БЛОК НАСТРОЕК ====================
-# Настройки матрицы
-MATRIX_WIDTH = 64
-MATRIX_HEIGHT = 64
+# Настройки матрицы (размер панели - секция hardware: в config.yaml)
+MATRIX_WIDTH, MATRIX_HEIGHT = panel_size()
+SCALE = scale_factor()
 
 # Настройки анимации
-CIRCLE_COUNT = 20           # Количество кругов (рекомендуется 15-30)
-CIRCLE_SIZE_MIN = 0.02      # Минимальный размер круга (относительно ширины матрицы)
-CIRCLE_SIZE_MAX = 0.1      # Максимальный размер круга (относительно ширины матрицы)
-CIRCLE_SPEED_MIN = -0.3     # Минимальная скорость движения
-CIRCLE_SPEED_MAX = 0.3      # Максимальная скорость движения
+CIRCLE_COUNT = scaled_count(20)  # Количество кругов (15-30 на панель 64x64)
+CIRCLE_SIZE_MIN = 0.02      # Минимальный размер круга (относительно меньшей стороны матрицы)
+CIRCLE_SIZE_MAX = 0.1      # Максимальный размер круга (относительно меньшей стороны матрицы)
+CIRCLE_SPEED_MIN = -0.3 * SCALE  # Минимальная скорость движения
+CIRCLE_SPEED_MAX = 0.3 * SCALE   # Максимальная скорость движения
 
 # Настройки мостов между кругами
 DRAW_BRIDGES = True         # Рисовать ли мосты между кругами
-BRIDGE_THICKNESS = 2        # Толщина линии моста в пикселях (1-5)
-BRIDGE_MAX_DISTANCE = 30    # Максимальное расстояние для создания моста (в пикселях)
+BRIDGE_THICKNESS = max(1, round(2 * SCALE))  # Толщина линии моста в пикселях (1-5 на панель 64x64)
+BRIDGE_MAX_DISTANCE = 30 * SCALE  # Максимальное расстояние для создания моста (в пикселях)
 BRIDGE_MIN_DISTANCE = 0     # Минимальное расстояние для создания моста (в пикселях)
 BRIDGE_ZONE_RADIUS = 0.15   # Радиус зоны вокруг круга для создания мостов (относительно размера матрицы)
 
@@ -46,15 +41,7 @@ BACKGROUND_COLOR = "#000000"
 # ==================== КОНЕЦ БЛОКА НАСТРОЕК ====================
 
 # Конфигурация для матрицы
-options = RGBMatrixOptions()
-options.rows = MATRIX_HEIGHT
-options.cols = MATRIX_WIDTH
-options.chain_length = 1
-options.parallel = 1
-# options.hardware_mapping = 'regular'
-options.hardware_mapping = 'adafruit-hat'
-
-matrix = RGBMatrix(options=options)
+matrix = create_matrix()
 
 # Класс для движущихся кругов
 class Mover:
@@ -86,7 +73,7 @@ print(f"Инициализация {CIRCLE_COUNT} кругов...")
 for i in range(CIRCLE_COUNT):
     x = MATRIX_WIDTH * random.uniform(0.1, 0.9)
     y = MATRIX_HEIGHT * random.uniform(0.1, 0.9)
-    d = MATRIX_WIDTH * random.uniform(CIRCLE_SIZE_MIN, CIRCLE_SIZE_MAX)
+    d = min(MATRIX_WIDTH, MATRIX_HEIGHT) * random.uniform(CIRCLE_SIZE_MIN, CIRCLE_SIZE_MAX)
     clr = COLORS[i % len(COLORS)]
     circles.append(Mover(x, y, d, clr))
 
@@ -201,12 +188,13 @@ try:
     print(f"  - Мин. расстояние: {BRIDGE_MIN_DISTANCE} пикселей")
     print(f"  - Радиус зоны: {BRIDGE_ZONE_RADIUS} (относительно размера матрицы)")
     print("Press CTRL-C to stop.")
-    frame_delay = 1.0 / FPS
+    clock = FrameClock(FPS)
+    output = FrameOutput(matrix, clock)
     
     while True:
         frame = generate_frame()
-        matrix.SetImage(frame.convert("RGB"))
-        time.sleep(frame_delay)
+        output.show(frame)
+        clock.tick()
 except KeyboardInterrupt:
     print("\nExiting...")
     matrix.Clear()
\ No newline at end of file
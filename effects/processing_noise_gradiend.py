@@ -1,35 +1,25 @@
 #!/usr/bin/env python
 # НАЗВАНИЕ: Шумовой градиент
 # ОПИСАНИЕ: Органичные цветные блобы на основе Perlin noise с плавными RGB градиентами
-import time
 import math
 import random
-import platform
-
-if platform.system() == "Windows":
-    from RGBMatrixEmulator import RGBMatrix, RGBMatrixOptions
-    graphics = None  # если нужно
-else:
-    from rgbmatrix import RGBMatrix, RGBMatrixOptions, graphics
 from PIL import Image, ImageDraw
+from frame_clock import FrameClock
+from frame_output import FrameOutput
+from led_matrix import create_matrix, panel_size, scale_factor
 from noise import pnoise3
 
-# Конфигурация для матрицы
-options = RGBMatrixOptions()
-options.rows = 64
-options.cols = 64
-options.chain_length = 1
-options.parallel = 1
-# options.hardware_mapping = 'regular'
-options.hardware_mapping = 'adafruit-hat'
-
-matrix = RGBMatrix(options=options)
+# Конфигурация для матрицы (секция hardware: в config.yaml)
+matrix = create_matrix()
+MATRIX_WIDTH, MATRIX_HEIGHT = panel_size()
+SCALE = scale_factor()
 
 # Параметры анимации
 n = 40  # количество блобов (уменьшено для 64x64)
 radius = 0
-inter = 0.3  # разница между размерами блобов
-maxNoise = 15  # шум (адаптировано для меньшего размера)
+inter = 0.3 * SCALE  # разница между размерами блобов
+maxNoise = 15 * SCALE  # шум (адаптировано для меньшего размера)
+center_x, center_y = MATRIX_WIDTH / 2, MATRIX_HEIGHT / 2
 kMax = random.uniform(0.6, 1.0)
 step = 0.01
 frame_count = 0
@@ -63,7 +53,7 @@ def generate_frame():
     global frame_count
     
     # Создаём изображение
-    img = Image.new('RGB', (64, 64), (0, 0, 0))
+    img = Image.new('RGB', (MATRIX_WIDTH, MATRIX_HEIGHT), (0, 0, 0))
     draw = ImageDraw.Draw(img, 'RGBA')
     
     t = frame_count / 100.0
@@ -75,7 +65,7 @@ def generate_frame():
         noisiness = maxNoise * noise_prog(i / n)
         
         # Получаем точки блоба
-        points = blob_points(size, 32, 32, k, t - i * step, noisiness)
+        points = blob_points(size, center_x, center_y, k, t - i * step, noisiness)
         
         # Рисуем три блоба с разными цветами (RGB)
         if len(points) > 2:
@@ -83,11 +73,11 @@ def generate_frame():
             draw.polygon(points, fill=(255, 0, 0, alpha))
             
             # Зелёный канал (со смещением по времени)
-            points_g = blob_points(size, 32, 32, k, t - i * step + 1, noisiness)
+            points_g = blob_points(size, center_x, center_y, k, t - i * step + 1, noisiness)
             draw.polygon(points_g, fill=(0, 255, 0, alpha))
             
             # Синий канал (со смещением по времени)
-            points_b = blob_points(size, 32, 32, k, t - i * step + 2, noisiness)
+            points_b = blob_points(size, center_x, center_y, k, t - i * step + 2, noisiness)
             draw.polygon(points_b, fill=(0, 0, 255, alpha))
     
     frame_count += 1
@@ -96,10 +86,12 @@ def generate_frame():
 # Анимация
 try:
     print("Press CTRL-C to stop.")
+    clock = FrameClock(30)
+    output = FrameOutput(matrix, clock)
     while True:
         frame = generate_frame()
-        matrix.SetImage(frame.convert("RGB"))
-        time.sleep(0.033)  # ~30 FPS
+        output.show(frame)
+        clock.tick()
 except KeyboardInterrupt:
     print("Exiting...")
 finally:
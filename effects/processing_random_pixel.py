@@ -2,16 +2,11 @@
 # НАЗВАНИЕ: Случайные пиксели
 # ОПИСАНИЕ: Динамичная сетка из случайных цветных прямоугольников с плавной анимацией
 # https://openprocessing.org/sketch/2682890
-import time
 import math
-import platform
-
-if platform.system() == "Windows":
-    from RGBMatrixEmulator import RGBMatrix, RGBMatrixOptions
-    graphics = None  # если нужно
-else:
-    from rgbmatrix import RGBMatrix, RGBMatrixOptions, graphics
 from PIL import Image, ImageDraw
+from frame_clock import FrameClock
+from frame_output import FrameOutput
+from led_matrix import create_matrix, panel_size
 from opensimplex import OpenSimplex
 import numpy as np
 import random
@@ -19,17 +14,9 @@ import random
 
 
 # -------------------------------------------------------------
-# Конфигурация матрицы
+# Конфигурация матрицы (секция hardware: в config.yaml)
 # -------------------------------------------------------------
-options = RGBMatrixOptions()
-options.rows = 64
-options.cols = 64
-options.chain_length = 1
-options.parallel = 1
-# options.hardware_mapping = 'regular'
-options.hardware_mapping = 'adafruit-hat'
-
-matrix = RGBMatrix(options=options)
+matrix = create_matrix()
 
 # -------------------------------------------------------------
 # Цвета и настройки
@@ -39,7 +26,7 @@ COLORS = [
 ]
 BACKGROUND = "#000000"
 
-WIDTH, HEIGHT = 64, 64
+WIDTH, HEIGHT = panel_size()
 CENTER_X, CENTER_Y = WIDTH // 2, HEIGHT // 2
 
 
@@ -110,7 +97,7 @@ class MovingRect:
     def update(self):
         if 0 < self.timer < self.span:
             n = self.timer / (self.span - 1)
-            self.w = lerp(0, WIDTH, ease_in_out_expo(n))
+            self.w = lerp(0, max(WIDTH, HEIGHT), ease_in_out_expo(n))
         self.timer += 1
 
     def draw(self, draw: ImageDraw.ImageDraw):
@@ -135,15 +122,18 @@ def initialize():
     rects = []
     timer = 0
     random.shuffle(COLORS)
+    # 6 ячеек по меньшей стороне, по большей - сколько поместится
     cell_count = 6
-    grid_area = WIDTH * 0.8
-    cell_size = grid_area / cell_count
-    offset = (WIDTH - grid_area) / 2
-
-    for j in range(cell_count):
-        for i in range(cell_count):
-            x = i * cell_size + (cell_size / 2) + offset
-            y = j * cell_size + (cell_size / 2) + offset
+    cell_size = min(WIDTH, HEIGHT) * 0.8 / cell_count
+    cols = round(WIDTH * 0.8 / cell_size)
+    rows = round(HEIGHT * 0.8 / cell_size)
+    offset_x = (WIDTH - cols * cell_size) / 2
+    offset_y = (HEIGHT - rows * cell_size) / 2
+
+    for j in range(rows):
+        for i in range(cols):
+            x = i * cell_size + (cell_size / 2) + offset_x
+            y = j * cell_size + (cell_size / 2) + offset_y
             form(x, y, cell_size * 0.75)
 
 
@@ -199,9 +189,11 @@ if __name__ == "__main__":
     initialize()
     try:
         print("Press CTRL-C to stop.")
+        clock = FrameClock(20)
+        output = FrameOutput(matrix, clock)
         while True:
             frame = generate_frame()
-            matrix.SetImage(frame.convert("RGB"))
-            time.sleep(0.05)
+            output.show(frame)
+            clock.tick()
     except KeyboardInterrupt:
         print("\nExiting...")
@@ -2,28 +2,15 @@
 # НАЗВАНИЕ: Квадратный зверь
 # ОПИСАНИЕ: Динамические анимированные прямоугольники с плавными трансформациями
 # https://openprocessing.org/sketch/2343601
-import time
 import random
 import math
-import platform
-
-if platform.system() == "Windows":
-    from RGBMatrixEmulator import RGBMatrix, RGBMatrixOptions
-    graphics = None  # если нужно
-else:
-    from rgbmatrix import RGBMatrix, RGBMatrixOptions, graphics
 from PIL import Image, ImageDraw
+from frame_clock import FrameClock
+from frame_output import FrameOutput
+from led_matrix import create_matrix, panel_size
 
-# Конфигурация для матрицы
-options = RGBMatrixOptions()
-options.rows = 64
-options.cols = 64
-options.chain_length = 1
-options.parallel = 1
-# options.hardware_mapping = 'regular'
-options.hardware_mapping = 'adafruit-hat'
-
-matrix = RGBMatrix(options=options)
+# Конфигурация для матрицы (секция hardware: в config.yaml)
+matrix = create_matrix()
 
 # Функция плавности (easing)
 def ease_in_out_quint(x):
@@ -81,10 +68,10 @@ class SuperRect:
 
 # Инициализация
 colors = [(247, 23, 53), (9, 62, 128), (236, 195, 11), (255, 255, 255), (42, 189, 228)]
-rows = 3
-cols = 3
-width = 64
-height = 64
+width, height = panel_size()
+# 3 ячейки по меньшей стороне, по большей - сколько поместится
+rows = max(1, round(3 * height / min(width, height)))
+cols = max(1, round(3 * width / min(width, height)))
 grid_w = width * 0.9
 grid_h = height * 0.9
 cell_w = grid_w / cols
@@ -98,7 +85,7 @@ for i in range(cols):
     for j in range(rows):
         x = i * cell_w + cell_w / 2
         y = j * cell_h + cell_h / 2
-        rect_size = cell_w * 0.6
+        rect_size = min(cell_w, cell_h) * 0.6
         random.shuffle(colors)
         
         rects.append(SuperRect(x - (rect_size / 2), y - (rect_size / 2), 
@@ -172,10 +159,12 @@ def generate_frame(frame_count):
 try:
     print("Press CTRL-C to stop.")
     frame_count = 0
+    clock = FrameClock(30)
+    output = FrameOutput(matrix, clock)
     while True:
         frame = generate_frame(frame_count)
-        matrix.SetImage(frame.convert("RGB"))
-        time.sleep(0.033)  # ~30 FPS
+        output.show(frame)
+        clock.tick()
         frame_count += 1
 except KeyboardInterrupt:
     print("Exiting...")
\ No newline at end of file
@@ -2,33 +2,20 @@
 # НАЗВАНИЕ: Трансформация квадратов
 # ОПИСАНИЕ: Рекурсивное деление прямоугольников с плавными переходами между состояниями
 # https://openprocessing.org/sketch/1964607
-import time
 import math
 import random
-import platform
-
-if platform.system() == "Windows":
-    from RGBMatrixEmulator import RGBMatrix, RGBMatrixOptions
-    graphics = None  # если нужно
-else:
-    from rgbmatrix import RGBMatrix, RGBMatrixOptions, graphics
 from PIL import Image, ImageDraw
+from frame_clock import FrameClock
+from frame_output import FrameOutput
+from led_matrix import create_matrix, panel_size, scale_factor
 
 
-# Конфигурация для матрицы
-options = RGBMatrixOptions()
-options.rows = 64
-options.cols = 64
-options.chain_length = 1
-options.parallel = 1
-# options.hardware_mapping = 'regular'
-options.hardware_mapping = 'adafruit-hat'
-
-matrix = RGBMatrix(options=options)
+# Конфигурация для матрицы (секция hardware: в config.yaml)
+matrix = create_matrix()
 
 # Глобальные переменные
-WIDTH = 64
-HEIGHT = 64
+WIDTH, HEIGHT = panel_size()
+SCALE = scale_factor()
 objs = []
 colors = ['#DE183C', '#F2B541', '#0C79BB', '#ec4e20', '#00916e', '#f654a9']
 arr1 = []
@@ -142,7 +129,7 @@ def setup():
         pos1 = Vector2(s1['x'], s1['y'])
         pos2 = Vector2(s2['x'], s2['y'])
         dst = math.sqrt((WIDTH / 2 - pos1.x)**2 + (HEIGHT / 2 - pos1.y)**2)
-        objs.append(Obj(pos1, s1['w'], s1['h'], pos2, s2['w'], s2['h'], int(dst / 10)))
+        objs.append(Obj(pos1, s1['w'], s1['h'], pos2, s2['w'], s2['h'], int(dst / (10 * SCALE))))
 
 def generate_frame():
     """Генерация одного кадра анимации"""
@@ -165,10 +152,12 @@ try:
     setup()
     print("Запуск анимации. Нажмите CTRL-C для остановки.")
     
+    clock = FrameClock(30)
+    output = FrameOutput(matrix, clock)
     while True:
         frame = generate_frame()
-        matrix.SetImage(frame.convert("RGB"))
-        time.sleep(0.033)  # ~30 FPS
+        output.show(frame)
+        clock.tick()
         
 except KeyboardInterrupt:
     print("\nОстановка анимации...")
@@ -1,14 +1,11 @@
 #!/usr/bin/env python
-import time
+import os
 import random
-import platform
-
-if platform.system() == "Windows":
-    from RGBMatrixEmulator import RGBMatrix, RGBMatrixOptions
-    graphics = None  # если нужно
-else:
-    from rgbmatrix import RGBMatrix, RGBMatrixOptions, graphics
 from PIL import Image, ImageDraw, ImageFilter
+from frame_clock import FrameClock
+from frame_output import FrameOutput
+from led_matrix import create_matrix, panel_size, scale_factor, scaled_count
+from frame_pipeline import FramePipeline
 try:
     from noise import pnoise3
 except ImportError:
@@ -20,17 +17,15 @@ except ImportError:
 # ============================================
 # НАСТРОЙКИ
 # ============================================
-# Настройки матрицы
-MATRIX_WIDTH = 64
-MATRIX_HEIGHT = 64
-MATRIX_CHAIN_LENGTH = 1
-MATRIX_PARALLEL = 1
-MATRIX_HARDWARE_MAPPING = 'adafruit-hat'
+# Настройки матрицы (секция hardware: в config.yaml)
+MATRIX_WIDTH, MATRIX_HEIGHT = panel_size()
+SCALE = scale_factor()
 
 # Настройки анимации
-OBJECTS_NUM = 25  # Количество линий
+OBJECTS_NUM = scaled_count(25)  # Количество линий (25 на панель 64x64)
 FRAME_RATE = 60  # FPS
-FRAME_DELAY = 1.0 / FRAME_RATE
+# Кадров генерируется наперёд в отдельном потоке; по умолчанию 0 - без опережения
+PIPELINE_DEPTH = int(os.environ.get('LED_WAVE_PIPELINE_DEPTH', '0'))
 
 # Палитра цветов
 PALETTE = [
@@ -47,8 +42,8 @@ BACKGROUND_COLOR = "#000000"
 
 # Параметры линий
 RANGE_X_OPTIONS = [5, 5, 5, 5, 5, 5, 10, 10, 10, 20, 20, 30, 30, 30, 30, 40, 50]
-LINE_WIDTH_MIN = 1  # Увеличено для объема
-LINE_WIDTH_MAX = 3  # Увеличено для объема
+LINE_WIDTH_MIN = 1 * SCALE  # Увеличено для объема
+LINE_WIDTH_MAX = 3 * SCALE  # Увеличено для объема
 BASE_ALPHA = 80  # Базовая прозрачность (ниже = прозрачнее)
 ALPHA_SHORT_LINES = 50  # Прозрачность для коротких линий
 GLOW_LAYERS = 3  # Количество слоев свечения для объема
@@ -57,14 +52,7 @@ OUT_PROBABILITY = 10
 # ============================================
 # ИНИЦИАЛИЗАЦИЯ МАТРИЦЫ
 # ============================================
-options = RGBMatrixOptions()
-options.rows = MATRIX_HEIGHT
-options.cols = MATRIX_WIDTH
-options.chain_length = MATRIX_CHAIN_LENGTH
-options.parallel = MATRIX_PARALLEL
-options.hardware_mapping = MATRIX_HARDWARE_MAPPING
-
-matrix = RGBMatrix(options=options)
+matrix = create_matrix()
 
 # ============================================
 # ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ
@@ -91,13 +79,13 @@ class Obj:
     
     def init(self):
         """Инициализация параметров линии"""
-        self.range_x = random.choice(RANGE_X_OPTIONS)
-        self.step = map_value(self.range_x, 5, 50, 2, 10)
+        self.range_x = random.choice(RANGE_X_OPTIONS) * SCALE
+        self.step = map_value(self.range_x, 5 * SCALE, 50 * SCALE, 2 * SCALE, 10 * SCALE)
         self.str_weight = random.uniform(LINE_WIDTH_MIN, LINE_WIDTH_MAX)
         self.color = hex_to_rgb(random.choice(PALETTE))
         
         # Альфа канал для коротких линий - больше прозрачности
-        if self.range_x < 30:
+        if self.range_x < 30 * SCALE:
             self.alpha = ALPHA_SHORT_LINES
         else:
             self.alpha = BASE_ALPHA
@@ -124,7 +112,7 @@ class Obj:
                 # Perlin noise для волнообразного движения
                 noise_scale = 0.025 if self.is_out else 0.005
                 noise_val = pnoise3(
-                    x * 0.05,
+                    x * 0.05 / SCALE,
                     self.index * noise_scale,
                     frame_count * 0.01,
                     octaves=2
@@ -201,30 +189,42 @@ def main():
         objs.append(Obj(i))
     
     frame_count = 0
+    clock = FrameClock(FRAME_RATE)
+    output = FrameOutput(matrix, clock)
+
+    def render(t=None, dt=None):
+        nonlocal frame_count
+        # Двигаем все объекты
+        for obj in objs:
+            obj.move()
+
+        # Генерируем кадр
+        frame = generate_frame(objs, frame_count)
+
+        # Обновляем счетчик кадров
+        frame_count += 1
+        return frame
+
+    # Медленный кадр (слои и GaussianBlur) не даёт рывка, пока в очереди есть готовые
+    pipeline = FramePipeline(render, clock.fps, PIPELINE_DEPTH).start() if PIPELINE_DEPTH else None
     
     try:
         print(f"Starting animation on {MATRIX_WIDTH}x{MATRIX_HEIGHT} LED matrix")
         print("Press CTRL-C to stop.")
         
         while True:
-            # Двигаем все объекты
-            for obj in objs:
-                obj.move()
-            
-            # Генерируем кадр
-            frame = generate_frame(objs, frame_count)
+            frame = pipeline.get() if pipeline else render()
             
             # Отображаем на матрице
-            matrix.SetImage(frame)
-            
-            # Обновляем счетчик кадров
-            frame_count += 1
+            output.show(frame)
             
-            # Задержка для соблюдения FPS
-            time.sleep(FRAME_DELAY)
+            # Ожидание следующего кадра
+            clock.tick()
             
     except KeyboardInterrupt:
         print("\nExiting...")
+        if pipeline:
+            pipeline.stop()
         matrix.Clear()
 
 if __name__ == "__main__":
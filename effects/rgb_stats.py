@@ -1,106 +1,107 @@
 # НАЗВАНИЕ: Звездопад
 # ОПИСАНИЕ: звездопад
-import platform
-
-if platform.system() == "Windows":
-    from RGBMatrixEmulator import RGBMatrix, RGBMatrixOptions
-    graphics = None  # если нужно
-else:
-    from rgbmatrix import RGBMatrix, RGBMatrixOptions, graphics
-from time import sleep
 import random
 import colorsys
+import numpy as np
+from frame_clock import FrameClock
+from frame_output import FrameOutput, PixelBuffer
+from led_matrix import create_matrix, panel_size, scale_factor, scaled_count
 
 
-maxdrops = 300
+# Размер панели - секция hardware: в config.yaml
+MATRIX_WIDTH, MATRIX_HEIGHT = panel_size()
+SCALE = scale_factor()
 
+# 300 капель на панель 64x64
+maxdrops = scaled_count(300)
 
-
-options = RGBMatrixOptions()
-options.hardware_mapping = 'adafruit-hat'
-options.rows = 64
-options.cols = 64
-options.brightness = 100
-
-# options = RGBMatrixOptions()
-# options.rows = 64
-# options.cols = 64
-# options.chain_length = 1
-# options.parallel = 1
-# options.hardware_mapping = 'regular'  # If you have an Adafruit HAT: 'adafruit-hat'
+# Капля догорает за краем панели, на удвоенной ширине
+MAX_X = MATRIX_WIDTH * 2 - 1
 
 
 mode = 1
 
-class Drop:
-    def __init__(self):
-        global mode
-        self.x = 0
-        self.y = random.randint(0, options.rows -1)
-        self.r = self.b = self.g = 0
-        self.generateColor()
-        self.speed = 1 + (random.random() * 4)
-        self.strength = random.randint(40, 100)/100.0
-    def generateColor(self):
-        (r, g, b) = colorsys.hsv_to_rgb(random.random(), 1, 1)
-        if (mode == 0):
-            (r, g, b) = colorsys.hsv_to_rgb((self.y / 31.0), 1, 1)
-        #mode == 2 leaves it at hsv
-        self.r = int(r * 255)
-        self.g = int(g * 255)
-        self.b = int(b * 255)
-
-        if (mode == 1):
-            self.r = random.randint(0, 255)
-            self.g = random.randint(0, 255)
-            self.b = random.randint(0, 255)
-        self.altr = int(r * 255)
-        self.altg = int(g * 255)
-        self.altb = int(b * 255)
-        if (random.random() > .01 and mode == 3):
-            self.r = self.g = self.b = random.randint(0, 255)
-
-    def tick(self):
-        self.erase()
-        self.x += (self.speed / 2.0)
-        if self.x > 127:
-            self.x = 127
-            self.strength = 0
-        self.strength = self.strength * .977
-        if (self.strength < 0):
-            self.strength = 0
-        self.draw()
-    def draw(self):
-        matrix.SetPixel(self.x, self.y, self.b*(self.strength), self.g*(self.strength), self.r*(self.strength))
-        if (random.random() < .001):
-            matrix.SetPixel(self.x, self.y, self.altb, self.altg, self.altr)
-
-    def erase(self):
-        matrix.SetPixel(self.x, self.y, 0, 0, 0)
-
-
-
-
-matrix = RGBMatrix(options = options)
+BLACK = (0, 0, 0)
+
+
+def generate_color(y):
+    """Цвет капли и редкий цвет вспышки в зависимости от режима"""
+    (r, g, b) = colorsys.hsv_to_rgb(random.random(), 1, 1)
+    if (mode == 0):
+        (r, g, b) = colorsys.hsv_to_rgb((y / (MATRIX_HEIGHT / 2 - 1)), 1, 1)
+    #mode == 2 leaves it at hsv
+    color = (int(r * 255), int(g * 255), int(b * 255))
+
+    if (mode == 1):
+        color = (random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
+    alt = (int(r * 255), int(g * 255), int(b * 255))
+    if (random.random() > .01 and mode == 3):
+        color = (random.randint(0, 255),) * 3
+    # Каналы выводятся в порядке b, g, r, как в исходном SetPixel(x, y, b, g, r)
+    return color[::-1], alt[::-1]
+
+
+class Drops:
+    """
+    Все капли в массивах numpy: за тик стираются, сдвигаются и рисуются
+    разом (PixelBuffer.set_pixels), а не SetPixel на каждую каплю.
+    """
+
+    def __init__(self, count):
+        self.x = np.zeros(count)
+        self.y = np.zeros(count, dtype=int)
+        self.color = np.zeros((count, 3))
+        self.alt = np.zeros((count, 3))
+        self.speed = np.zeros(count)
+        self.strength = np.zeros(count)
+        self.respawn(np.arange(count))
+
+    def respawn(self, index):
+        """Новые капли на месте отработавших"""
+        for i in index:
+            self.x[i] = 0
+            self.y[i] = random.randint(0, MATRIX_HEIGHT - 1)
+            self.color[i], self.alt[i] = generate_color(self.y[i])
+            self.speed[i] = (1 + (random.random() * 4)) * SCALE
+            self.strength[i] = random.randint(40, 100) / 100.0
+
+    def tick(self, pixels):
+        pixels.set_pixels(self.x, self.y, BLACK)
+        self.x += self.speed / 2.0
+        ended = self.x > MAX_X
+        self.x[ended] = MAX_X
+        self.strength[ended] = 0
+        self.strength *= .977
+
+        colors = self.color * self.strength[:, None]
+        flash = np.random.random(len(self.x)) < .001
+        colors[flash] = self.alt[flash]
+        pixels.set_pixels(self.x, self.y, colors)
+
+        dead = np.flatnonzero(self.strength == 0)
+        if dead.size:
+            pixels.set_pixels(self.x[dead], self.y[dead], BLACK)
+            self.respawn(dead)
+
+
+matrix = create_matrix()
 print ("Matrix initialized\n")
 
 
-drops = []
-for k in range (0, maxdrops):
-    drops.append(Drop())
+drops = Drops(maxdrops)
 
 modeTicks = 1000
+clock = FrameClock(100)
+output = FrameOutput(matrix, clock)
+pixels = PixelBuffer(matrix.width, matrix.height)
 while (True):
     # global mode, modeTicks
-    for j in range(0, len(drops)):
-        drops[j].tick()
-        if drops[j].strength == 0:
-           drops[j].erase()
-           drops[j] = Drop()
+    drops.tick(pixels)
+    output.show(pixels.pixels)
 
-    sleep(.01)
+    clock.tick()
     modeTicks -= 1
     if modeTicks < 0:
         modeTicks = 10000
         mode += 1
-        mode = mode % 4
\ No newline at end of file
+        mode = mode % 4
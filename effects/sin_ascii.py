@@ -1,24 +1,15 @@
 #!/usr/bin/env python
 # НАЗВАНИЕ: синусойдный текст_:р
 # ОПИСАНИЕ: Анимированные текста
-import time
 import math
-import platform
-
-if platform.system() == "Windows":
-    from RGBMatrixEmulator import RGBMatrix, RGBMatrixOptions
-    graphics = None  # если нужно
-else:
-    from rgbmatrix import RGBMatrix, RGBMatrixOptions, graphics
 from PIL import Image, ImageDraw, ImageFont
+from frame_clock import FrameClock
+from frame_output import FrameOutput
+from led_matrix import create_matrix, panel_size
 
 # ==================== НАСТРОЙКИ ====================
-# Настройки матрицы
-MATRIX_ROWS = 64
-MATRIX_COLS = 64
-MATRIX_CHAIN_LENGTH = 1
-MATRIX_PARALLEL = 1
-MATRIX_HARDWARE_MAPPING = 'adafruit-hat'
+# Настройки матрицы (секция hardware: в config.yaml)
+MATRIX_COLS, MATRIX_ROWS = panel_size()
 
 # Настройки анимации
 TEXT_STRING = "dilirink_ksenia"
@@ -26,7 +17,6 @@ FONT_SIZE = 8  # Размер шрифта в пикселях
 CHAR_WIDTH = 6  # Ширина символа (включая интервал)
 CHAR_HEIGHT = 8  # Высота символа
 FPS = 60  # Кадров в секунду
-FRAME_DELAY = 1.0 / FPS  # Задержка между кадрами
 
 # Настройки волнового эффекта
 WAVE_SPEED = 0.05  # Скорость волны
@@ -37,16 +27,8 @@ TEXT_COLOR = (255, 255, 255)  # Белый
 BACKGROUND_COLOR = (0, 0, 0)  # Черный
 
 # ==================== ИНИЦИАЛИЗАЦИЯ ====================
-# Конфигурация для матрицы
-options = RGBMatrixOptions()
-options.rows = MATRIX_ROWS
-options.cols = MATRIX_COLS
-options.chain_length = MATRIX_CHAIN_LENGTH
-options.parallel = MATRIX_PARALLEL
-options.hardware_mapping = MATRIX_HARDWARE_MAPPING
-
 # Создание матрицы
-matrix = RGBMatrix(options=options)
+matrix = create_matrix()
 
 # Счетчик кадров
 frame_counter = 0
@@ -109,15 +91,17 @@ def main():
         print("Press CTRL-C to stop.")
         print("-" * 40)
         
+        clock = FrameClock(FPS)
+        output = FrameOutput(matrix, clock)
         while True:
             # Генерируем кадр
             frame = generate_frame()
             
             # Отображаем на матрице
-            matrix.SetImage(frame.convert("RGB"))
+            output.show(frame)
             
-            # Задержка для контроля FPS
-            time.sleep(FRAME_DELAY)
+            # Ожидание следующего кадра
+            clock.tick()
             
     except KeyboardInterrupt:
         print("\n" + "-" * 40)
@@ -1,32 +1,24 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 """
-Красивая анимация алгоритма сортировки для LED панели 64x64
+Красивая анимация алгоритма сортировки для LED панели
 """
 
-import time
 import random
-import platform
-
-if platform.system() == "Windows":
-    from RGBMatrixEmulator import RGBMatrix, RGBMatrixOptions
-    graphics = None  # если нужно
-else:
-    from rgbmatrix import RGBMatrix, RGBMatrixOptions, graphics
 from PIL import Image, ImageDraw, ImageFont
+from frame_clock import FrameClock
+from frame_output import FrameOutput
+from led_matrix import create_matrix, panel_size, scale_factor
 
 # ========== НАСТРОЙКИ ==========
-# Параметры LED матрицы
-MATRIX_ROWS = 64
-MATRIX_COLS = 64
-CHAIN_LENGTH = 1
-PARALLEL = 1
-HARDWARE_MAPPING  = 'adafruit-hat'
+# Параметры LED матрицы (секция hardware: в config.yaml)
+MATRIX_COLS, MATRIX_ROWS = panel_size()
 
 # Параметры анимации
 ANIMATION_SPEED = 0.05  # Задержка между кадрами (секунды)
-ARRAY_SIZE = 64  # Количество элементов для сортировки
+ARRAY_SIZE = MATRIX_COLS  # Количество элементов для сортировки
 BAR_WIDTH = 1  # Ширина столбца
+FONT_SIZE = round(10 * scale_factor())  # Размер шрифта названия алгоритма
 
 # Цветовая схема (RGB)
 COLOR_DEFAULT = (0, 150, 255)  # Синий - обычные элементы
@@ -41,14 +33,16 @@ COLOR_BACKGROUND = (0, 0, 0)  # Черный - фон
 class SortVisualizer:
     """Класс для визуализации алгоритмов сортировки"""
     
-    def __init__(self, matrix, array_size):
-        self.matrix = matrix
+    def __init__(self, array_size, clock, output):
         self.width = MATRIX_COLS
         self.height = MATRIX_ROWS
         self.array_size = min(array_size, self.width)
-        self.array = list(range(1, self.height + 1))
+        # Высоты столбцов равномерно от 1 до высоты панели
+        self.array = [1 + i * self.height // self.array_size for i in range(self.array_size)]
         random.shuffle(self.array)
         self.sorted_indices = set()
+        self.clock = clock
+        self.output = output
         
     def draw_array(self, comparing=[], swapping=[], pivot=-1):
         """Отрисовка массива в виде столбцов"""
@@ -84,8 +78,8 @@ class SortVisualizer:
     def update_display(self, comparing=[], swapping=[], pivot=-1):
         """Обновление дисплея"""
         frame = self.draw_array(comparing, swapping, pivot)
-        self.matrix.SetImage(frame.convert("RGB"))
-        time.sleep(ANIMATION_SPEED)
+        self.output.show(frame)
+        self.clock.tick()
     
     def show_algorithm_name(self, algorithm):
         """Отображение названия алгоритма на 3 секунды"""
@@ -106,10 +100,10 @@ class SortVisualizer:
         # Пытаемся загрузить шрифт, если не получается - используем дефолтный
         try:
             # Пробуем разные размеры шрифта
-            font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 10)
+            font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", FONT_SIZE)
         except:
             try:
-                font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 10)
+                font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", FONT_SIZE)
             except:
                 font = ImageFont.load_default()
         
@@ -145,8 +139,8 @@ class SortVisualizer:
             y_offset += text_height + 2
         
         # Отображаем на матрице 3 секунды
-        self.matrix.SetImage(image.convert("RGB"))
-        time.sleep(3)
+        self.output.show(image)
+        self.clock.hold(3)
     
     # ===== АЛГОРИТМЫ СОРТИРОВКИ =====
     
@@ -276,20 +270,17 @@ class SortVisualizer:
             self.bubble_sort()
         
         # Показываем финальный результат 2 секунды
-        time.sleep(2)
+        self.clock.hold(2)
 
 
 def main():
     """Главная функция"""
     # Инициализация матрицы
-    options = RGBMatrixOptions()
-    options.rows = MATRIX_ROWS
-    options.cols = MATRIX_COLS
-    options.chain_length = CHAIN_LENGTH
-    options.parallel = PARALLEL
-    options.hardware_mapping = HARDWARE_MAPPING
-    
-    matrix = RGBMatrix(options=options)
+    matrix = create_matrix()
+    # Часы и вывод одни на все циклы: каждый FrameOutput создаёт свой холст,
+    # а rgbmatrix не освобождает холсты, пока жива матрица
+    clock = FrameClock(1.0 / ANIMATION_SPEED)
+    output = FrameOutput(matrix, clock)
     
     # Список всех доступных алгоритмов
     algorithms = ['bubble', 'quick', 'insertion', 'selection']
@@ -299,7 +290,7 @@ def main():
     
     try:
         print("=" * 50)
-        print("Анимация сортировки для LED панели 64x64")
+        print(f"Анимация сортировки для LED панели {MATRIX_COLS}x{MATRIX_ROWS}")
         print("=" * 50)
         print(f"Порядок алгоритмов: {' -> '.join(algorithms)}")
         print(f"Размер массива: {ARRAY_SIZE}")
@@ -313,9 +304,9 @@ def main():
             # Выбираем текущий алгоритм из списка
             current_algorithm = algorithms[algorithm_index]
             
-            visualizer = SortVisualizer(matrix, ARRAY_SIZE)
+            visualizer = SortVisualizer(ARRAY_SIZE, clock, output)
             visualizer.update_display()
-            time.sleep(1)
+            clock.hold(1)
             
             visualizer.run_sort(current_algorithm)
             
@@ -323,7 +314,7 @@ def main():
             algorithm_index = (algorithm_index + 1) % len(algorithms)
             
             # Пауза перед следующей итерацией
-            time.sleep(2)
+            clock.hold(2)
             print(f"Следующий алгоритм: {algorithms[algorithm_index]}")
             
     except KeyboardInterrupt:
@@ -6,28 +6,16 @@ Ported to Python for 64x64 LED matrix
 OPTIMIZED VERSION with numpy vectorization
 """
 
-import time
 import numpy as np
-import platform
 
-if platform.system() == "Windows":
-    from RGBMatrixEmulator import RGBMatrix, RGBMatrixOptions
-    graphics = None  # если нужно
-else:
-    from rgbmatrix import RGBMatrix, RGBMatrixOptions, graphics
-from PIL import Image
+from effect_runtime import EffectPlugin, run_standalone
 
 # ============= НАСТРОЙКИ =============
-# Параметры матрицы
-MATRIX_WIDTH = 64
-MATRIX_HEIGHT = 64
-CHAIN_LENGTH = 1
-PARALLEL = 1
-HARDWARE_MAPPING = 'adafruit-hat'
+# Размер холста задаёт рантайм (секция hardware: в config.yaml);
+# шейдер считается в координатах, нормированных на меньшую сторону.
 
 # Параметры анимации
 FPS = 60  # Кадров в секунду
-FRAME_DELAY = 1.0 / FPS
 SCALE = 2.4  # Масштаб паттерна
 NUM_PARTICLES = 20  # Количество светящихся точек
 INTENSITY = 0.00125  # Интенсивность свечения
@@ -35,12 +23,13 @@ INTENSITY = 0.00125  # Интенсивность свечения
 # ======================================
 
 
-class ShaderRenderer:
+class ShaderRenderer(EffectPlugin):
     """Оптимизированный рендерер с предвычислениями"""
+
+    fps = FPS
     
-    def __init__(self, width, height):
-        self.width = width
-        self.height = height
+    def setup(self, width, height):
+        super().setup(width, height)
         self.min_dim = min(width, height)
         
         # Предвычисление сетки координат
@@ -82,7 +71,7 @@ class ShaderRenderer:
         b = 0.6 + 0.6 * np.cos(6.3 * a + 21)
         return np.stack([r, g, b], axis=-1)
     
-    def generate_frame(self, time_val):
+    def generate_frame(self, time_val, dt=None):
         """Генерация кадра с векторизацией numpy"""
         # Трансформация координат (туннельный эффект)
         safe_radius = np.maximum(self.radius, 0.001)
@@ -126,9 +115,7 @@ class ShaderRenderer:
             col += (intensity[..., np.newaxis] * color)
         
         # Преобразование в RGB [0-255]
-        col = np.clip(col * 255, 0, 255).astype(np.uint8)
-        
-        return Image.fromarray(col, 'RGB')
+        return np.clip(col * 255, 0, 255).astype(np.uint8)
 
 
 def generate_frame(time_val):
@@ -136,78 +123,26 @@ def generate_frame(time_val):
     return renderer.generate_frame(time_val)
 
 
+def create_plugin():
+    """Точка входа для рантайма эффектов"""
+    global renderer
+    renderer = ShaderRenderer()
+    return renderer
+
+
 def main():
     """Основная функция запуска анимации"""
-    global renderer
-    
-    # Конфигурация матрицы
-    options = RGBMatrixOptions()
-    options.rows = MATRIX_HEIGHT
-    options.cols = MATRIX_WIDTH
-    options.chain_length = CHAIN_LENGTH
-    options.parallel = PARALLEL
-    options.hardware_mapping = HARDWARE_MAPPING
-    
-    # Инициализация матрицы
-    matrix = RGBMatrix(options=options)
-    
-    # Инициализация оптимизированного рендерера
-    renderer = ShaderRenderer(MATRIX_WIDTH, MATRIX_HEIGHT)
-    
     # print("=" * 50)
     # print("LED Matrix Shader Animation [OPTIMIZED]")
     # print("=" * 50)
-    # print(f"Resolution: {MATRIX_WIDTH}x{MATRIX_HEIGHT}")
     # print(f"Target FPS: {FPS}")
     # print(f"Particles: {NUM_PARTICLES}")
     # print("Press CTRL-C to stop.")
     # print("-" * 50)
-    
-    start_time = time.time()
-    frame_count = 0
-    fps_update_interval = 30  # Обновлять статистику каждые 30 кадров
-    
-    try:
-        while True:
-            frame_start = time.time()
-            
-            # Текущее время для анимации
-            current_time = time.time() - start_time
-            
-            # Генерация кадра
-            frame = renderer.generate_frame(current_time)
-            
-            # Отображение на матрице
-            matrix.SetImage(frame.convert("RGB"))
-            
-            frame_count += 1
-            
-            # Статистика производительности
-            if frame_count % fps_update_interval == 0:
-                elapsed = time.time() - start_time
-                fps_actual = frame_count / elapsed
-                frame_time = (time.time() - frame_start) * 1000
-                # print(f"Frames: {frame_count:5d} | "
-                #       f"FPS: {fps_actual:5.1f} | "
-                #       f"Frame time: {frame_time:5.1f}ms")
-            
-            # Задержка для поддержания целевого FPS
-            frame_elapsed = time.time() - frame_start
-            sleep_time = max(0, FRAME_DELAY - frame_elapsed)
-            if sleep_time > 0:
-                time.sleep(sleep_time)
-            
-    except KeyboardInterrupt:
-        # print("\n" + "=" * 50)
-        # print("Stopping animation...")
-        elapsed = time.time() - start_time
-        avg_fps = frame_count / elapsed if elapsed > 0 else 0
-        # print(f"Total frames: {frame_count}")
-        # print(f"Average FPS: {avg_fps:.1f}")
-        # print(f"Runtime: {elapsed:.1f}s")
-        # print("=" * 50)
-        # print("Goodbye! 👋")
+
+    # Цикл вывода с поддержанием FPS и гашение матрицы выполняет рантайм
+    run_standalone(create_plugin())
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,23 +1,13 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-import time
 import numpy as np
-import platform
-
-if platform.system() == "Windows":
-    from RGBMatrixEmulator import RGBMatrix, RGBMatrixOptions
-    graphics = None  # если нужно
-else:
-    from rgbmatrix import RGBMatrix, RGBMatrixOptions, graphics
-from PIL import Image
+from frame_clock import FrameClock
+from frame_output import FrameOutput
+from led_matrix import create_matrix, panel_size
 
 # ==================== НАСТРОЙКИ ====================
-# Настройки LED матрицы
-MATRIX_ROWS = 64
-MATRIX_COLS = 64
-MATRIX_CHAIN_LENGTH = 1
-MATRIX_PARALLEL = 1
-MATRIX_HARDWARE_MAPPING = 'adafruit-hat'
+# Настройки LED матрицы (секция hardware: в config.yaml)
+MATRIX_COLS, MATRIX_ROWS = panel_size()
 
 # Параметры анимации
 SCALE = 25.0  # масштаб сетки
@@ -35,18 +25,6 @@ COLORS = np.array([
 
 # ==================== ФУНКЦИИ ====================
 
-def setup_matrix():
-    """Настройка LED матрицы"""
-    options = RGBMatrixOptions()
-    options.rows = MATRIX_ROWS
-    options.cols = MATRIX_COLS
-    options.chain_length = MATRIX_CHAIN_LENGTH
-    options.parallel = MATRIX_PARALLEL
-    options.hardware_mapping = MATRIX_HARDWARE_MAPPING
-    
-    return RGBMatrix(options=options)
-
-
 def shader_logic_vectorized(t, width, height):
     """
     Векторизованная версия шейдера с использованием numpy
@@ -123,51 +101,35 @@ def shader_logic_vectorized(t, width, height):
 
 
 def generate_frame(t):
-    """Генерация одного кадра анимации"""
-    # Получаем массив numpy с RGB значениями
-    frame_data = shader_logic_vectorized(t, MATRIX_COLS, MATRIX_ROWS)
-    
-    # Конвертируем в PIL Image
-    # Транспонируем, так как PIL ожидает (height, width, channels)
-    img = Image.fromarray(frame_data, mode='RGB')
-    
-    return img
+    """Генерация одного кадра анимации: массив numpy (height, width, 3) uint8"""
+    return shader_logic_vectorized(t, MATRIX_COLS, MATRIX_ROWS)
 
 
 # ==================== ГЛАВНАЯ ПРОГРАММА ====================
 
 def main():
     """Основной цикл анимации"""
-    matrix = setup_matrix()
+    matrix = create_matrix()
     
     try:
         print("Анимация запущена. Нажмите CTRL-C для остановки.")
         print(f"Откройте браузер: http://localhost:8888/")
         print(f"Используется numpy для ускорения вычислений")
-        start_time = time.time()
-        frame_count = 0
-        last_fps_time = start_time
+        clock = FrameClock(FPS)
+        output = FrameOutput(matrix, clock)
         
         while True:
             # Вычисление времени для анимации
-            current_time = (time.time() - start_time) * SPEED
+            current_time = clock.t * SPEED
             
             # Генерация кадра
             frame = generate_frame(current_time)
             
             # Отображение на матрице
-            matrix.SetImage(frame.convert("RGB"))
-            
-            # Подсчет FPS
-            frame_count += 1
-            if time.time() - last_fps_time >= 1.0:
-                actual_fps = frame_count / (time.time() - last_fps_time)
-                print(f"FPS: {actual_fps:.1f}")
-                frame_count = 0
-                last_fps_time = time.time()
+            output.show(frame)
             
-            # Задержка для FPS
-            time.sleep(1.0 / FPS)
+            # Ожидание следующего кадра (фактический FPS - в /metrics)
+            clock.tick()
             
     except KeyboardInterrupt:
         print("\nОстановка анимации...")
@@ -3,31 +3,21 @@
 # ОПИСАНИЕ: Морфинг белых точек между различными геометрическими паттернами
 import random
 import numpy as np
-import platform
-
-if platform.system() == "Windows":
-    from RGBMatrixEmulator import RGBMatrix, RGBMatrixOptions
-    graphics = None  # если нужно
-else:
-    from rgbmatrix import RGBMatrix, RGBMatrixOptions, graphics
 import time
+from frame_clock import FrameClock
+from frame_output import FrameOutput, PixelBuffer
+from led_matrix import BASE_SIZE, create_matrix, panel_size
 
-# Настройки матрицы
-
-
-options = RGBMatrixOptions()
-options.hardware_mapping = 'adafruit-hat'
-options.rows = 64
-options.cols = 64
-options.brightness = 100
-
+# Настройки матрицы (секция hardware: в config.yaml)
+matrix = create_matrix()
+MATRIX_WIDTH, MATRIX_HEIGHT = panel_size()
 
-
-matrix = RGBMatrix(options=options)
-offscreen_canvas = matrix.CreateFrameCanvas()
-
-# Размеры матрицы
-GRID_SIZE = 64
+# Фигуры заданы на сетке 64x64; на большой панели каждая точка сетки
+# рисуется квадратом CELL x CELL, на панели меньше 64 координаты сетки
+# сжимаются до VIEW x VIEW; сетка выводится по центру
+GRID_SIZE = BASE_SIZE
+CELL = max(1, min(MATRIX_WIDTH, MATRIX_HEIGHT) // GRID_SIZE)
+VIEW = min(GRID_SIZE, MATRIX_WIDTH, MATRIX_HEIGHT)
 
 # Цвета
 WHITE = (255, 255, 255)
@@ -128,10 +118,25 @@ active_points = 0  # Количество точек, которые начал
 points_activation_speed = 2  # Сколько точек активируется за кадр
 frame_counter = 0
 
+clock = FrameClock(40)
+output = FrameOutput(matrix, clock)
+pixels = PixelBuffer(VIEW, VIEW)
+
+if CELL == 1 and (MATRIX_WIDTH, MATRIX_HEIGHT) == (VIEW, VIEW):
+    frame = pixels.pixels
+    cells = None
+else:
+    frame = np.zeros((MATRIX_HEIGHT, MATRIX_WIDTH, 3), dtype=np.uint8)
+    side = VIEW * CELL
+    left = (MATRIX_WIDTH - side) // 2
+    top = (MATRIX_HEIGHT - side) // 2
+    # Вид на область сетки в кадре: (строка, y в клетке, столбец, x в клетке, канал)
+    cells = frame[top:top + side, left:left + side].reshape(VIEW, CELL, VIEW, CELL, 3)
+
 try:
     while True:
         # Очистка буфера
-        offscreen_canvas.Fill(*BLACK)
+        pixels.fill(BLACK)
 
         # Логика анимации
         if not is_waiting:
@@ -142,10 +147,8 @@ try:
                     active_points = min(active_points + points_activation_speed, len(current_points))
             
             # Перемещаем только активные точки
-            for i in range(active_points):
-                diff = target_points[i] - current_points[i]
-                step = np.sign(diff) * np.minimum(np.abs(diff), transition_speed)
-                current_points[i] += step
+            diff = target_points[:active_points] - current_points[:active_points]
+            current_points[:active_points] += np.sign(diff) * np.minimum(np.abs(diff), transition_speed)
 
             # Проверяем, все ли точки достигли цели
             if np.all(current_points == target_points):
@@ -160,16 +163,17 @@ try:
                 active_points = 0  # Сбрасываем счетчик активных точек
                 frame_counter = 0
 
-        # Отрисовка в буфер
-        for x, y in current_points.astype(int):
-            if 0 <= x < GRID_SIZE and 0 <= y < GRID_SIZE:
-                offscreen_canvas.SetPixel(x, y, *WHITE)
+        # Отрисовка всех точек в буфер одной операцией
+        points = current_points if VIEW == GRID_SIZE else current_points * (VIEW / GRID_SIZE)
+        pixels.set_pixels(points[:, 0], points[:, 1], WHITE)
 
         # Отправка буфера на матрицу
-        offscreen_canvas = matrix.SwapOnVSync(offscreen_canvas)
+        if cells is not None:
+            cells[:] = pixels.pixels[:, None, :, None]
+        output.show(frame)
 
-        time.sleep(1/40)
+        clock.tick()
 
 except KeyboardInterrupt:
-    matrix.Clear()
+    output.clear()
 
@@ -1,5 +1,5 @@
-name=flask-app.service
-cp $name /etc/systemd/system/
-
-systemctl enable $name
-systemctl start $name
\ No newline at end of file
+for name in led-effects.service flask-app.service; do
+    cp $name /etc/systemd/system/
+    systemctl enable $name
+    systemctl start $name
+done
\ No newline at end of file